@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+import re
 import sys
 from pathlib import Path
 from logging.config import fileConfig
@@ -28,9 +29,28 @@ from app.core.config import DATABASE_URL
 # (important for autogenerate to see them)
 import app.models.user  # noqa: F401
 import app.models.task  # noqa: F401
+import app.models.user_task_stats  # noqa: F401
+import app.models.revoked_token  # noqa: F401
 
 target_metadata = Base.metadata
 
+# Schema objects maintained outside the ORM models (see app/db/search.py);
+# keep autogenerate from proposing to drop them.
+_UNMANAGED = {("column", "search_vector"), ("index", "ix_tasks_search_vector")}
+# Partitions of tasks and the archive (see app/db/partitions.py)
+_UNMANAGED_TABLES = re.compile(r"tasks_(legacy|archive|\d{4}_\d{2})")
+
+
+def include_object(obj, name, type_, reflected, compare_to) -> bool:
+    if type_ == "table" and reflected and _UNMANAGED_TABLES.fullmatch(name):
+        return False
+    # Index(...).ddl_if(dialect=...) is honoured by create_all but not by
+    # autogenerate; skip indexes meant for the other backend
+    ddl_if = getattr(obj, "_ddl_if", None) if type_ == "index" and not reflected else None
+    if ddl_if is not None and ddl_if.dialect not in (None, context.get_context().dialect.name):
+        return False
+    return (type_, name) not in _UNMANAGED
+
 
 def _to_sync_url(url: str) -> str:
     """
@@ -60,6 +80,7 @@ def run_migrations_offline() -> None:
         dialect_opts={"paramstyle": "named"},
         compare_type=True,
         compare_server_default=True,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -86,6 +107,7 @@ def run_migrations_online() -> None:
             target_metadata=target_metadata,
             compare_type=True,
             compare_server_default=True,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,32 @@
+"""add tasks.version (bumped by every UPDATE; the task ETag)
+
+Revision ID: 0b7d3c9e5a21
+Revises: 6c51491c2b33
+Create Date: 2026-10-18 16:05:12.318904
+
+updated_at has one-second precision on SQLite, so two writes in the same
+second produced the same ETag and a stale If-Match passed. A constant default
+makes adding the column metadata-only on Postgres 11+ (partitions included).
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b7d3c9e5a21'
+down_revision: Union[str, Sequence[str], None] = '6c51491c2b33'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tasks', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('tasks', 'version')
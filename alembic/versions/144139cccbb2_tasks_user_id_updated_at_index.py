@@ -0,0 +1,37 @@
+"""(user_id, updated_at, id) index on tasks for listing ETags and delta sync
+
+Revision ID: 144139cccbb2
+Revises: 98e0042331d3
+Create Date: 2026-10-18 12:41:09.665120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '144139cccbb2'
+down_revision: Union[str, Sequence[str], None] = '98e0042331d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tasks_user_id_updated_at_id',
+            'tasks',
+            ['user_id', 'updated_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tasks_user_id_updated_at_id', table_name='tasks', postgresql_concurrently=True)
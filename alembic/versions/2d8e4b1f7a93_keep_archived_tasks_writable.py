@@ -0,0 +1,144 @@
+"""archived tasks stay the user's: tasks_archive.user_ids, tasks_create_partition(), stats
+
+Revision ID: 2d8e4b1f7a93
+Revises: 7f2a9d41c8b6
+Create Date: 2026-10-18 19:02:37.551820
+
+Archived tasks could be read by id but not updated, deleted, exported or
+counted. Now:
+
+- user_task_stats_apply() skips statements run with secure_notes.moving_tasks
+  set, which app.db.partitions sets when it moves tasks into or out of
+  tasks_archive, and the tasks archived so far are counted again
+- tasks_archive.user_ids (GIN-indexed) finds a user's archived tasks for the
+  export
+- tasks_create_partition() re-creates the partition of a month that was
+  dropped, for archived tasks moved back into tasks to be written (a default
+  partition would do, but rules out DETACH PARTITION ... CONCURRENTLY)
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d8e4b1f7a93'
+down_revision: Union[str, Sequence[str], None] = '7f2a9d41c8b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# frozen copies of app/models/user_task_stats.py's PG_FUNCTION before and at this revision
+_UPSERT = """
+        INSERT INTO user_task_stats AS s (user_id, task_count, content_length, last_updated_at)
+        SELECT delta.user_id, sum(delta.task_count), sum(delta.content_length), now()
+        FROM ({delta}) AS delta
+        GROUP BY delta.user_id
+        ON CONFLICT (user_id) DO UPDATE
+        SET task_count = s.task_count + excluded.task_count,
+            content_length = s.content_length + excluded.content_length,
+            last_updated_at = excluded.last_updated_at;"""
+_ADDED = (
+    "SELECT new_rows.user_id, 1 AS task_count, "
+    "coalesce(new_rows.content_chars, length(new_rows.content), 0) AS content_length FROM new_rows"
+)
+_REMOVED = "SELECT old_rows.user_id, -1, -coalesce(old_rows.content_chars, length(old_rows.content), 0) FROM old_rows"
+_BODY = f"""
+    IF TG_OP = 'INSERT' THEN{_UPSERT.format(delta=_ADDED)}
+    ELSIF TG_OP = 'UPDATE' THEN{_UPSERT.format(delta=f"{_ADDED} UNION ALL {_REMOVED}")}
+    ELSE
+        UPDATE user_task_stats AS s
+        SET task_count = s.task_count - d.task_count,
+            content_length = s.content_length - d.content_length,
+            last_updated_at = now()
+        FROM (
+            SELECT old_rows.user_id, count(*) AS task_count,
+                   sum(coalesce(old_rows.content_chars, length(old_rows.content), 0)) AS content_length
+            FROM old_rows GROUP BY old_rows.user_id
+        ) AS d
+        WHERE s.user_id = d.user_id;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+_HEAD = """
+CREATE OR REPLACE FUNCTION user_task_stats_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN"""
+PREVIOUS_FUNCTION = _HEAD + _BODY
+FUNCTION = (
+    _HEAD
+    + """
+    IF current_setting('secure_notes.moving_tasks', true) = 'on' THEN
+        RETURN NULL;
+    END IF;"""
+    + _BODY
+)
+
+CREATE_PARTITION = """
+CREATE OR REPLACE FUNCTION tasks_create_partition(moment timestamptz) RETURNS boolean LANGUAGE plpgsql AS $$
+DECLARE
+    lower_bound timestamp := date_trunc('month', moment AT TIME ZONE 'UTC');
+    partition_name text := 'tasks_' || to_char(lower_bound, 'YYYY_MM');
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('tasks_create_partitions'));
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN false;
+    END IF;
+    -- as in tasks_create_partitions(): ATTACH does not block reads and writes
+    EXECUTE format(
+        'CREATE TABLE %I (LIKE tasks INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING STORAGE INCLUDING COMPRESSION)',
+        partition_name
+    );
+    EXECUTE format(
+        'ALTER TABLE tasks ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        partition_name,
+        lower_bound AT TIME ZONE 'UTC',
+        (lower_bound + interval '1 month') AT TIME ZONE 'UTC'
+    );
+    RETURN true;
+END
+$$
+"""
+
+# signed: +1 adds the archived tasks to user_task_stats, -1 takes them out again
+ARCHIVED_STATS = """
+    UPDATE user_task_stats AS s
+    SET task_count = s.task_count + {sign} * a.task_count,
+        content_length = s.content_length + {sign} * a.content_length
+    FROM (
+        SELECT (elem->>'user_id')::integer AS user_id, count(*) AS task_count,
+               sum(coalesce((elem->>'content_chars')::integer, length(elem->>'content'), 0)) AS content_length
+        FROM tasks_archive, jsonb_array_elements(tasks_archive.tasks) AS elem
+        GROUP BY 1
+    ) AS a
+    WHERE s.user_id = a.user_id
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(FUNCTION)
+    op.execute(ARCHIVED_STATS.format(sign=1))
+    op.execute("ALTER TABLE tasks_archive ADD COLUMN user_ids integer[]")
+    op.execute(
+        """
+        UPDATE tasks_archive
+        SET user_ids = ARRAY(
+            SELECT DISTINCT (elem->>'user_id')::integer FROM jsonb_array_elements(tasks_archive.tasks) AS elem
+        )
+        """
+    )
+    op.execute("ALTER TABLE tasks_archive ALTER COLUMN user_ids SET NOT NULL")
+    op.execute("CREATE INDEX ix_tasks_archive_user_ids ON tasks_archive USING gin (user_ids)")
+    op.execute(CREATE_PARTITION)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP FUNCTION IF EXISTS tasks_create_partition(timestamptz)")
+    op.execute("DROP INDEX ix_tasks_archive_user_ids")
+    op.execute("ALTER TABLE tasks_archive DROP COLUMN user_ids")
+    op.execute(ARCHIVED_STATS.format(sign=-1))
+    op.execute(PREVIOUS_FUNCTION)
@@ -0,0 +1,100 @@
+"""add user_task_stats, maintained by triggers on tasks, and backfill it
+
+Revision ID: 4a2e7a57661f
+Revises: 144139cccbb2
+Create Date: 2026-10-18 14:05:12.318406
+
+The triggers are created before the backfill, in the same transaction.
+CREATE TRIGGER locks tasks against writes until the migration commits, so no
+write is missed or counted twice, but writes wait for the backfill (one
+GROUP BY over tasks). If that is too long for a large install, run the
+migration in a quiet window, or `python -m app.jobs.rebuild_task_stats`
+afterwards to re-check the numbers.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a2e7a57661f'
+down_revision: Union[str, Sequence[str], None] = '144139cccbb2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# frozen copy of app/models/user_task_stats.py's definitions at the time of this revision
+_UPSERT = """
+        INSERT INTO user_task_stats AS s (user_id, task_count, content_length, last_updated_at)
+        SELECT delta.user_id, sum(delta.task_count), sum(delta.content_length), now()
+        FROM ({delta}) AS delta
+        GROUP BY delta.user_id
+        ON CONFLICT (user_id) DO UPDATE
+        SET task_count = s.task_count + excluded.task_count,
+            content_length = s.content_length + excluded.content_length,
+            last_updated_at = excluded.last_updated_at;"""
+_ADDED = (
+    "SELECT new_rows.user_id, 1 AS task_count, "
+    "coalesce(new_rows.content_chars, length(new_rows.content), 0) AS content_length FROM new_rows"
+)
+_REMOVED = "SELECT old_rows.user_id, -1, -coalesce(old_rows.content_chars, length(old_rows.content), 0) FROM old_rows"
+FUNCTION = f"""
+CREATE OR REPLACE FUNCTION user_task_stats_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN{_UPSERT.format(delta=_ADDED)}
+    ELSIF TG_OP = 'UPDATE' THEN{_UPSERT.format(delta=f"{_ADDED} UNION ALL {_REMOVED}")}
+    ELSE
+        UPDATE user_task_stats AS s
+        SET task_count = s.task_count - d.task_count,
+            content_length = s.content_length - d.content_length,
+            last_updated_at = now()
+        FROM (
+            SELECT old_rows.user_id, count(*) AS task_count,
+                   sum(coalesce(old_rows.content_chars, length(old_rows.content), 0)) AS content_length
+            FROM old_rows GROUP BY old_rows.user_id
+        ) AS d
+        WHERE s.user_id = d.user_id;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+TRIGGERS = {
+    "insert": "REFERENCING NEW TABLE AS new_rows",
+    "update": "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "delete": "REFERENCING OLD TABLE AS old_rows",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_task_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('task_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('content_length', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('last_updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.execute(FUNCTION)
+    for event, referencing in TRIGGERS.items():
+        op.execute(
+            f"CREATE TRIGGER tasks_user_task_stats_{event} AFTER {event.upper()} ON tasks "
+            f"{referencing} FOR EACH STATEMENT EXECUTE FUNCTION user_task_stats_apply()"
+        )
+    op.execute(
+        """
+        INSERT INTO user_task_stats (user_id, task_count, content_length, last_updated_at)
+        SELECT user_id, count(*), sum(coalesce(content_chars, length(content), 0)), max(updated_at)
+        FROM tasks GROUP BY user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for event in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS tasks_user_task_stats_{event} ON tasks")
+    op.execute("DROP FUNCTION IF EXISTS user_task_stats_apply()")
+    op.drop_table('user_task_stats')
@@ -0,0 +1,31 @@
+"""composite (user_id, id) index on tasks for keyset pagination
+
+Revision ID: 4b941b2ec6b6
+Revises: 5095eddcacdb
+Create Date: 2026-10-18 09:12:04.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b941b2ec6b6'
+down_revision: Union[str, Sequence[str], None] = '5095eddcacdb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_tasks_user_id_id', 'tasks', ['user_id', 'id'], unique=False)
+    # (user_id, id) has user_id as its prefix, so the single-column index is redundant
+    op.drop_index(op.f('ix_tasks_user_id'), table_name='tasks')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_tasks_user_id'), 'tasks', ['user_id'], unique=False)
+    op.drop_index('ix_tasks_user_id_id', table_name='tasks')
@@ -0,0 +1,54 @@
+"""add version to the (user_id, updated_at, id) index (INCLUDE), for listing ETags
+
+Revision ID: 5e1b7c3a9f42
+Revises: 9c4e6a2b8d17
+Create Date: 2026-10-18 21:34:52.771093
+
+The listing ETag now also sums tasks.version (an update in the same second as
+the last write left count and max(updated_at) unchanged); with version in the
+index it stays an index-only scan.
+
+tasks is partitioned, and CREATE INDEX CONCURRENTLY does not work on a
+partitioned table: the new index is created ON ONLY tasks (invalid until
+complete), built CONCURRENTLY on each partition and attached partition by
+partition, then swapped in for the old one under the old name.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e1b7c3a9f42'
+down_revision: Union[str, Sequence[str], None] = '9c4e6a2b8d17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NAME = "ix_tasks_user_id_updated_at_id"
+COLUMNS = "(user_id, updated_at, id)"
+
+
+def _replace_index(definition: str, suffix: str) -> None:
+    op.execute(f"CREATE INDEX {NAME}_new ON ONLY tasks {definition}")
+    partitions = op.get_bind().scalars(
+        sa.text("SELECT relid::regclass::text FROM pg_partition_tree('tasks') WHERE isleaf ORDER BY 1")
+    ).all()
+    for partition in partitions:
+        index = f"{partition}_{suffix}"
+        with op.get_context().autocommit_block():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} ON {partition} {definition}")
+        op.execute(f"ALTER INDEX {NAME}_new ATTACH PARTITION {index}")
+    op.execute(f"DROP INDEX {NAME}")
+    op.execute(f"ALTER INDEX {NAME}_new RENAME TO {NAME}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _replace_index(f"{COLUMNS} INCLUDE (version)", "user_id_updated_at_id_version_idx")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _replace_index(COLUMNS, "user_id_updated_at_id_idx1")
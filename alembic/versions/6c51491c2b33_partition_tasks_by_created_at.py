@@ -0,0 +1,199 @@
+"""partition tasks by month of created_at, add tasks_archive
+
+Revision ID: 6c51491c2b33
+Revises: feefe53c4534
+Create Date: 2026-10-18 09:37:36.370664
+
+No rows are copied. The existing table becomes the first partition,
+tasks_legacy, covering everything before the start of next month (UTC):
+
+1. a CHECK on created_at is added NOT VALID and validated (a scan, but
+   reads and writes go on), and the (id, created_at) key is built
+   CONCURRENTLY, so attaching the table needs neither a scan nor a rebuild
+2. in one short transaction under an exclusive lock on tasks: rename it to
+   tasks_legacy, create the partitioned `tasks` with the same columns and
+   indexes (matching indexes on tasks_legacy are adopted, not rebuilt), attach
+   it, move the stats triggers and the id sequence over, and create the
+   partitions for the coming months
+
+Monthly partitions are created ahead of time by tasks_create_partitions(),
+which the app calls periodically (app.db.partitions). ix_tasks_id is dropped:
+the primary key (id, created_at) serves id lookups.
+
+tasks_archive holds rows moved out by `python -m app.jobs.archive_tasks`,
+TASK_ARCHIVE_CHUNK_ROWS consecutive tasks per row as one jsonb array (which
+Postgres compresses), found by the id range they cover.
+
+Downgrade copies every row, archived ones included, back into a plain table;
+writes are blocked while it runs.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c51491c2b33'
+down_revision: Union[str, Sequence[str], None] = 'feefe53c4534'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# months of partitions created by the migration, beyond the current one
+MONTHS_AHEAD = 3
+
+# frozen copy of app/models/user_task_stats.py PG_TRIGGERS at the time of this revision
+STATS_TRIGGERS = {
+    "insert": "REFERENCING NEW TABLE AS new_rows",
+    "update": "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "delete": "REFERENCING OLD TABLE AS old_rows",
+}
+INDEXES = {
+    # name on tasks: (name on tasks_legacy, definition)
+    "ix_tasks_user_id_id": ("tasks_legacy_user_id_id_idx", "(user_id, id)"),
+    "ix_tasks_user_id_updated_at_id": ("tasks_legacy_user_id_updated_at_id_idx", "(user_id, updated_at, id)"),
+    "ix_tasks_search_vector": ("tasks_legacy_search_vector_idx", "USING gin (search_vector)"),
+}
+COLUMNS = "id, user_id, name, content, content_packed, content_chars, created_at, updated_at"
+CREATE_PARTITIONS = """
+CREATE OR REPLACE FUNCTION tasks_create_partitions(months_ahead integer) RETURNS integer LANGUAGE plpgsql AS $$
+DECLARE
+    this_month timestamp := date_trunc('month', now() AT TIME ZONE 'UTC');
+    lower_bound timestamp;
+    partition_name text;
+    created integer := 0;
+BEGIN
+    -- every app worker calls this; one at a time
+    PERFORM pg_advisory_xact_lock(hashtext('tasks_create_partitions'));
+    FOR i IN 0..months_ahead LOOP
+        lower_bound := this_month + make_interval(months => i);
+        partition_name := 'tasks_' || to_char(lower_bound, 'YYYY_MM');
+        CONTINUE WHEN to_regclass(partition_name) IS NOT NULL;
+        BEGIN
+            -- created standalone, then attached: ATTACH does not block reads and
+            -- writes on tasks, CREATE TABLE ... PARTITION OF would
+            EXECUTE format(
+                'CREATE TABLE %I (LIKE tasks INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING STORAGE INCLUDING COMPRESSION)',
+                partition_name
+            );
+            EXECUTE format(
+                'ALTER TABLE tasks ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                partition_name,
+                lower_bound AT TIME ZONE 'UTC',
+                (lower_bound + interval '1 month') AT TIME ZONE 'UTC'
+            );
+            created := created + 1;
+        EXCEPTION WHEN invalid_object_definition THEN
+            -- overlaps a partition that already covers the month (tasks_legacy)
+            NULL;
+        END;
+    END LOOP;
+    RETURN created;
+END
+$$
+"""
+
+
+def _create_stats_triggers() -> None:
+    for event, referencing in STATS_TRIGGERS.items():
+        op.execute(
+            f"CREATE TRIGGER tasks_user_task_stats_{event} AFTER {event.upper()} ON tasks "
+            f"{referencing} FOR EACH STATEMENT EXECUTE FUNCTION user_task_stats_apply()"
+        )
+
+
+def _drop_stats_triggers(table: str) -> None:
+    for event in STATS_TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS tasks_user_task_stats_{event} ON {table}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    cutoff = op.get_bind().scalar(
+        sa.text("SELECT (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '1 month') AT TIME ZONE 'UTC'")
+    )
+    bound = cutoff.isoformat()
+    op.execute(f"ALTER TABLE tasks ADD CONSTRAINT tasks_legacy_created_at_check CHECK (created_at < '{bound}') NOT VALID")
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TABLE tasks VALIDATE CONSTRAINT tasks_legacy_created_at_check")
+        op.execute("CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS tasks_legacy_pkey ON tasks (id, created_at)")
+
+    op.execute("LOCK TABLE tasks IN ACCESS EXCLUSIVE MODE")
+    _drop_stats_triggers("tasks")  # triggers with transition tables are not allowed on partitions
+    op.execute("ALTER TABLE tasks RENAME TO tasks_legacy")
+    op.execute("DROP INDEX IF EXISTS ix_tasks_id")
+    op.execute("ALTER TABLE tasks_legacy DROP CONSTRAINT tasks_pkey")
+    op.execute("ALTER TABLE tasks_legacy ADD CONSTRAINT tasks_legacy_pkey PRIMARY KEY USING INDEX tasks_legacy_pkey")
+    for name, (legacy_name, _) in INDEXES.items():
+        op.execute(f"ALTER INDEX {name} RENAME TO {legacy_name}")
+
+    op.execute(
+        "CREATE TABLE tasks (LIKE tasks_legacy INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING STORAGE "
+        "INCLUDING COMPRESSION) PARTITION BY RANGE (created_at)"
+    )
+    op.execute("ALTER SEQUENCE tasks_id_seq OWNED BY tasks.id")
+    # the partition key has to be part of every unique constraint
+    op.execute("ALTER TABLE tasks ADD CONSTRAINT tasks_pkey PRIMARY KEY (id, created_at)")
+    op.execute("ALTER TABLE tasks ADD CONSTRAINT tasks_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (id)")
+    for name, (_, definition) in INDEXES.items():
+        op.execute(f"CREATE INDEX {name} ON tasks {definition}")
+    op.execute(f"ALTER TABLE tasks ATTACH PARTITION tasks_legacy FOR VALUES FROM (MINVALUE) TO ('{bound}')")
+    op.execute("ALTER TABLE tasks_legacy DROP CONSTRAINT tasks_legacy_created_at_check")
+    _create_stats_triggers()
+    op.execute(CREATE_PARTITIONS)
+    op.execute(f"SELECT tasks_create_partitions({MONTHS_AHEAD})")
+
+    op.execute(
+        """
+        CREATE TABLE tasks_archive (
+            id_range int4range NOT NULL,
+            task_count integer NOT NULL,
+            tasks jsonb NOT NULL,
+            archived_at timestamptz NOT NULL DEFAULT now()
+        )
+        """
+    )
+    op.execute("CREATE INDEX ix_tasks_archive_id_range ON tasks_archive USING gist (id_range)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("LOCK TABLE tasks IN ACCESS EXCLUSIVE MODE")
+    op.execute(
+        "CREATE TABLE tasks_merged (LIKE tasks INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING STORAGE "
+        "INCLUDING COMPRESSION)"
+    )
+    op.execute(f"INSERT INTO tasks_merged ({COLUMNS}) SELECT {COLUMNS} FROM tasks")
+    op.execute(
+        f"""
+        INSERT INTO tasks_merged ({COLUMNS})
+        SELECT t.id, t.user_id, t.name, t.content, decode(t.content_packed, 'base64'), t.content_chars,
+               t.created_at, t.updated_at
+        FROM tasks_archive,
+             jsonb_to_recordset(tasks_archive.tasks) AS t(
+                 id integer, user_id integer, name varchar(200), content text, content_packed text,
+                 content_chars integer, created_at timestamptz, updated_at timestamptz
+             )
+        """
+    )
+    op.execute("DROP TABLE tasks_archive")
+    op.execute("DROP FUNCTION IF EXISTS tasks_create_partitions(integer)")
+    op.execute("ALTER SEQUENCE tasks_id_seq OWNED BY tasks_merged.id")
+    op.execute("DROP TABLE tasks")  # and every partition
+    op.execute("ALTER TABLE tasks_merged RENAME TO tasks")
+    op.execute("ALTER TABLE tasks ADD CONSTRAINT tasks_pkey PRIMARY KEY (id)")
+    op.execute("ALTER TABLE tasks ADD CONSTRAINT tasks_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (id)")
+    op.execute("CREATE INDEX ix_tasks_id ON tasks (id)")
+    for name, (_, definition) in INDEXES.items():
+        op.execute(f"CREATE INDEX {name} ON tasks {definition}")
+    _create_stats_triggers()
+    # archiving subtracted the archived tasks from the counters
+    op.execute("DELETE FROM user_task_stats")
+    op.execute(
+        """
+        INSERT INTO user_task_stats (user_id, task_count, content_length, last_updated_at)
+        SELECT user_id, count(*), sum(coalesce(content_chars, length(content), 0)), max(updated_at)
+        FROM tasks GROUP BY user_id
+        """
+    )
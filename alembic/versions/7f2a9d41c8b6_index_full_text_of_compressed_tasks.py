@@ -0,0 +1,78 @@
+"""search the full text of compressed tasks: tasks.content_vector, trigger-set search_vector
+
+Revision ID: 7f2a9d41c8b6
+Revises: 0b7d3c9e5a21
+Create Date: 2026-10-18 17:21:44.902137
+
+search_vector was generated from `content`, which holds only the head of a
+compressed body, so words further into a large note could not be found. The
+app now writes content_vector (the tsvector of the full text) along with a
+compressed body, and search_vector becomes a plain column set by a BEFORE
+INSERT/UPDATE trigger from name and content_vector (or content). Dropping the
+expression keeps the stored values and the GIN index: no rewrite, no reindex.
+
+Bodies compressed before this revision are indexed afterwards, in small
+batches, by
+
+    python -m app.jobs.compress_content
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f2a9d41c8b6'
+down_revision: Union[str, Sequence[str], None] = '0b7d3c9e5a21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# frozen copies of app/db/search.py's definitions at the time of this revision
+CREATE_FUNCTION = """
+CREATE OR REPLACE FUNCTION tasks_search_vector() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector := setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+        setweight(coalesce(NEW.content_vector, to_tsvector('english', coalesce(NEW.content, ''))), 'B');
+    RETURN NEW;
+END
+$$
+"""
+CREATE_TRIGGER = (
+    "CREATE TRIGGER tasks_search_vector BEFORE INSERT OR UPDATE OF name, content, content_vector ON tasks "
+    "FOR EACH ROW EXECUTE FUNCTION tasks_search_vector()"
+)
+# as created by d3f0ce528de0
+PREVIOUS_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tasks', sa.Column('content_vector', postgresql.TSVECTOR(), nullable=True))
+    op.execute("ALTER TABLE tasks ALTER COLUMN search_vector DROP EXPRESSION")
+    op.execute(CREATE_FUNCTION)
+    op.execute(CREATE_TRIGGER)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS tasks_search_vector ON tasks")
+    op.execute("DROP FUNCTION IF EXISTS tasks_search_vector()")
+    op.drop_column('tasks', 'content_vector')
+    # a column can't be turned back into a generated one: re-add it (a rewrite)
+    op.drop_column('tasks', 'search_vector')
+    op.execute(
+        f"ALTER TABLE tasks ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({PREVIOUS_SEARCH_VECTOR}) STORED"
+    )
+    partitioned = op.get_bind().scalar(sa.text("SELECT relkind = 'p' FROM pg_class WHERE oid = 'tasks'::regclass"))
+    if partitioned:
+        # CONCURRENTLY is not supported on partitioned tables
+        op.execute("CREATE INDEX ix_tasks_search_vector ON tasks USING gin (search_vector)")
+    else:
+        with op.get_context().autocommit_block():
+            op.execute("CREATE INDEX CONCURRENTLY ix_tasks_search_vector ON tasks USING gin (search_vector)")
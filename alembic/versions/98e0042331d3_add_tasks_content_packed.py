@@ -0,0 +1,54 @@
+"""add tasks.content_packed (compressed large content) and tasks.content_chars
+
+Revision ID: 98e0042331d3
+Revises: d3f0ce528de0
+Create Date: 2026-10-18 11:20:37.402915
+
+Both columns are nullable without defaults, so adding them is a metadata-only
+change. Existing rows are compressed afterwards, in small batches, by
+
+    python -m app.jobs.compress_content
+
+"""
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '98e0042331d3'
+down_revision: Union[str, Sequence[str], None] = 'd3f0ce528de0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _unpack(data: bytes) -> str:
+    # frozen copy of app/db/types.py's format at the time of this revision
+    marker, body = data[:1], data[1:]
+    if marker == b"\x01":
+        body = zlib.decompress(body)
+    elif marker == b"\x02":
+        import zstandard
+
+        body = zstandard.ZstdDecompressor().decompress(body)
+    return body.decode("utf-8")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tasks', sa.Column('content_packed', sa.LargeBinary(), nullable=True))
+    op.add_column('tasks', sa.Column('content_chars', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # move compressed bodies back into the plain column before dropping it
+    tasks = sa.table('tasks', sa.column('id'), sa.column('content'), sa.column('content_packed'))
+    conn = op.get_bind()
+    rows = conn.execute(sa.select(tasks.c.id, tasks.c.content_packed).where(tasks.c.content_packed.is_not(None)))
+    for task_id, packed in rows.fetchall():
+        conn.execute(tasks.update().where(tasks.c.id == task_id).values(content=_unpack(packed)))
+    op.drop_column('tasks', 'content_chars')
+    op.drop_column('tasks', 'content_packed')
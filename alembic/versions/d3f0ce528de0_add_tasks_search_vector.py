@@ -0,0 +1,45 @@
+"""add tasks.search_vector (generated tsvector) with a GIN index
+
+Revision ID: d3f0ce528de0
+Revises: 4b941b2ec6b6
+Create Date: 2026-10-18 10:02:51.730114
+
+Adding a STORED generated column rewrites the tasks table under an ACCESS
+EXCLUSIVE lock; schedule it for a quiet window on large installs. The GIN
+index is then built CONCURRENTLY so writes are not blocked while it builds.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# frozen copy of app/db/search.py's definition at the time of this revision
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'B')"
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f0ce528de0'
+down_revision: Union[str, Sequence[str], None] = '4b941b2ec6b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        f"ALTER TABLE tasks ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED"
+    )
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY ix_tasks_search_vector ON tasks USING gin (search_vector)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_tasks_search_vector")
+    op.drop_column('tasks', 'search_vector')
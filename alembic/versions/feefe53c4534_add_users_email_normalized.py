@@ -0,0 +1,60 @@
+"""add users.email_normalized (lower-cased email) with a unique index
+
+Revision ID: feefe53c4534
+Revises: 4a2e7a57661f
+Create Date: 2026-10-18 15:32:47.120583
+
+Backfills lower(trim(email)), then builds the unique index concurrently and
+sets NOT NULL. Fails, before touching the index, if two existing accounts
+differ only in the case of their email: merge or rename those first
+(SELECT lower(trim(email)), count(*) FROM users GROUP BY 1 HAVING count(*) > 1).
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'feefe53c4534'
+down_revision: Union[str, Sequence[str], None] = '4a2e7a57661f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# frozen copy of app/models/user.py's normalize_email() at the time of this revision
+BACKFILL = "UPDATE users SET email_normalized = lower(trim(email)) WHERE email_normalized IS NULL"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('email_normalized', sa.String(length=100), nullable=True))
+    op.execute(BACKFILL)
+    duplicates = op.get_bind().execute(
+        sa.text(
+            "SELECT email_normalized, count(*) FROM users "
+            "GROUP BY email_normalized HAVING count(*) > 1 ORDER BY 2 DESC LIMIT 10"
+        )
+    ).all()
+    if duplicates:
+        raise RuntimeError(
+            "users.email_normalized would not be unique; resolve these accounts first: "
+            + ", ".join(f"{email} ({count} accounts)" for email, count in duplicates)
+        )
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_email_normalized', 'users', ['email_normalized'], unique=True, postgresql_concurrently=True
+        )
+    # rows inserted by the previous app version since the first backfill; the
+    # lock (reads still pass) keeps new ones out until NOT NULL is in place
+    op.execute("LOCK TABLE users IN SHARE MODE")
+    op.execute(BACKFILL)
+    op.alter_column('users', 'email_normalized', existing_type=sa.String(length=100), nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_email_normalized', table_name='users', postgresql_concurrently=True)
+    op.drop_column('users', 'email_normalized')
@@ -0,0 +1,158 @@
+"""
+Admission control in front of the connection pool.
+
+Every request is classified (reads, writes, signup) and must get a slot from
+its class's AdmissionGate before the app runs. A gate admits up to `limit`
+requests at once and lets up to `queue_size` more wait, each for at most
+`queue_timeout` seconds. Anything beyond that is answered straight away with
+503 + Retry-After: under overload the server keeps serving what it admitted at
+normal latency instead of letting every request time out on the pool.
+
+Slots are held until the response is fully sent, so streamed exports count
+for as long as they stream. Gates are per process (per worker).
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from starlette.responses import JSONResponse
+
+from app.core.config import (
+    ADMISSION_QUEUE_SIZE,
+    ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    ADMISSION_READ_CONCURRENCY,
+    ADMISSION_RETRY_AFTER_SECONDS,
+    ADMISSION_SIGNUP_CONCURRENCY,
+    ADMISSION_WRITE_CONCURRENCY,
+)
+from app.core.metrics import Counter, Gauge, Histogram
+
+ADMISSION_REQUESTS = Counter(
+    "admission_requests_total",
+    "Requests by class and result (admitted, queued, shed_queue_full, shed_timeout)",
+    ("class", "result"),
+)
+ADMISSION_IN_FLIGHT = Gauge("admission_in_flight", "Requests holding an admission slot", ("class",))
+ADMISSION_QUEUE_DEPTH = Gauge("admission_queue_depth", "Requests waiting for an admission slot", ("class",))
+ADMISSION_QUEUE_WAIT_SECONDS = Histogram(
+    "admission_queue_wait_seconds", "Time queued requests waited for a slot (admitted or not)", ("class",)
+)
+
+READS, WRITES, SIGNUP = "reads", "writes", "signup"
+
+# bcrypt-bound endpoints, limited separately so a signup storm cannot starve writes
+_SIGNUP_ROUTES = {("POST", "/users/"), ("POST", "/users"), ("POST", "/auth/login")}
+# no database work; always admitted so health checks and scrapes work under overload
+_EXEMPT_PATHS = {"/", "/metrics"}
+
+
+class Overloaded(Exception):
+    """Raised by AdmissionGate.acquire when a request is shed; args[0] is the reason."""
+
+
+class AdmissionGate:
+    """A semaphore with a bounded, time-limited FIFO wait queue."""
+
+    def __init__(self, name: str, limit: int, queue_size: int, queue_timeout: float):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    def __len__(self) -> int:
+        """Number of queued requests."""
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            ADMISSION_IN_FLIGHT.inc(**{"class": self.name})
+            ADMISSION_REQUESTS.inc(**{"class": self.name, "result": "admitted"})
+            return
+        if len(self._waiters) >= self.queue_size:
+            ADMISSION_REQUESTS.inc(**{"class": self.name, "result": "shed_queue_full"})
+            raise Overloaded("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        ADMISSION_QUEUE_DEPTH.inc(**{"class": self.name})
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over just as we gave up: pass it on
+                self.release()
+            elif waiter in self._waiters:  # release() may have skipped past it already
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            ADMISSION_REQUESTS.inc(**{"class": self.name, "result": "shed_timeout"})
+            raise Overloaded("timeout")
+        finally:
+            ADMISSION_QUEUE_DEPTH.dec(**{"class": self.name})
+            ADMISSION_QUEUE_WAIT_SECONDS.observe(time.perf_counter() - started, **{"class": self.name})
+        # release() transferred its slot to us; in_flight is unchanged
+        ADMISSION_REQUESTS.inc(**{"class": self.name, "result": "queued"})
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+        ADMISSION_IN_FLIGHT.dec(**{"class": self.name})
+
+
+gates: Dict[str, AdmissionGate] = {
+    READS: AdmissionGate(READS, ADMISSION_READ_CONCURRENCY, ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT_SECONDS),
+    WRITES: AdmissionGate(WRITES, ADMISSION_WRITE_CONCURRENCY, ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT_SECONDS),
+    SIGNUP: AdmissionGate(SIGNUP, ADMISSION_SIGNUP_CONCURRENCY, ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT_SECONDS),
+}
+
+
+def request_class(method: str, path: str) -> Optional[str]:
+    """Admission class for a request, or None when it is exempt."""
+    if path in _EXEMPT_PATHS:
+        return None
+    if path.endswith("/tasks/events"):
+        # long-lived change feed streams; capped by CHANGE_FEED_MAX_CONNECTIONS instead
+        return None
+    if (method, path) in _SIGNUP_ROUTES:
+        return SIGNUP
+    if method in ("GET", "HEAD"):
+        return READS
+    return WRITES
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware: acquire the request's gate, or answer 503 without running the app."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        kind = request_class(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if kind is None:
+            await self.app(scope, receive, send)
+            return
+
+        gate = gates[kind]
+        try:
+            await gate.acquire()
+        except Overloaded:
+            response = JSONResponse(
+                {"detail": "Server is overloaded, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(ADMISSION_RETRY_AFTER_SECONDS)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
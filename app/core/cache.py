@@ -0,0 +1,262 @@
+"""
+Read-through cache used in front of hot service reads (e.g. task_service.get_task).
+
+Two backends share one interface:
+
+- MemoryCache: in-process LRU with per-entry TTL (per worker; fine for a
+  single process, stale across workers until the TTL expires)
+- RedisCache: any Redis-protocol async client (redis.asyncio, or
+  fakeredis.aioredis in tests), shared by every worker
+
+Values must be JSON-serialisable. Concurrent misses on the same key are
+coalesced so only one caller runs the loader (stampede protection).
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from app.core.config import CACHE_BACKEND, CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS, REDIS_URL
+from app.core.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Cache lookups by result (hit, miss, coalesced)", ("cache", "result")
+)
+CACHE_EVICTIONS = Counter(
+    "cache_evictions_total", "Entries dropped by the cache (lru, expired)", ("cache", "reason")
+)
+
+
+class Cache:
+    """Base class: backends implement get/set/add/delete/incr, get_or_load is shared."""
+
+    name = "cache"
+
+    def __init__(self, default_ttl: float = CACHE_TTL_SECONDS, name: Optional[str] = None):
+        self.default_ttl = default_ttl
+        if name is not None:
+            self.name = name  # metrics label, for caches other than the read cache
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    async def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """set() only if key is absent (or expired); whether it was set."""
+        raise NotImplementedError
+
+    async def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    async def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        """
+        Atomically bump a counter (kept ttl seconds after its last bump, or for
+        good). A missing counter starts from the current time in ns, so a counter
+        lost to eviction or expiry never goes back to a value that older cache
+        keys were built from.
+        """
+        raise NotImplementedError
+
+    async def incr_many(self, keys: Iterable[str], ttl: Optional[float] = None) -> None:
+        """incr() every key; backends may do it in one round trip."""
+        for key in keys:
+            await self.incr(key, ttl)
+
+    async def generation(self, key: str, ttl: Optional[float] = None) -> int:
+        """Current value of an incr() counter, initialising it if missing."""
+        value = await self.get(key)
+        return value if value is not None else await self.incr(key, ttl)
+
+    async def get_or_load(
+        self, key: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[float] = None
+    ) -> Any:
+        """
+        Return the cached value for key, or run loader, cache its result (unless None)
+        and return it. While a load is in flight other callers for the same key wait
+        for it instead of hitting the database themselves.
+        """
+        try:
+            value = await self.get(key)
+        except Exception as e:
+            # a cache outage degrades to uncached reads, never to failed requests
+            logger.warning("Cache get failed for %s: %s", key, str(e))
+            value = None
+        if value is not None:
+            CACHE_REQUESTS.inc(cache=self.name, result="hit")
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            CACHE_REQUESTS.inc(cache=self.name, result="coalesced")
+            ok, value = await asyncio.shield(inflight)
+            if ok:
+                return value
+            # the leader failed; fall through and try with our own loader
+
+        CACHE_REQUESTS.inc(cache=self.name, result="miss")
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        result: Tuple[bool, Any] = (False, None)
+        try:
+            value = await loader()
+            result = (True, value)
+            if value is not None:
+                try:
+                    await self.set(key, value, ttl)
+                except Exception as e:
+                    logger.warning("Cache set failed for %s: %s", key, str(e))
+            return value
+        finally:
+            del self._inflight[key]
+            future.set_result(result)
+
+
+class NullCache(Cache):
+    """Caching disabled: every lookup is a miss (misses are still coalesced)."""
+
+    name = "none"
+
+    async def get(self, key: str) -> Optional[Any]:
+        return None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        pass
+
+    async def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        return True
+
+    async def delete(self, *keys: str) -> None:
+        pass
+
+    async def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        return 0
+
+
+class MemoryCache(Cache):
+    name = "memory"
+
+    def __init__(
+        self,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        default_ttl: float = CACHE_TTL_SECONDS,
+        name: Optional[str] = None,
+    ):
+        super().__init__(default_ttl, name)
+        self.max_entries = max_entries
+        # key -> (expires_at or None, value); ordered oldest -> most recently used
+        self._data: "OrderedDict[str, Tuple[Optional[float], Any]]" = OrderedDict()
+
+    def _store(self, key: str, value: Any, expires_at: Optional[float]) -> None:
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            CACHE_EVICTIONS.inc(cache=self.name, reason="lru")
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            CACHE_EVICTIONS.inc(cache=self.name, reason="expired")
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        self._store(key, value, time.monotonic() + ttl)
+
+    async def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        if await self.get(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        current = await self.get(key)
+        value = (current if current is not None else time.time_ns()) + 1
+        self._store(key, value, time.monotonic() + ttl if ttl is not None else None)
+        return value
+
+
+class RedisCache(Cache):
+    name = "redis"
+
+    def __init__(
+        self,
+        client,
+        prefix: str = "secure-notes:",
+        default_ttl: float = CACHE_TTL_SECONDS,
+        name: Optional[str] = None,
+    ):
+        super().__init__(default_ttl, name)
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisCache":
+        # optional dependency: only needed when CACHE_BACKEND=redis
+        import redis.asyncio as redis
+
+        return cls(redis.from_url(url), **kwargs)
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        await self.client.set(self.prefix + key, json.dumps(value), px=int(ttl * 1000))
+
+    async def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        ttl = self.default_ttl if ttl is None else ttl
+        return bool(await self.client.set(self.prefix + key, json.dumps(value), px=int(ttl * 1000), nx=True))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*(self.prefix + k for k in keys))
+
+    def _queue_incr(self, pipe, key: str, ttl: Optional[float]) -> None:
+        pipe.set(self.prefix + key, time.time_ns(), nx=True)
+        pipe.incr(self.prefix + key)
+        if ttl is not None:
+            pipe.pexpire(self.prefix + key, int(ttl * 1000))
+
+    async def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        async with self.client.pipeline(transaction=True) as pipe:
+            self._queue_incr(pipe, key, ttl)
+            results = await pipe.execute()
+        return int(results[1])
+
+    async def incr_many(self, keys: Iterable[str], ttl: Optional[float] = None) -> None:
+        async with self.client.pipeline(transaction=True) as pipe:
+            for key in keys:
+                self._queue_incr(pipe, key, ttl)
+            await pipe.execute()
+
+
+def build_cache(backend: str = CACHE_BACKEND) -> Cache:
+    if backend == "memory":
+        return MemoryCache()
+    if backend == "redis":
+        return RedisCache.from_url(REDIS_URL)
+    if backend == "none":
+        return NullCache()
+    raise ValueError(f"Unknown CACHE_BACKEND: {backend!r}")
+
+
+cache = build_cache()
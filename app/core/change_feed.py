@@ -0,0 +1,415 @@
+"""
+Task change feed: created/updated/deleted events pushed to clients over
+server-sent events (GET /users/{user_id}/tasks/events) instead of polling.
+
+task_service publishes an event after every committed task write. The
+Broadcaster fans events out to the subscribers of the task's user in this
+process:
+
+- Broadcaster ("memory"): in-process only; single worker, tests, benchmarks
+- PostgresBroadcaster ("postgres"): publishes with NOTIFY, sent by a
+  background task so a write never waits for it, and receives every worker's
+  events on one LISTEN connection per worker, so a client sees changes made
+  through any worker
+
+Each connection has a bounded buffer. A client that falls more than
+CHANGE_FEED_BUFFER_SIZE events behind has its buffer dropped and gets a
+`resync` event: refetch the listing, then carry on. A reconnecting client
+that sends Last-Event-ID gets the events it missed replayed from the
+per-worker history (CHANGE_FEED_HISTORY_SIZE events), or a `resync` when that
+id is no longer known.
+
+An idle connection costs one small Subscriber object and a parked coroutine:
+no timers and no per-connection polling. One heartbeat task per worker wakes
+every connection every CHANGE_FEED_HEARTBEAT_SECONDS to send a keep-alive
+comment.
+"""
+import asyncio
+import json
+import logging
+import secrets
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.engine import make_url
+
+from app.core.config import (
+    CHANGE_FEED_BACKEND,
+    CHANGE_FEED_BUFFER_SIZE,
+    CHANGE_FEED_HEARTBEAT_SECONDS,
+    CHANGE_FEED_HISTORY_SIZE,
+    CHANGE_FEED_MAX_CONNECTIONS,
+    DATABASE_URL,
+)
+from app.core.metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+FEED_CONNECTIONS = Gauge("change_feed_connections", "Open change feed (SSE) connections")
+FEED_EVENTS = Counter("change_feed_events_total", "Task change events received for fan-out", ("type",))
+FEED_RESYNCS = Counter(
+    "change_feed_resyncs_total", "resync events sent, by reason (overflow, unknown_last_event_id, ...)", ("reason",)
+)
+
+CREATED, UPDATED, DELETED = "created", "updated", "deleted"
+
+
+class TooManyConnections(Exception):
+    pass
+
+
+class ChangeEvent:
+    __slots__ = ("id", "type", "user_id", "task_id", "updated_at", "seq", "_frame")
+
+    def __init__(self, id: str, type: str, user_id: int, task_id: int, updated_at: Optional[str]):
+        self.id = id
+        self.type = type
+        self.user_id = user_id
+        self.task_id = task_id
+        self.updated_at = updated_at
+        # position in this worker's history, set on delivery
+        self.seq = 0
+        self._frame: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "type": self.type,
+            "user_id": self.user_id,
+            "task_id": self.task_id,
+            "updated_at": self.updated_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ChangeEvent":
+        return cls(data["id"], data["type"], data["user_id"], data["task_id"], data["updated_at"])
+
+    def frame(self) -> str:
+        """The SSE frame; encoded once and shared by every subscriber."""
+        if self._frame is None:
+            data = json.dumps({"id": self.task_id, "user_id": self.user_id, "updated_at": self.updated_at})
+            self._frame = f"id: {self.id}\nevent: {self.type}\ndata: {data}\n\n"
+        return self._frame
+
+
+def _resync_frame(reason: str) -> str:
+    return f"event: resync\ndata: {json.dumps({'reason': reason})}\n\n"
+
+
+class Subscriber:
+    """One open feed connection: a bounded event buffer and a wake-up flag."""
+
+    __slots__ = ("user_id", "_events", "_wakeup", "_resync", "closed")
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self._events: Deque[ChangeEvent] = deque()
+        self._wakeup = asyncio.Event()
+        self._resync: Optional[str] = None
+        self.closed = False
+
+    def push(self, event: ChangeEvent) -> None:
+        if self._resync is not None:
+            return  # the client refetches everything anyway
+        if len(self._events) >= CHANGE_FEED_BUFFER_SIZE:
+            self.resync("overflow")
+            return
+        self._events.append(event)
+        self._wakeup.set()
+
+    def resync(self, reason: str) -> None:
+        self._events.clear()
+        self._resync = reason
+        self._wakeup.set()
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def close(self) -> None:
+        self.closed = True
+        self._wakeup.set()
+
+    async def frames(self) -> Optional[List[str]]:
+        """
+        Wait for events (or a heartbeat) and return their SSE frames: [] on a
+        heartbeat, None once the subscriber is closed.
+        """
+        await self._wakeup.wait()
+        self._wakeup.clear()
+        if self.closed:
+            return None
+        if self._resync is not None:
+            FEED_RESYNCS.inc(reason=self._resync)
+            frames, self._resync = [_resync_frame(self._resync)], None
+            return frames
+        frames = [event.frame() for event in self._events]
+        self._events.clear()
+        return frames
+
+
+class Broadcaster:
+    """In-process fan-out with a bounded history for Last-Event-ID resumes."""
+
+    name = "memory"
+
+    def __init__(
+        self,
+        history_size: int = CHANGE_FEED_HISTORY_SIZE,
+        heartbeat: float = CHANGE_FEED_HEARTBEAT_SECONDS,
+        max_connections: int = CHANGE_FEED_MAX_CONNECTIONS,
+    ):
+        self.heartbeat = heartbeat
+        self.max_connections = max_connections
+        self._subscribers: Dict[int, Set[Subscriber]] = {}
+        self._connections = 0
+        self._history: Deque[ChangeEvent] = deque()
+        self._history_size = history_size
+        self._seqs: Dict[str, int] = {}
+        self._next_seq = 1
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+    # ---- lifecycle ----
+    async def start(self) -> None:
+        """Idempotent; called before the first subscription."""
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.get_running_loop().create_task(self._beat())
+
+    async def stop(self) -> None:
+        """End every open stream (so servers waiting for requests to finish can exit)."""
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        for subscribers in self._subscribers.values():
+            for subscriber in subscribers:
+                subscriber.close()
+
+    async def _beat(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            for subscribers in self._subscribers.values():
+                for subscriber in subscribers:
+                    subscriber.wake()
+
+    # ---- publishing ----
+    async def publish(self, events: List[ChangeEvent]) -> None:
+        self._deliver(events)
+
+    def _deliver(self, events: Iterable[ChangeEvent]) -> None:
+        for event in events:
+            FEED_EVENTS.inc(type=event.type)
+            event.seq = self._next_seq
+            self._next_seq += 1
+            self._history.append(event)
+            self._seqs[event.id] = event.seq
+            if len(self._history) > self._history_size:
+                del self._seqs[self._history.popleft().id]
+            for subscriber in self._subscribers.get(event.user_id, ()):
+                subscriber.push(event)
+
+    def resync_all(self, reason: str) -> None:
+        """Events may have been lost (e.g. the LISTEN connection dropped)."""
+        for subscribers in self._subscribers.values():
+            for subscriber in subscribers:
+                subscriber.resync(reason)
+
+    # ---- subscribing ----
+    def subscribe(self, user_id: int, last_event_id: Optional[str] = None) -> Subscriber:
+        if self.full():
+            raise TooManyConnections()
+        subscriber = Subscriber(user_id)
+        if last_event_id:
+            after = self._seqs.get(last_event_id)
+            if after is None:
+                subscriber.resync("unknown_last_event_id")
+            else:
+                for event in self._history:
+                    if event.seq > after and event.user_id == user_id:
+                        subscriber.push(event)
+        self._subscribers.setdefault(user_id, set()).add(subscriber)
+        self._connections += 1
+        FEED_CONNECTIONS.inc()
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        subscribers = self._subscribers.get(subscriber.user_id)
+        if subscribers is None or subscriber not in subscribers:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self._subscribers[subscriber.user_id]
+        self._connections -= 1
+        FEED_CONNECTIONS.dec()
+
+    def full(self) -> bool:
+        return self._connections >= self.max_connections
+
+    def __len__(self) -> int:
+        """Number of open connections."""
+        return self._connections
+
+
+class PostgresBroadcaster(Broadcaster):
+    """
+    Fan-out across workers with LISTEN/NOTIFY on a dedicated asyncpg
+    connection, which also LISTENs and delivers every worker's events (its own
+    included) locally.
+
+    publish() only queues the events: a sender task sends whatever has queued
+    up since its last round trip as one statement, so writers never wait for
+    NOTIFY or for each other. Every worker receives notifications in the same
+    order, the order they were sent in; that is this worker's publish order
+    for its own events, but not necessarily the order in which the writes of
+    different workers committed.
+    """
+
+    name = "postgres"
+    CHANNEL = "task_changes"
+    # NOTIFY payloads must stay under 8000 bytes
+    MAX_PAYLOAD = 7000
+    # events queued while NOTIFY is slow or failing; beyond that they only reach this worker
+    MAX_PENDING = 10_000
+    # one round trip for every payload; ordinality keeps them in queue order
+    _NOTIFY = "SELECT pg_notify($1, p.payload) FROM unnest($2::text[]) WITH ORDINALITY AS p(payload, n) ORDER BY p.n"
+
+    def __init__(self, dsn: str, **kwargs):
+        super().__init__(**kwargs)
+        self._dsn = dsn
+        self._conn = None
+        self._connect_lock = asyncio.Lock()
+        self._pending: List[ChangeEvent] = []
+        self._pending_added = asyncio.Event()
+        self._sender: Optional[asyncio.Task] = None
+
+    async def _connection(self):
+        async with self._connect_lock:
+            if self._conn is None or self._conn.is_closed():
+                # optional dependency at import time: only needed with the postgres backend
+                import asyncpg
+
+                conn = await asyncpg.connect(self._dsn)
+                await conn.add_listener(self.CHANNEL, self._on_notify)
+                conn.add_termination_listener(self._on_terminated)
+                self._conn = conn
+            return self._conn
+
+    async def start(self) -> None:
+        await super().start()
+        await self._connection()
+        self._start_sender()
+
+    async def stop(self) -> None:
+        await super().stop()
+        if self._sender is not None:
+            self._sender.cancel()
+            self._sender = None
+        await self._send_pending()
+        if self._conn is not None and not self._conn.is_closed():
+            await self._conn.close()
+        self._conn = None
+
+    def _start_sender(self) -> None:
+        if self._sender is None or self._sender.done():
+            self._sender = asyncio.get_running_loop().create_task(self._send_loop())
+
+    def _on_notify(self, conn, pid, channel, payload: str) -> None:
+        try:
+            self._deliver(ChangeEvent.from_dict(item) for item in json.loads(payload))
+        except Exception:
+            logger.exception("Bad change feed notification")
+
+    def _on_terminated(self, conn) -> None:
+        logger.warning("Change feed LISTEN connection lost; clients will resync")
+        self._conn = None
+        # notifications sent while disconnected are gone
+        self.resync_all("listener_lost")
+
+    def _payloads(self, events: List[ChangeEvent]) -> Iterable[str]:
+        chunk: List[str] = []
+        size = 2
+        for event in events:
+            item = json.dumps(event.to_dict())
+            if chunk and size + len(item) + 1 > self.MAX_PAYLOAD:
+                yield "[" + ",".join(chunk) + "]"
+                chunk, size = [], 2
+            chunk.append(item)
+            size += len(item) + 1
+        if chunk:
+            yield "[" + ",".join(chunk) + "]"
+
+    async def publish(self, events: List[ChangeEvent]) -> None:
+        """Queue events for the sender task; returns without waiting for NOTIFY."""
+        if len(self._pending) + len(events) > self.MAX_PENDING:
+            logger.error("Change feed NOTIFY queue full; %d events only reach this worker", len(events))
+            self._deliver(events)
+            return
+        self._pending.extend(events)
+        self._pending_added.set()
+        self._start_sender()
+
+    async def _send_loop(self) -> None:
+        while True:
+            await self._pending_added.wait()
+            self._pending_added.clear()
+            await self._send_pending()
+
+    async def _send_pending(self) -> None:
+        events, self._pending = self._pending, []
+        if not events:
+            return
+        try:
+            conn = await self._connection()
+            await conn.execute(self._NOTIFY, self.CHANNEL, list(self._payloads(events)))
+        except Exception as e:
+            # other workers miss these; local subscribers still get them
+            logger.error("Change feed NOTIFY failed: %s", str(e))
+            self._deliver(events)
+
+
+def build_broadcaster(backend: str = CHANGE_FEED_BACKEND) -> Broadcaster:
+    url = make_url(DATABASE_URL)
+    if backend == "auto":
+        backend = "postgres" if url.get_driver_name() == "asyncpg" else "memory"
+    if backend == "memory":
+        return Broadcaster()
+    if backend == "postgres":
+        return PostgresBroadcaster(url.set(drivername="postgresql").render_as_string(hide_password=False))
+    raise ValueError(f"Unknown CHANGE_FEED_BACKEND: {backend!r}")
+
+
+broadcaster = build_broadcaster()
+
+
+async def publish(kind: str, rows: Iterable[Tuple[int, int, Optional[datetime]]]) -> None:
+    """Publish one event per (user_id, task_id, updated_at) row; never raises."""
+    events = [
+        ChangeEvent(secrets.token_hex(8), kind, user_id, task_id, updated_at.isoformat() if updated_at else None)
+        for user_id, task_id, updated_at in rows
+    ]
+    if not events:
+        return
+    try:
+        await broadcaster.publish(events)
+    except Exception as e:
+        logger.error("Publishing task changes failed: %s", str(e))
+
+
+async def event_stream(user_id: int, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    SSE body for one connection. Subscribes when the body starts (a response
+    that is never sent never subscribes) and unsubscribes when the client goes
+    away or the broadcaster stops.
+    """
+    await broadcaster.start()
+    try:
+        subscriber = broadcaster.subscribe(user_id, last_event_id)
+    except TooManyConnections:
+        # the endpoint checked, but others may have connected since
+        return
+    try:
+        # how long EventSource waits before reconnecting
+        yield f"retry: {int(CHANGE_FEED_HEARTBEAT_SECONDS * 1000)}\n\n"
+        while (frames := await subscriber.frames()) is not None:
+            yield "".join(frames) if frames else ": keep-alive\n\n"
+    finally:
+        broadcaster.unsubscribe(subscriber)
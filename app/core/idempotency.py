@@ -0,0 +1,173 @@
+"""
+Idempotency-Key support for create endpoints that clients retry.
+
+A client sends the same `Idempotency-Key` header on every attempt of one
+logical request. The first attempt runs; its successful response is stored
+(under the endpoint, the caller's scope, e.g. the user id, and the key) for
+IDEMPOTENCY_TTL_SECONDS, and later attempts get that stored response, marked
+`Idempotent-Replayed: true`, without running the endpoint again.
+
+- attempts that arrive while the first is still running wait for it (in this
+  worker); with the redis backend an attempt on another worker gets 409 +
+  Retry-After instead of running a second time
+- failures (any exception) are not stored: the client may retry with the same key
+- reusing a key for a different request body is answered with 422
+
+Responses are stored as JSON-compatible content (datetimes as ISO strings) and
+encoded per attempt, so a replay honours the retry's Accept/Accept-Encoding.
+"""
+import asyncio
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import orjson
+from fastapi import HTTPException, status
+
+from app.core.cache import Cache, MemoryCache, RedisCache
+from app.core.config import IDEMPOTENCY_BACKEND, IDEMPOTENCY_MAX_ENTRIES, IDEMPOTENCY_TTL_SECONDS, REDIS_URL
+from app.core.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_REQUESTS = Counter(
+    "idempotency_requests_total",
+    "Requests with an Idempotency-Key by result (new, replayed, coalesced, in_progress, mismatch)",
+    ("endpoint", "result"),
+)
+
+REPLAYED_HEADERS = {"Idempotent-Replayed": "true"}
+# how long a claim blocks other workers if its worker dies mid-request
+PENDING_TTL_SECONDS = 60
+
+
+def fingerprint(payload: Any) -> str:
+    """Digest of a request body (JSON-compatible), to tell a retry from a reused key."""
+    return hashlib.blake2b(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+
+
+class IdempotencyStore:
+    def __init__(self, cache: Cache, ttl: float = IDEMPOTENCY_TTL_SECONDS):
+        self.cache = cache
+        self.ttl = ttl
+        # storage key -> future resolved with the stored record (None if the request failed)
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def run(
+        self,
+        endpoint: str,
+        scope: Any,
+        key: str,
+        payload: Any,
+        handler: Callable[[], Awaitable[Any]],
+    ) -> Tuple[Any, bool]:
+        """
+        (content, replayed): handler()'s result, or the one stored for this key.
+        Raises HTTPException 422 if the key was used for a different payload, 409
+        if another worker is still running it.
+        """
+        storage_key = f"idempotency:{endpoint}:{scope}:{key}"
+        request_fingerprint = fingerprint(payload)
+
+        inflight = self._inflight.get(storage_key)
+        if inflight is not None:
+            record = await asyncio.shield(inflight)
+            if record is not None:
+                return self._replay(endpoint, record, request_fingerprint, "coalesced"), True
+            # the first attempt failed; this one runs (or waits for whoever claimed it first)
+            return await self.run(endpoint, scope, key, payload, handler)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[storage_key] = future
+        record: Optional[dict] = None
+        claimed = False
+        try:
+            try:
+                stored = await self.cache.get(storage_key)
+                if stored is None:
+                    claimed = await self.cache.add(
+                        storage_key, {"fingerprint": request_fingerprint, "pending": True}, PENDING_TTL_SECONDS
+                    )
+                    if not claimed:
+                        stored = await self.cache.get(storage_key)
+            except Exception as e:
+                # a store outage degrades to running the request, never to failing it
+                logger.warning("Idempotency store unavailable for %s: %s", storage_key, str(e))
+                return await handler(), False
+
+            if stored is not None and not stored.get("pending"):
+                record = stored
+                return self._replay(endpoint, record, request_fingerprint, "replayed"), True
+            if not claimed:
+                if stored is not None and stored["fingerprint"] != request_fingerprint:
+                    IDEMPOTENCY_REQUESTS.inc(endpoint=endpoint, result="mismatch")
+                    raise _key_reused()
+                IDEMPOTENCY_REQUESTS.inc(endpoint=endpoint, result="in_progress")
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still in progress",
+                    headers={"Retry-After": "1"},
+                )
+
+            IDEMPOTENCY_REQUESTS.inc(endpoint=endpoint, result="new")
+            content = await handler()
+            # round-trip through JSON (datetimes as pydantic writes them) so memory
+            # and redis replays are identical
+            stored_content = orjson.loads(orjson.dumps(content, option=orjson.OPT_UTC_Z))
+            record = {"fingerprint": request_fingerprint, "content": stored_content}
+            try:
+                await self.cache.set(storage_key, record, self.ttl)
+            except Exception as e:
+                logger.warning("Idempotency store set failed for %s: %s", storage_key, str(e))
+            return content, False
+        finally:
+            if claimed and record is None:
+                try:
+                    await self.cache.delete(storage_key)
+                except Exception as e:
+                    logger.warning("Idempotency store delete failed for %s: %s", storage_key, str(e))
+            del self._inflight[storage_key]
+            future.set_result(record)
+
+    @staticmethod
+    def _replay(endpoint: str, record: dict, request_fingerprint: str, result: str) -> Any:
+        if record["fingerprint"] != request_fingerprint:
+            IDEMPOTENCY_REQUESTS.inc(endpoint=endpoint, result="mismatch")
+            raise _key_reused()
+        IDEMPOTENCY_REQUESTS.inc(endpoint=endpoint, result=result)
+        return record["content"]
+
+
+def _key_reused() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail="This Idempotency-Key was already used for a different request",
+    )
+
+
+def build_store(backend: str = IDEMPOTENCY_BACKEND) -> Optional[IdempotencyStore]:
+    if backend == "memory":
+        return IdempotencyStore(MemoryCache(IDEMPOTENCY_MAX_ENTRIES, IDEMPOTENCY_TTL_SECONDS, name="idempotency"))
+    if backend == "redis":
+        cache = RedisCache.from_url(REDIS_URL, default_ttl=IDEMPOTENCY_TTL_SECONDS, name="idempotency")
+        return IdempotencyStore(cache)
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown IDEMPOTENCY_BACKEND: {backend!r}")
+
+
+# None when disabled: the header is ignored
+store = build_store()
+
+
+async def idempotent(
+    endpoint: str,
+    scope: Any,
+    key: Optional[str],
+    payload: Any,
+    handler: Callable[[], Awaitable[Any]],
+) -> Tuple[Any, bool]:
+    """store.run(), or just handler() when there is no key or the store is disabled."""
+    if key is None or store is None:
+        return await handler(), False
+    return await store.run(endpoint, scope, key, payload, handler)
@@ -0,0 +1,199 @@
+"""
+Per-request performance instrumentation.
+
+- SQLAlchemy engine hooks count statements and time spent in the DB, and log
+  statements slower than SLOW_QUERY_THRESHOLD_MS.
+- The pool reports checkout wait (see app.db.session.TimedQueuePool).
+- TimedRoute separates endpoint time from response serialization time.
+- InstrumentationMiddleware emits a Server-Timing header and records
+  histograms labeled by route template ("/tasks/{task_id}", not the raw path).
+
+Per-request numbers live in a context variable, so concurrent requests never
+mix; the cost per request is a handful of perf_counter() calls.
+"""
+import asyncio
+import functools
+import logging
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from app.core.config import SLOW_QUERY_THRESHOLD_MS
+from app.core.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("app.sql.slow")
+
+_LABELS = ("method", "route")
+_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Time to response start", _LABELS)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements per request", _LABELS, buckets=_COUNT_BUCKETS
+)
+REQUEST_DB_SECONDS = Histogram("http_request_db_seconds", "Time spent executing SQL per request", _LABELS)
+REQUEST_POOL_WAIT_SECONDS = Histogram(
+    "http_request_pool_wait_seconds", "Time spent waiting for a pooled connection per request", _LABELS
+)
+REQUEST_SERIALIZE_SECONDS = Histogram(
+    "http_request_serialize_seconds", "Response validation/serialization time per request", _LABELS
+)
+
+
+class RequestStats:
+    __slots__ = ("db_queries", "db_seconds", "pool_wait_seconds", "endpoint_done", "serialize_seconds")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+        self.endpoint_done: Optional[float] = None
+        self.serialize_seconds = 0.0
+
+    def server_timing(self, total: float) -> str:
+        return ", ".join(
+            [
+                f'db;dur={self.db_seconds * 1000:.2f};desc="{self.db_queries} queries"',
+                f"pool;dur={self.pool_wait_seconds * 1000:.2f}",
+                f"ser;dur={self.serialize_seconds * 1000:.2f}",
+                f"total;dur={total * 1000:.2f}",
+            ]
+        )
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def record_pool_wait(seconds: float) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.pool_wait_seconds += seconds
+
+
+# ----------------------------
+# SQLAlchemy hooks (every engine: primary and replicas)
+# ----------------------------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._instrumentation_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._instrumentation_started
+    stats = _current.get()
+    if stats is not None:
+        stats.db_queries += 1
+        stats.db_seconds += elapsed
+    if SLOW_QUERY_THRESHOLD_MS and elapsed * 1000 >= SLOW_QUERY_THRESHOLD_MS:
+        # parameters are deliberately not logged: they may hold note content or hashes
+        slow_query_logger.warning(
+            "Slow query (%.1f ms%s): %s",
+            elapsed * 1000,
+            ", executemany" if executemany else "",
+            " ".join(statement.split())[:1000],
+        )
+
+
+def install_engine_hooks() -> None:
+    """Attach the statement timers to every engine (idempotent)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ----------------------------
+# Routing / ASGI
+# ----------------------------
+def _mark_endpoint_done(endpoint: Callable) -> Callable:
+    if getattr(endpoint, "__instrumented__", False):
+        return endpoint
+
+    if asyncio.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                stats = _current.get()
+                if stats is not None:
+                    stats.endpoint_done = time.perf_counter()
+
+    else:
+
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                stats = _current.get()
+                if stats is not None:
+                    stats.endpoint_done = time.perf_counter()
+
+    wrapper.__instrumented__ = True
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that measures the time between the endpoint returning and the
+    response being ready, i.e. response_model validation + JSON encoding.
+    Endpoints that encode their own response (response_utility) add that time."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _mark_endpoint_done(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            response = await handler(request)
+            stats = _current.get()
+            if stats is not None and stats.endpoint_done is not None:
+                stats.serialize_seconds += time.perf_counter() - stats.endpoint_done
+            return response
+
+        return timed_handler
+
+
+class InstrumentationMiddleware:
+    """Pure ASGI middleware (no BaseHTTPMiddleware task hop) adding Server-Timing and histograms."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        total = 0.0
+
+        async def send_with_timing(message):
+            nonlocal total
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - started
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing(total))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            labels = {"method": scope["method"], "route": getattr(route, "path", "unmatched")}
+            REQUEST_SECONDS.observe(total or time.perf_counter() - started, **labels)
+            REQUEST_DB_QUERIES.observe(stats.db_queries, **labels)
+            REQUEST_DB_SECONDS.observe(stats.db_seconds, **labels)
+            REQUEST_POOL_WAIT_SECONDS.observe(stats.pool_wait_seconds, **labels)
+            REQUEST_SERIALIZE_SECONDS.observe(stats.serialize_seconds, **labels)
@@ -1,7 +1,184 @@
-from passlib.context import CryptContext
+"""
+Bearer-token authentication.
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+Tokens are JWTs (HS256) signed with AUTH_SECRET_KEY using only the standard
+library. Verifying one is an HMAC plus a JSON parse: a few microseconds, with no
+database query and no bcrypt. bcrypt runs once, at login (see auth_service).
 
+- access tokens (typ "access") authenticate requests, ACCESS_TOKEN_TTL_SECONDS
+- refresh tokens (typ "refresh") are exchanged at POST /auth/refresh for a new pair
 
-def hash_password(password: str):
-    return pwd_context.hash(password)
+Rotated and logged-out refresh tokens are recorded in the revoked_tokens
+table (auth_service), which every worker checks at POST /auth/refresh.
+Logged-out access tokens are kept in an in-memory revocation list until they
+would have expired anyway, so checking one stays free of I/O. That list is per
+process: with several workers, a logged-out access token stays valid on the
+others for at most ACCESS_TOKEN_TTL_SECONDS.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import secrets
+import time
+from typing import Dict, Optional
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.core.config import ACCESS_TOKEN_TTL_SECONDS, ADMIN_USER_IDS, AUTH_SECRET_KEY, REFRESH_TOKEN_TTL_SECONDS
+from app.core.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+AUTH_FAILURES = Counter("auth_failures_total", "Rejected bearer tokens by reason", ("reason",))
+
+ACCESS, REFRESH = "access", "refresh"
+_TTL = {ACCESS: ACCESS_TOKEN_TTL_SECONDS, REFRESH: REFRESH_TOKEN_TTL_SECONDS}
+
+if AUTH_SECRET_KEY:
+    _key = AUTH_SECRET_KEY.encode()
+else:
+    _key = secrets.token_bytes(32)
+    logger.warning(
+        "AUTH_SECRET_KEY is not set; using a random per-process key. Tokens will not "
+        "survive a restart or be accepted by other workers."
+    )
+# keyed once; each sign/verify copies it instead of re-deriving the HMAC key pads
+_mac = hmac.new(_key, digestmod=hashlib.sha256)
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+_HEADER = _b64encode(b'{"alg":"HS256","typ":"JWT"}')
+
+
+def _sign(signing_input: bytes) -> bytes:
+    mac = _mac.copy()
+    mac.update(signing_input)
+    return mac.digest()
+
+
+def keyed_digest(secret: str) -> str:
+    """HMAC of a secret (e.g. a password) under the token key: comparable, but useless without AUTH_SECRET_KEY."""
+    return _b64encode(_sign(b"digest:" + secret.encode()))
+
+
+def issue_token(user_id: int, kind: str = ACCESS) -> str:
+    now = int(time.time())
+    claims = {"sub": str(user_id), "typ": kind, "iat": now, "exp": now + _TTL[kind], "jti": secrets.token_hex(8)}
+    signing_input = f"{_HEADER}.{_b64encode(json.dumps(claims, separators=(',', ':')).encode())}"
+    return f"{signing_input}.{_b64encode(_sign(signing_input.encode()))}"
+
+
+def decode_token(token: str, kind: str = ACCESS) -> dict:
+    """Verify signature, type, expiry and revocation; return the claims or raise InvalidToken."""
+    try:
+        signing_input, signature = token.rsplit(".", 1)
+        header, payload = signing_input.split(".")
+        valid = header == _HEADER and hmac.compare_digest(_b64decode(signature), _sign(signing_input.encode()))
+    except ValueError:
+        raise InvalidToken("malformed")
+    if not valid:
+        raise InvalidToken("signature")
+    try:
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        raise InvalidToken("malformed")
+    if claims.get("typ") != kind:
+        raise InvalidToken("type")
+    if claims.get("exp", 0) <= time.time():
+        raise InvalidToken("expired")
+    if revocations.is_revoked(claims.get("jti")):
+        raise InvalidToken("revoked")
+    return claims
+
+
+class RevocationList:
+    """Revoked (access) token ids in this process, each dropped once the token it names has expired."""
+
+    # expired entries are swept on every Nth revoke
+    SWEEP_EVERY = 1000
+
+    def __init__(self):
+        # jti -> the token's exp (unix time)
+        self._entries: Dict[str, float] = {}
+        self._revokes = 0
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        self._entries[jti] = expires_at
+        self._revokes += 1
+        if self._revokes % self.SWEEP_EVERY == 0:
+            now = time.time()
+            for key in [k for k, exp in self._entries.items() if exp <= now]:
+                del self._entries[key]
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        expires_at = self._entries.get(jti) if jti else None
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            del self._entries[jti]
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+revocations = RevocationList()
+
+
+# ----------------------------
+# FastAPI dependencies
+# ----------------------------
+_bearer = HTTPBearer(auto_error=False)
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+# async (with nothing to await) so FastAPI calls it inline instead of in a thread
+async def current_claims(credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer)) -> dict:
+    if credentials is None:
+        AUTH_FAILURES.inc(reason="missing")
+        raise _unauthorized("Not authenticated")
+    try:
+        return decode_token(credentials.credentials, ACCESS)
+    except InvalidToken as e:
+        AUTH_FAILURES.inc(reason=str(e))
+        raise _unauthorized("Invalid or expired token")
+
+
+async def current_user_id(claims: dict = Depends(current_claims)) -> int:
+    return int(claims["sub"])
+
+
+async def authorized_user_id(user_id: int, current: int = Depends(current_user_id)) -> int:
+    """The {user_id} path parameter, accepted only when it is the authenticated user."""
+    if user_id != current:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed to access this user")
+    return user_id
+
+
+async def admin_user_id(current: int = Depends(current_user_id)) -> int:
+    """The authenticated user, accepted only when listed in ADMIN_USER_IDS."""
+    if current not in ADMIN_USER_IDS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current
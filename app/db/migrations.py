@@ -0,0 +1,73 @@
+"""
+Alembic helpers for startup and deploy-time migrations.
+
+Importing this module imports Alembic, so app.main only imports it when
+MIGRATION_MODE needs it.
+"""
+import asyncio
+import logging
+from pathlib import Path
+from typing import Optional, Set
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+def alembic_config() -> Config:
+    cfg = Config(str(PROJECT_ROOT / "alembic.ini"))
+    # Ensure script_location and URL are set
+    cfg.set_main_option("script_location", str(PROJECT_ROOT / "alembic"))
+    cfg.set_main_option("sqlalchemy.url", DATABASE_URL)
+    return cfg
+
+
+def upgrade_head(revision: str = "head") -> None:
+    """Blocking `alembic upgrade`; run once per deploy, not per worker."""
+    command.upgrade(alembic_config(), revision)
+
+
+async def run_upgrade_head() -> None:
+    # Run in a thread to avoid blocking the event loop
+    await asyncio.to_thread(upgrade_head)
+
+
+def script_heads() -> Set[str]:
+    """Head revision(s) of the migration scripts (reads files, no DB access)."""
+    return set(ScriptDirectory.from_config(alembic_config()).get_heads())
+
+
+async def current_revision(engine: AsyncEngine) -> Optional[str]:
+    """The revision stamped in the DB, or None if it has never been migrated."""
+    try:
+        async with engine.connect() as conn:
+            return (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalar()
+    except DBAPIError as e:
+        # usually: no alembic_version table yet
+        logger.warning("Could not read alembic_version: %s", str(e))
+        return None
+
+
+async def check_schema_current(engine: AsyncEngine) -> None:
+    """Raise SchemaOutOfDate unless the DB is at the scripts' head revision."""
+    heads = script_heads()
+    current = await current_revision(engine)
+    if current not in heads:
+        raise SchemaOutOfDate(
+            f"Database schema is at {current!r}, expected {', '.join(sorted(heads))}; "
+            "run `python -m app.migrate` before starting the server"
+        )
+    logger.info("Database schema is at head (%s)", current)
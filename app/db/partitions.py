@@ -0,0 +1,367 @@
+"""
+Monthly partitions of `tasks` and the archive of old tasks (Postgres only, see
+migration 6c51491c2b33; on other databases everything here does nothing).
+
+- partitions: tasks_YYYY_MM holds the tasks created in that month (UTC);
+  tasks_legacy everything created before the migration. Each worker creates
+  the coming TASK_PARTITION_MONTHS_AHEAD months' partitions at startup and
+  every TASK_PARTITION_MAINTENANCE_SECONDS (PartitionMaintainer), so an INSERT
+  never finds its month missing; a task restored into a month whose partition
+  was dropped has it re-created (tasks_create_partition()).
+- archive: archive_tasks() moves tasks created before archive_horizon() into
+  tasks_archive, in id order, TASK_ARCHIVE_CHUNK_ROWS per row as a jsonb array
+  (one big value, which Postgres compresses; single small rows are never
+  compressed), then detaches and drops the partitions that are left empty.
+  Each chunk is moved by one statement, with the user_task_stats triggers told
+  to skip it (secure_notes.moving_tasks): archived tasks still count.
+
+Archived tasks are still the user's tasks. GET /tasks/{id} falls back to
+load_archived_task(), the export and user_task_stats include them, and an
+update or delete first moves the task back (restore_archived_tasks()); the
+next archive run moves it out again. Listings and search only see live tasks.
+"""
+import asyncio
+import base64
+import logging
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import column, insert, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import (
+    EXPORT_YIELD_PER,
+    TASK_ARCHIVE_AFTER_MONTHS,
+    TASK_ARCHIVE_CHUNK_ROWS,
+    TASK_PARTITION_MAINTENANCE_SECONDS,
+    TASK_PARTITION_MONTHS_AHEAD,
+)
+from app.core.metrics import Counter
+from app.db.session import get_engine
+from app.db.types import unpack
+from app.models.task import Task, content_columns
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED_TASKS = Counter("tasks_archived_total", "Tasks moved into tasks_archive")
+ARCHIVE_READS = Counter("task_archive_reads_total", "Task lookups that fell back to tasks_archive, by result", ("result",))
+RESTORED_TASKS = Counter("tasks_restored_total", "Archived tasks moved back into tasks to be written")
+
+_MIGRATED = text("SELECT to_regprocedure('tasks_create_partitions(integer)') IS NOT NULL")
+_CREATE_PARTITIONS = text("SELECT tasks_create_partitions(:months_ahead)")
+# for the rest of the transaction, the user_task_stats triggers ignore tasks
+# moved between tasks and tasks_archive: they are the same tasks
+_MOVING_TASKS = text("SELECT set_config('secure_notes.moving_tasks', 'on', true)")
+_MOVED_TASKS = text("SELECT set_config('secure_notes.moving_tasks', 'off', true)")
+_CREATE_PARTITION = text("SELECT tasks_create_partition(:moment)")
+_NO_PARTITION = "23514"  # check_violation: "no partition of relation "tasks" found for row"
+
+# one chunk: the next `rows` cold tasks by id, deleted and stored as one archive row;
+# returns the last id moved (nothing when there was none left)
+_ARCHIVE_CHUNK = text(
+    """
+    WITH picked AS (
+        SELECT id, created_at FROM tasks
+        WHERE created_at < :horizon AND id > :after_id
+        ORDER BY id LIMIT :rows
+    ), moved AS (
+        DELETE FROM tasks t USING picked p
+        WHERE t.id = p.id AND t.created_at = p.created_at
+        RETURNING t.id, t.user_id, t.name, t.content, t.content_packed, t.content_chars, t.created_at, t.updated_at,
+                  t.version
+    )
+    INSERT INTO tasks_archive (id_range, task_count, user_ids, tasks)
+    SELECT int4range(min(id), max(id), '[]'), count(*), array_agg(DISTINCT user_id), jsonb_agg(
+        jsonb_build_object(
+            'id', id, 'user_id', user_id, 'name', name, 'content', content,
+            'content_packed', encode(content_packed, 'base64'), 'content_chars', content_chars,
+            'created_at', created_at, 'updated_at', updated_at, 'version', version
+        ) ORDER BY id
+    )
+    FROM moved
+    HAVING count(*) > 0
+    RETURNING upper(id_range) - 1, task_count
+    """
+)
+
+# partitions of tasks with the upper bound of their range
+_PARTITIONS = text(
+    r"""
+    SELECT c.relname,
+           substring(pg_get_expr(c.relpartbound, c.oid) FROM 'TO \(''([^'']+)''\)')::timestamptz AS upper_bound
+    FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'tasks'::regclass
+    ORDER BY upper_bound
+    """
+).columns(column("relname"), column("upper_bound"))
+
+_ARCHIVED_TASK = text(
+    """
+    SELECT elem FROM tasks_archive a, jsonb_array_elements(a.tasks) AS elem
+    WHERE a.id_range @> CAST(:task_id AS integer) AND (elem->>'id')::integer = :task_id
+    LIMIT 1
+    """
+).columns(column("elem", JSONB))
+
+# restore: lock the archive row holding a task, then take the task out of it
+_LOCK_ARCHIVED_TASK = text(
+    """
+    SELECT a.ctid::text, a.task_count, elem FROM tasks_archive a, jsonb_array_elements(a.tasks) AS elem
+    WHERE a.id_range @> CAST(:task_id AS integer) AND (elem->>'id')::integer = :task_id
+    LIMIT 1
+    FOR UPDATE OF a
+    """
+).columns(column("ctid"), column("task_count"), column("elem", JSONB))
+_DROP_ARCHIVE_ROW = text("DELETE FROM tasks_archive WHERE ctid = CAST(CAST(:row AS text) AS tid)")
+_REMOVE_FROM_ARCHIVE_ROW = text(
+    """
+    UPDATE tasks_archive a
+    SET tasks = rest.tasks, task_count = rest.task_count, user_ids = rest.user_ids
+    FROM (
+        SELECT jsonb_agg(elem ORDER BY ord) AS tasks, count(*) AS task_count,
+               array_agg(DISTINCT (elem->>'user_id')::integer) AS user_ids
+        FROM tasks_archive b, jsonb_array_elements(b.tasks) WITH ORDINALITY AS e(elem, ord)
+        WHERE b.ctid = CAST(CAST(:row AS text) AS tid) AND (elem->>'id')::integer <> :task_id
+    ) AS rest
+    WHERE a.ctid = CAST(CAST(:row AS text) AS tid)
+    """
+)
+
+# user_ids (GIN-indexed) finds the archive rows holding a user's tasks
+_USER_ARCHIVED_TASKS = text(
+    """
+    SELECT elem FROM tasks_archive a, jsonb_array_elements(a.tasks) AS elem
+    WHERE a.user_ids @> ARRAY[CAST(:user_id AS integer)] AND (elem->>'user_id')::integer = :user_id
+    ORDER BY (elem->>'id')::integer
+    """
+).columns(column("elem", JSONB))
+_ARCHIVED_STATS = text(
+    """
+    SELECT (elem->>'user_id')::integer AS user_id, count(*) AS task_count,
+           sum(coalesce((elem->>'content_chars')::integer, length(elem->>'content'), 0)) AS content_length,
+           max((elem->>'updated_at')::timestamptz) AS last_updated_at
+    FROM tasks_archive a, jsonb_array_elements(a.tasks) AS elem
+    WHERE a.user_ids && CAST(:user_ids AS integer[]) AND (elem->>'user_id')::integer = ANY(CAST(:user_ids AS integer[]))
+    GROUP BY 1
+    """
+)
+
+# set once tasks_archive is known to exist in this process
+_archive_exists = False
+
+
+async def partitioned() -> bool:
+    """Whether this database has the partitioned tasks table (Postgres at migration 6c51491c2b33 or later)."""
+    engine = get_engine()
+    if engine.dialect.name != "postgresql":
+        return False
+    async with engine.connect() as conn:
+        return bool(await conn.scalar(_MIGRATED))
+
+
+async def create_partitions(months_ahead: int = TASK_PARTITION_MONTHS_AHEAD) -> int:
+    """Create the missing partitions for this month and the next months_ahead; returns how many."""
+    if not await partitioned():
+        return 0
+    async with get_engine().begin() as conn:
+        created = await conn.scalar(_CREATE_PARTITIONS, {"months_ahead": months_ahead})
+    if created:
+        logger.info("Created %d tasks partitions", created)
+    return created
+
+
+def archive_horizon(after_months: int = TASK_ARCHIVE_AFTER_MONTHS, now: Optional[datetime] = None) -> datetime:
+    """Start of the month after_months months before now's (UTC): older tasks are archived."""
+    now = now or datetime.now(timezone.utc)
+    months = now.year * 12 + now.month - 1 - after_months
+    return datetime(months // 12, months % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+async def archive_tasks(
+    horizon: Optional[datetime] = None, chunk_rows: int = TASK_ARCHIVE_CHUNK_ROWS, pause: float = 0
+) -> int:
+    """Move every task created before horizon into tasks_archive; returns how many were moved."""
+    if not await partitioned():
+        return 0
+    horizon = horizon or archive_horizon()
+    engine = get_engine()
+    last_id, moved = 0, 0
+    while True:
+        async with engine.begin() as conn:
+            await conn.execute(_MOVING_TASKS)
+            row = (
+                await conn.execute(_ARCHIVE_CHUNK, {"horizon": horizon, "after_id": last_id, "rows": chunk_rows})
+            ).first()
+        if row is None:
+            break
+        last_id, count = row
+        moved += count
+        ARCHIVED_TASKS.inc(count)
+        logger.info("Archived %d tasks created before %s, up to id %d", moved, horizon.date(), last_id)
+        if pause:
+            # leave room for foreground traffic between chunks
+            await asyncio.sleep(pause)
+    await drop_empty_partitions(horizon)
+    return moved
+
+
+async def drop_empty_partitions(horizon: datetime) -> List[str]:
+    """Detach and drop the partitions entirely before horizon that hold no tasks; returns their names."""
+    engine = get_engine()
+    async with engine.connect() as conn:
+        partitions: List[Tuple[str, datetime]] = (await conn.execute(_PARTITIONS)).all()
+    dropped = []
+    # DETACH ... CONCURRENTLY cannot run inside a transaction
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for name, upper_bound in partitions:
+            if upper_bound is None or upper_bound > horizon:
+                continue
+            if await conn.scalar(text(f'SELECT EXISTS (SELECT 1 FROM "{name}")')):
+                continue
+            await conn.execute(text(f'ALTER TABLE tasks DETACH PARTITION "{name}" CONCURRENTLY'))
+            await conn.execute(text(f'DROP TABLE "{name}"'))
+            dropped.append(name)
+            logger.info("Dropped empty tasks partition %s", name)
+    return dropped
+
+
+async def _has_archive(db: AsyncSession) -> bool:
+    global _archive_exists
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    if not _archive_exists:
+        # databases built by create_all (benchmarks) have no archive
+        _archive_exists = bool(await db.scalar(text("SELECT to_regclass('tasks_archive') IS NOT NULL")))
+    return _archive_exists
+
+
+def _task_fields(elem: dict) -> dict:
+    """TaskRead fields of an archived task (content unpacked)."""
+    packed = elem.get("content_packed")
+    return {
+        "id": elem["id"],
+        "user_id": elem["user_id"],
+        "name": elem["name"],
+        "content": unpack(base64.b64decode(packed)) if packed is not None else elem["content"],
+        "created_at": datetime.fromisoformat(elem["created_at"]),
+        "updated_at": datetime.fromisoformat(elem["updated_at"]),
+        # archived before tasks had a version column
+        "version": elem.get("version", 1),
+    }
+
+
+async def load_archived_task(db: AsyncSession, task_id: int) -> Optional[dict]:
+    """An archived task as TaskRead fields, or None."""
+    if not await _has_archive(db):
+        return None
+    elem = await db.scalar(_ARCHIVED_TASK, {"task_id": task_id})
+    ARCHIVE_READS.inc(result="hit" if elem is not None else "miss")
+    return _task_fields(elem) if elem is not None else None
+
+
+async def stream_archived_tasks(
+    db: AsyncSession, user_id: int, batch_size: int = EXPORT_YIELD_PER
+) -> AsyncIterator[List[dict]]:
+    """Yield a user's archived tasks as TaskRead fields in id order, batch_size at a time."""
+    if not await _has_archive(db):
+        return
+    result = await db.stream_scalars(
+        _USER_ARCHIVED_TASKS.bindparams(user_id=user_id).execution_options(yield_per=batch_size)
+    )
+    async for batch in result.partitions():
+        yield [_task_fields(elem) for elem in batch]
+
+
+async def archived_task_stats(db: AsyncSession, user_ids: Iterable[int]) -> Dict[int, Tuple[int, int, datetime]]:
+    """user_id -> (task count, content length, newest updated_at) of the users' archived tasks."""
+    if not await _has_archive(db):
+        return {}
+    rows = await db.execute(_ARCHIVED_STATS, {"user_ids": list(user_ids)})
+    return {row.user_id: (row.task_count, int(row.content_length), row.last_updated_at) for row in rows}
+
+
+async def restore_archived_tasks(db: AsyncSession, task_ids: Iterable[int], owner_id: Optional[int] = None) -> Set[int]:
+    """
+    Move archived tasks back into tasks, with their ids, timestamps and
+    version, so they can be updated or deleted; returns the ids restored.
+    With owner_id, other users' tasks are left alone. Runs in the caller's
+    transaction: the write that needed the tasks commits (or rolls back) the
+    move with it.
+    """
+    if not await _has_archive(db):
+        return set()
+    restored = set()
+    await db.execute(_MOVING_TASKS)
+    for task_id in sorted(set(task_ids)):
+        found = (await db.execute(_LOCK_ARCHIVED_TASK, {"task_id": task_id})).first()
+        if found is None:
+            continue
+        row, task_count, elem = found
+        if owner_id is not None and elem["user_id"] != owner_id:
+            continue
+        if task_count == 1:
+            await db.execute(_DROP_ARCHIVE_ROW, {"row": row})
+        else:
+            await db.execute(_REMOVE_FROM_ARCHIVE_ROW, {"row": row, "task_id": task_id})
+        fields = _task_fields(elem)
+        stmt = insert(Task).values(
+            id=fields["id"],
+            user_id=fields["user_id"],
+            name=fields["name"],
+            created_at=fields["created_at"],
+            updated_at=fields["updated_at"],
+            version=fields["version"],
+            **content_columns(fields["content"]),
+        )
+        try:
+            async with db.begin_nested():
+                await db.execute(stmt)
+        except DBAPIError as e:
+            if getattr(e.orig, "sqlstate", None) != _NO_PARTITION:
+                raise
+            # its month was archived whole and the partition dropped
+            await db.execute(_CREATE_PARTITION, {"moment": fields["created_at"]})
+            await db.execute(stmt)
+        restored.add(task_id)
+    # the caller's own writes count again
+    await db.execute(_MOVED_TASKS)
+    RESTORED_TASKS.inc(len(restored))
+    return restored
+
+
+class PartitionMaintainer:
+    """Background loop keeping future partitions in place (start()/stop() from the app's lifespan)."""
+
+    def __init__(self, interval: float = TASK_PARTITION_MAINTENANCE_SECONDS):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if not await partitioned():
+                    return
+                await create_partitions()
+            except Exception:
+                logger.exception("Creating tasks partitions failed")
+            if not self.interval:
+                return
+            await asyncio.sleep(self.interval)
+
+
+maintainer = PartitionMaintainer()
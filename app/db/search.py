@@ -0,0 +1,182 @@
+"""
+Full-text search over task name + content.
+
+- Postgres: a `tasks.search_vector` tsvector column with a GIN index, set by
+  a BEFORE INSERT/UPDATE trigger on every write.
+- SQLite (local runs and benchmarks): an external-content FTS5 table
+  `tasks_fts`, kept in sync by triggers. Its content is a view that adds an
+  `owner` token per row, so the per-user filter is resolved inside the
+  full-text index instead of after ranking every user's matches.
+
+Both are created automatically by Base.metadata.create_all through the DDL
+listeners below, so create_task/update_task/delete_task (and the batch
+variants) never need to touch the index themselves.
+
+Results are ranked (higher rank = better match) and come with an HTML snippet:
+ts_headline and snippet() copy the note text verbatim, so they mark matches
+with private-use sentinels and render_snippet escapes the text before turning
+the sentinels into <b>...</b>.
+
+Both index the full text of bodies stored compressed (at least
+CONTENT_COMPRESSION_MIN_BYTES, see app.models.task.content_columns), whose
+plain `content` column holds only the head: Postgres through content_vector,
+written with the content, SQLite by decompressing in the triggers
+(task_content(), registered on every SQLite connection by app.db.session).
+Postgres snippets of compressed bodies come from the head.
+"""
+import html
+import re
+from typing import Optional, Tuple
+
+from sqlalchemy import DDL, DateTime, Float, Integer, String, Text, event, text
+from sqlalchemy.sql.selectable import TextualSelect
+
+from app.db.types import unpack
+from app.models.task import Task
+
+# private-use code points, not markup: the note text around them is not escaped
+SNIPPET_START, SNIPPET_STOP = "\ue000", "\ue001"
+
+# ----------------------------
+# Postgres
+# ----------------------------
+PG_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') || "
+    "setweight(coalesce(NEW.content_vector, to_tsvector('english', coalesce(NEW.content, ''))), 'B')"
+)
+PG_ADD_COLUMN = "ALTER TABLE tasks ADD COLUMN search_vector tsvector"
+PG_CREATE_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION tasks_search_vector() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector := {PG_SEARCH_VECTOR};
+    RETURN NEW;
+END
+$$
+"""
+PG_CREATE_TRIGGER = (
+    "CREATE TRIGGER tasks_search_vector BEFORE INSERT OR UPDATE OF name, content, content_vector ON tasks "
+    "FOR EACH ROW EXECUTE FUNCTION tasks_search_vector()"
+)
+PG_CREATE_INDEX = "CREATE INDEX ix_tasks_search_vector ON tasks USING gin (search_vector)"
+
+# rank/keyset filter happens in the inner query; ts_headline (expensive) only
+# runs for the rows of the returned page
+_PG_SEARCH = """
+SELECT t.id, t.name, t.created_at, t.updated_at, page.rank,
+       ts_headline('english', coalesce(t.content, ''), page.query,
+                   'StartSel={start}, StopSel={stop}, MaxFragments=2, MaxWords=20, MinWords=5') AS snippet
+FROM (
+    SELECT tasks.id, ts_rank_cd(tasks.search_vector, query) AS rank, query
+    FROM tasks, websearch_to_tsquery('english', :q) AS query
+    WHERE tasks.user_id = :user_id AND tasks.search_vector @@ query
+    {after}
+    ORDER BY rank DESC, tasks.id DESC
+    LIMIT :limit
+) AS page
+JOIN tasks t ON t.id = page.id
+ORDER BY page.rank DESC, t.id DESC
+"""
+_PG_AFTER = "AND (ts_rank_cd(tasks.search_vector, query), tasks.id) < (:after_rank, :after_id)"
+
+# ----------------------------
+# SQLite FTS5
+# ----------------------------
+def _task_content(content: Optional[str], packed: Optional[bytes]) -> Optional[str]:
+    return unpack(packed) if packed is not None else content
+
+
+def register_sqlite_functions(dbapi_connection, _connection_record) -> None:
+    """Engine "connect" hook for SQLite: task_content(content, content_packed) is the full text."""
+    dbapi_connection.create_function("task_content", 2, _task_content, deterministic=True)
+
+
+SQLITE_DDL = [
+    """CREATE VIEW IF NOT EXISTS tasks_fts_source AS
+        SELECT id, name, task_content(content, content_packed) AS content, 'u' || user_id AS owner FROM tasks""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts
+        USING fts5(name, content, owner, content='tasks_fts_source', content_rowid='id')""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts(rowid, name, content, owner)
+        VALUES (new.id, new.name, task_content(new.content, new.content_packed), 'u' || new.user_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, name, content, owner)
+        VALUES ('delete', old.id, old.name, task_content(old.content, old.content_packed), 'u' || old.user_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF user_id, name, content, content_packed ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, name, content, owner)
+        VALUES ('delete', old.id, old.name, task_content(old.content, old.content_packed), 'u' || old.user_id);
+        INSERT INTO tasks_fts(rowid, name, content, owner)
+        VALUES (new.id, new.name, task_content(new.content, new.content_packed), 'u' || new.user_id);
+    END""",
+]
+
+# bm25() is "lower is better"; negate it so rank means the same on both backends
+_SQLITE_SEARCH = """
+SELECT t.id, t.name, t.created_at, t.updated_at, -bm25(tasks_fts, 10.0, 1.0, 0.0) AS rank,
+       snippet(tasks_fts, 1, '{start}', '{stop}', '...', 16) AS snippet
+FROM tasks_fts JOIN tasks t ON t.id = tasks_fts.rowid
+WHERE tasks_fts MATCH :q AND t.user_id = :user_id
+{after}
+ORDER BY rank DESC, t.id DESC
+LIMIT :limit
+"""
+_SQLITE_AFTER = "AND (-bm25(tasks_fts, 10.0, 1.0, 0.0) < :after_rank OR (-bm25(tasks_fts, 10.0, 1.0, 0.0) = :after_rank AND t.id < :after_id))"
+
+
+for _statement in (PG_ADD_COLUMN, PG_CREATE_FUNCTION, PG_CREATE_TRIGGER, PG_CREATE_INDEX):
+    event.listen(Task.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+for _statement in SQLITE_DDL:
+    event.listen(Task.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+for _statement in ("DROP TABLE IF EXISTS tasks_fts", "DROP VIEW IF EXISTS tasks_fts_source"):
+    event.listen(Task.__table__, "before_drop", DDL(_statement).execute_if(dialect="sqlite"))
+
+
+def _fts5_query(user_id: int, q: str) -> str:
+    """
+    Turn free text into a safe FTS5 query scoped to one owner: every word must
+    match name or content. Whole words only, like websearch_to_tsquery on
+    Postgres (a prefix match on a short word expands to thousands of terms).
+    """
+    words = re.findall(r"\w+", q)
+    if not words:
+        return ""
+    quoted = " ".join(f'"{w}"' for w in words)
+    return f'owner:"u{user_id}" AND {{name content}}: ({quoted})'
+
+
+def render_snippet(snippet: Optional[str]) -> Optional[str]:
+    """Escape a raw snippet for HTML and turn its match sentinels into <b>...</b>."""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(SNIPPET_START, "<b>").replace(SNIPPET_STOP, "</b>")
+
+
+def search_statement(
+    dialect: str, user_id: int, q: str, limit: int, after: Optional[Tuple[float, int]] = None
+) -> Optional[TextualSelect]:
+    """
+    Build the ranked search query for the given dialect ("postgresql" or "sqlite").
+    `after` is the (rank, id) of the last hit of the previous page. Returns None
+    when q contains nothing searchable.
+    """
+    params = {"user_id": user_id, "limit": limit}
+    if dialect == "postgresql":
+        sql, after_sql, params["q"] = _PG_SEARCH, _PG_AFTER, q
+    elif dialect == "sqlite":
+        sql, after_sql, params["q"] = _SQLITE_SEARCH, _SQLITE_AFTER, _fts5_query(user_id, q)
+    else:
+        raise NotImplementedError(f"Full-text search is not supported on {dialect}")
+    if not params["q"].strip():
+        return None
+    if after is not None:
+        params["after_rank"], params["after_id"] = after
+    sql = sql.format(start=SNIPPET_START, stop=SNIPPET_STOP, after=after_sql if after else "")
+    return text(sql).bindparams(**params).columns(
+        id=Integer,
+        name=String,
+        created_at=DateTime(timezone=True),
+        updated_at=DateTime(timezone=True),
+        rank=Float,
+        snippet=Text,
+    )
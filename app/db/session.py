@@ -1,12 +1,138 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import itertools
+import os
+import time
+from typing import Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.core.config import DATABASE_URL
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import (
+    DATABASE_REPLICA_URLS,
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_STATEMENT_CACHE_SIZE,
+)
+from app.core.instrumentation import record_pool_wait
+from app.core.metrics import Histogram
+from app.db.search import register_sqlite_functions
+
+POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds", "Time to check a connection out of the pool", ("pool",)
+)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited (incl. pre-ping/connect)."""
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            waited = time.perf_counter() - started
+            POOL_CHECKOUT_SECONDS.observe(waited, pool=self._orig_logging_name or "default")
+            record_pool_wait(waited)
+
+
+def _create_engine(url: str, name: str) -> AsyncEngine:
+    parsed = make_url(url)
+    kwargs = {}
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # in-memory SQLite needs its single shared connection (StaticPool)
+        pass
+    else:
+        kwargs.update(
+            poolclass=TimedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+            pool_logging_name=name,
+        )
+    if parsed.get_driver_name() == "asyncpg":
+        kwargs["connect_args"] = {"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+    engine = create_async_engine(url, echo=False, **kwargs)
+    if parsed.get_backend_name() == "sqlite":
+        event.listen(engine.sync_engine, "connect", register_sqlite_functions)
+    return engine
+
+
+# Engines and pools are per process and created on first use (normally by the
+# app's lifespan, in each worker), never at import: a process forked after they
+# exist must not reuse the parent's pooled sockets.
+_engine: Optional[AsyncEngine] = None
+_replica_engines: List[AsyncEngine] = []
+_session_factory: Optional[sessionmaker] = None
+_read_sessions: Optional[Iterator[sessionmaker]] = None
+_pid: Optional[int] = None
+
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+def init_engines() -> AsyncEngine:
+    """
+    Create this process's engines (primary and replicas) and session factories;
+    idempotent. In a child forked after they were created, the inherited ones are
+    abandoned without closing their connections (they belong to the parent) and
+    fresh ones are created. Returns the primary engine.
+    """
+    global _engine, _replica_engines, _session_factory, _read_sessions, _pid
+    if _engine is not None and _pid == os.getpid():
+        return _engine
+    for inherited in [e for e in (_engine, *_replica_engines) if e is not None]:
+        inherited.sync_engine.dispose(close=False)
+    _engine = _create_engine(DATABASE_URL, "primary")
+    _replica_engines = [_create_engine(url, f"replica{i}") for i, url in enumerate(DATABASE_REPLICA_URLS)]
+    _session_factory = sessionmaker(_engine, class_=AsyncSession, expire_on_commit=False)
+    _read_sessions = itertools.cycle(
+        [sessionmaker(e, class_=AsyncSession, expire_on_commit=False) for e in _replica_engines]
+        or [_session_factory]
+    )
+    _pid = os.getpid()
+    return _engine
 
-async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+def get_engine() -> AsyncEngine:
+    """The primary engine of this process."""
+    return init_engines()
+
+
+def async_session() -> AsyncSession:
+    """A session on the primary."""
+    init_engines()
+    return _session_factory()
+
+
+def read_session() -> AsyncSession:
+    """A session on the next read replica (round-robin), or the primary if none are configured."""
+    init_engines()
+    return next(_read_sessions)()
+
+
+async def dispose_engines() -> None:
+    """Close every pooled connection (primary and replicas); called on shutdown."""
+    global _engine, _replica_engines, _session_factory, _read_sessions, _pid
+    if _pid == os.getpid():
+        for e in [_engine, *_replica_engines]:
+            await e.dispose()
+    _engine, _replica_engines, _session_factory, _read_sessions, _pid = None, [], None, None, None
 
 
 async def get_db():
     async with async_session() as session:
         yield session
+
+
+async def get_read_db():
+    """
+    Dependency for read-only endpoints. Replicas may lag the primary slightly,
+    so never use it for read-your-own-write paths.
+    """
+    async with read_session() as session:
+        yield session
@@ -0,0 +1,133 @@
+"""
+Custom column types.
+
+CompressedText stores a string as bytes behind a one-byte format marker:
+
+    b"\\x00" + UTF-8            (stored as-is: compression would not have helped)
+    b"\\x01" + zlib stream
+    b"\\x02" + zstd frame       (needs the optional `zstandard` package)
+
+The marker makes every value self-describing, so rows written with different
+codecs (or before a codec change) stay readable. Loaded values are PackedText
+holders that only decompress when .text is first read.
+
+SearchVectorSource is written as text and stored, on Postgres only, as the
+to_tsvector() of it (see app.db.search).
+"""
+import zlib
+from typing import Optional
+
+from sqlalchemy import LargeBinary, Text, func, literal_column
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.types import TypeDecorator
+
+from app.core.config import CONTENT_COMPRESSION
+
+MARKER_RAW = b"\x00"
+MARKER_ZLIB = b"\x01"
+MARKER_ZSTD = b"\x02"
+
+
+def _zstd():
+    # optional dependency: only needed when CONTENT_COMPRESSION=zstd or zstd rows exist
+    import zstandard
+
+    return zstandard
+
+
+def pack(text: str, codec: str = CONTENT_COMPRESSION) -> bytes:
+    raw = text.encode("utf-8")
+    if codec == "zlib":
+        # level 1: ~90% of level 6's ratio on note text at ~1/6 of the CPU time
+        packed = MARKER_ZLIB + zlib.compress(raw, 1)
+    elif codec == "zstd":
+        packed = MARKER_ZSTD + _zstd().ZstdCompressor(level=3).compress(raw)
+    elif codec == "none":
+        packed = MARKER_RAW + raw
+    else:
+        raise ValueError(f"Unknown CONTENT_COMPRESSION: {codec!r}")
+    return packed if len(packed) <= len(raw) else MARKER_RAW + raw
+
+
+def unpack(data: bytes) -> str:
+    marker, body = data[:1], data[1:]
+    if marker == MARKER_RAW:
+        raw = body
+    elif marker == MARKER_ZLIB:
+        raw = zlib.decompress(body)
+    elif marker == MARKER_ZSTD:
+        raw = _zstd().ZstdDecompressor().decompress(body)
+    else:
+        raise ValueError(f"Unknown compressed text marker: {marker!r}")
+    return raw.decode("utf-8")
+
+
+class PackedText:
+    """Stored bytes plus the text they decode to, decompressed on first access."""
+
+    __slots__ = ("data", "_text")
+
+    def __init__(self, data: bytes, text: Optional[str] = None):
+        self.data = data
+        self._text = text
+
+    @classmethod
+    def from_text(cls, text: str) -> "PackedText":
+        return cls(pack(text), text)
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = unpack(self.data)
+        return self._text
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, PackedText) and other.data == self.data
+
+    def __hash__(self) -> int:
+        return hash(self.data)
+
+    def __len__(self) -> int:
+        # stored size in bytes
+        return len(self.data)
+
+
+class CompressedText(TypeDecorator):
+    """Binary column holding marker-prefixed, optionally compressed text."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, PackedText):
+            return value.data
+        return pack(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else PackedText(bytes(value))
+
+
+class _TSVectorFromText(TypeDecorator):
+    """Postgres: binds a string, stores to_tsvector('english', string)."""
+
+    impl = TSVECTOR
+    cache_ok = True
+
+    def bind_expression(self, bindvalue):
+        return func.to_tsvector(literal_column("'english'"), bindvalue)
+
+
+class _Discarded(TypeDecorator):
+    """Accepts writes and stores NULL."""
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None
+
+
+# write-only: SQLite's FTS5 index reads the text itself and has no use for it
+SearchVectorSource = _Discarded().with_variant(_TSVectorFromText(), "postgresql")
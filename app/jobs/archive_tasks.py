@@ -0,0 +1,51 @@
+"""
+Archive old tasks (Postgres, after migration 6c51491c2b33):
+
+    python -m app.jobs.archive_tasks [--after-months 12] [--chunk-rows 1000] [--pause 0.1]
+
+Makes sure the coming months have partitions, then moves every task created
+before the start of the month --after-months months ago into tasks_archive,
+one chunk per short transaction, and drops the monthly partitions it emptied
+(see app.db.partitions). Safe to run while the app is serving traffic, to
+interrupt and to re-run. Archived tasks stay readable, writable, counted and
+exported (see app.db.partitions) but leave listings and search; cached
+listings may still show them for up to CACHE_TTL_SECONDS.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+
+from app.core.config import TASK_ARCHIVE_AFTER_MONTHS, TASK_ARCHIVE_CHUNK_ROWS
+from app.db import partitions
+from app.db.session import dispose_engines
+
+logger = logging.getLogger(__name__)
+
+
+async def _main(args) -> None:
+    try:
+        if not await partitions.partitioned():
+            logger.warning("tasks is not partitioned (not Postgres, or migration 6c51491c2b33 not applied); nothing to do")
+            return
+        await partitions.create_partitions()
+        horizon = partitions.archive_horizon(args.after_months)
+        moved = await partitions.archive_tasks(horizon, args.chunk_rows, args.pause)
+        logger.info("Archived %d tasks created before %s", moved, horizon.date())
+    finally:
+        await dispose_engines()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--after-months", type=int, default=TASK_ARCHIVE_AFTER_MONTHS)
+    parser.add_argument("--chunk-rows", type=int, default=TASK_ARCHIVE_CHUNK_ROWS, help="tasks per archive row")
+    parser.add_argument("--pause", type=float, default=0.1, help="seconds to sleep between chunks")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+Backfill for tasks written before content compression existed:
+
+    python -m app.jobs.compress_content [--batch-size 500] [--pause 0.1]
+
+Walks tasks in id order in small batches, each in its own short transaction,
+filling content_chars and moving large bodies into content_packed. Safe to run
+while the app is serving traffic, to interrupt and to re-run: a row is only
+rewritten while content_chars is still NULL, so a concurrent edit (which sets
+it) is never overwritten with the stale body read by the job.
+
+On Postgres a second pass fills content_vector for bodies compressed before it
+existed, so the search index covers their full text instead of the head. It
+only writes rows still compressed and without one, which an edit never leaves.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+
+from sqlalchemy import bindparam, select, update
+
+from app.db.session import async_session, dispose_engines, get_engine
+from app.db.types import CompressedText, SearchVectorSource
+from app.models.task import Task, content_columns
+
+logger = logging.getLogger(__name__)
+
+_tasks = Task.__table__
+_not_backfilled = _tasks.c.content_chars.is_(None)
+
+# rows small enough to stay plain only need their length recorded
+_SET_LENGTH = (
+    update(_tasks)
+    .where(_tasks.c.id == bindparam("b_id"), _not_backfilled)
+    .values(content_chars=bindparam("b_chars"))
+)
+_PACK = (
+    update(_tasks)
+    .where(_tasks.c.id == bindparam("b_id"), _not_backfilled)
+    .values(
+        content=bindparam("b_text"),
+        content_packed=bindparam("b_packed", type_=CompressedText()),
+        content_chars=bindparam("b_chars"),
+        content_vector=bindparam("b_vector", type_=SearchVectorSource),
+    )
+)
+
+_not_indexed = _tasks.c.content_packed.is_not(None) & _tasks.c.content_vector.is_(None)
+_INDEX = (
+    update(_tasks)
+    .where(_tasks.c.id == bindparam("b_id"), _not_indexed)
+    # not an edit: keep updated_at and version (and with them the task's ETag)
+    .values(
+        content_vector=bindparam("b_vector", type_=SearchVectorSource),
+        updated_at=_tasks.c.updated_at,
+        version=_tasks.c.version,
+    )
+)
+
+
+async def backfill(batch_size: int = 500, pause: float = 0.1) -> int:
+    """Process every not-yet-backfilled task; returns how many were compressed."""
+    last_id, scanned, packed = 0, 0, 0
+    while True:
+        async with async_session() as db:
+            rows = (
+                await db.execute(
+                    select(_tasks.c.id, _tasks.c.content)
+                    .where(_tasks.c.id > last_id, _not_backfilled)
+                    .order_by(_tasks.c.id)
+                    .limit(batch_size)
+                )
+            ).all()
+            if not rows:
+                break
+            lengths, packs = [], []
+            for task_id, content in rows:
+                columns = content_columns(content)
+                if columns["content_packed"] is None:
+                    lengths.append({"b_id": task_id, "b_chars": columns["content_chars"]})
+                else:
+                    packs.append(
+                        {
+                            "b_id": task_id,
+                            "b_text": columns["content_text"],
+                            "b_packed": columns["content_packed"],
+                            "b_chars": columns["content_chars"],
+                            "b_vector": columns["content_vector"],
+                        }
+                    )
+            if lengths:
+                await db.execute(_SET_LENGTH, lengths)
+            if packs:
+                await db.execute(_PACK, packs)
+            await db.commit()
+
+        last_id = rows[-1][0]
+        scanned += len(rows)
+        packed += len(packs)
+        logger.info("Backfilled %d tasks (%d compressed), up to id %d", scanned, packed, last_id)
+        if pause:
+            # leave room for foreground traffic between batches
+            await asyncio.sleep(pause)
+    return packed
+
+
+async def index_packed(batch_size: int = 500, pause: float = 0.1) -> int:
+    """Fill content_vector of compressed tasks that have none (Postgres); returns how many."""
+    if get_engine().dialect.name != "postgresql":
+        return 0
+    last_id, indexed = 0, 0
+    while True:
+        async with async_session() as db:
+            rows = (
+                await db.execute(
+                    select(_tasks.c.id, _tasks.c.content_packed)
+                    .where(_tasks.c.id > last_id, _not_indexed)
+                    .order_by(_tasks.c.id)
+                    .limit(batch_size)
+                )
+            ).all()
+            if not rows:
+                break
+            await db.execute(_INDEX, [{"b_id": task_id, "b_vector": packed.text} for task_id, packed in rows])
+            await db.commit()
+
+        last_id = rows[-1][0]
+        indexed += len(rows)
+        logger.info("Indexed the full text of %d compressed tasks, up to id %d", indexed, last_id)
+        if pause:
+            await asyncio.sleep(pause)
+    return indexed
+
+
+async def _main(args) -> None:
+    try:
+        await backfill(args.batch_size, args.pause)
+        await index_packed(args.batch_size, args.pause)
+    finally:
+        await dispose_engines()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--pause", type=float, default=0.1, help="seconds to sleep between batches")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
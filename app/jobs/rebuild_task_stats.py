@@ -0,0 +1,150 @@
+"""
+Consistency repair for user_task_stats:
+
+    python -m app.jobs.rebuild_task_stats [--batch-size 1000] [--pause 0.1]
+
+The triggers on tasks keep user_task_stats exact, so this should find nothing
+to fix. It is for after restoring tasks from a dump, writing with triggers
+disabled, or just checking. Walks users in id order in small batches, each in
+its own short transaction:
+
+1. make sure every user of the batch has a stats row
+2. lock those rows (SELECT ... FOR UPDATE); a concurrent task write now waits
+   in its trigger until the batch commits, and then applies its change on top
+   of the recomputed numbers
+3. recompute count and length from tasks and tasks_archive (archived tasks
+   still count) and fix the rows that differ
+
+Safe to run while the app is serving traffic, to interrupt and to re-run.
+last_updated_at is only ever moved forward (to the newest task's updated_at):
+the time of a delete cannot be recovered from tasks.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.db.partitions import archived_task_stats
+from app.db.session import async_session, dispose_engines, get_engine
+from app.models.task import Task
+from app.models.user import User
+from app.models.user_task_stats import UserTaskStats
+
+logger = logging.getLogger(__name__)
+
+_tasks = Task.__table__
+_stats = UserTaskStats.__table__
+
+_FIX = (
+    update(_stats)
+    .where(_stats.c.user_id == bindparam("b_user_id"))
+    .values(
+        task_count=bindparam("b_task_count"),
+        content_length=bindparam("b_content_length"),
+        last_updated_at=bindparam("b_last_updated_at"),
+    )
+)
+
+
+def _insert_missing(user_ids):
+    insert = postgresql.insert if get_engine().dialect.name == "postgresql" else sqlite.insert
+    return insert(_stats).values([{"user_id": user_id} for user_id in user_ids]).on_conflict_do_nothing()
+
+
+async def rebuild(batch_size: int = 1000, pause: float = 0.1) -> int:
+    """Check every user's stats row; returns how many had to be corrected."""
+    last_id, scanned, fixed = 0, 0, 0
+    while True:
+        async with async_session() as db:
+            user_ids = (
+                await db.scalars(select(User.id).where(User.id > last_id).order_by(User.id).limit(batch_size))
+            ).all()
+            if not user_ids:
+                break
+            await db.execute(_insert_missing(user_ids))
+            current = {
+                row.user_id: row
+                for row in await db.execute(
+                    select(_stats).where(_stats.c.user_id.in_(user_ids)).with_for_update()
+                )
+            }
+            actual = {
+                row.user_id: row
+                for row in await db.execute(
+                    select(
+                        _tasks.c.user_id,
+                        func.count().label("task_count"),
+                        func.sum(func.coalesce(_tasks.c.content_chars, func.length(_tasks.c.content), 0)).label(
+                            "content_length"
+                        ),
+                        func.max(_tasks.c.updated_at).label("last_updated_at"),
+                    )
+                    .where(_tasks.c.user_id.in_(user_ids))
+                    .group_by(_tasks.c.user_id)
+                )
+            }
+            archived = await archived_task_stats(db, user_ids)
+            fixes = []
+            for user_id in user_ids:
+                stored = current[user_id]
+                task_count, content_length, last_updated_at = 0, 0, stored.last_updated_at
+                found = actual.get(user_id)
+                counted = [(found.task_count, int(found.content_length or 0), found.last_updated_at)] if found else []
+                if user_id in archived:
+                    counted.append(archived[user_id])
+                for count, length, updated_at in counted:
+                    task_count += count
+                    content_length += length
+                    if last_updated_at is None or last_updated_at < updated_at:
+                        last_updated_at = updated_at
+                if (stored.task_count, stored.content_length, stored.last_updated_at) != (
+                    task_count,
+                    content_length,
+                    last_updated_at,
+                ):
+                    fixes.append(
+                        {
+                            "b_user_id": user_id,
+                            "b_task_count": task_count,
+                            "b_content_length": content_length,
+                            "b_last_updated_at": last_updated_at,
+                        }
+                    )
+            if fixes:
+                await db.execute(_FIX, fixes)
+            await db.commit()
+
+        last_id = user_ids[-1]
+        scanned += len(user_ids)
+        fixed += len(fixes)
+        if fixes:
+            logger.warning("Corrected task stats of %d users (up to id %d)", len(fixes), last_id)
+        logger.info("Checked task stats of %d users (%d corrected), up to id %d", scanned, fixed, last_id)
+        if pause:
+            # leave room for foreground traffic between batches
+            await asyncio.sleep(pause)
+    return fixed
+
+
+async def _main(args) -> None:
+    try:
+        await rebuild(args.batch_size, args.pause)
+    finally:
+        await dispose_engines()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--pause", type=float, default=0.1, help="seconds to sleep between batches")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,41 +1,78 @@
 from typing import Union
 
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from app.routers import auth
 from app.routers import user
 from app.routers import task
 
-# Add these imports at the top
-import asyncio
-from pathlib import Path
-from alembic.config import Config
-from alembic import command
-from app.core.config import DATABASE_URL
+from app.core import change_feed
+from app.core.admission import AdmissionMiddleware
+from app.core.config import ADMISSION_CONTROL_ENABLED, INSTRUMENTATION_ENABLED, MIGRATION_MODE
+from app.core.instrumentation import InstrumentationMiddleware, install_engine_hooks
+from app.core.metrics import render_latest
+from app.db import partitions
+from app.db.session import dispose_engines, get_engine, init_engines
+from app.services import email_filter, password_service, write_coalescer
 
 from contextlib import asynccontextmanager
 
-# Add this function
-async def _run_alembic_upgrade_head() -> None:
-    project_root = Path(__file__).resolve().parents[1]
-    cfg = Config(str(project_root / "alembic.ini"))
-    # Ensure script_location and URL are set
-    cfg.set_main_option("script_location", str(project_root / "alembic"))
-    cfg.set_main_option("sqlalchemy.url", DATABASE_URL)
-    # Run in a thread to avoid blocking the event loop
-    await asyncio.to_thread(command.upgrade, cfg, "head")
+
+async def _prepare_schema() -> None:
+    if MIGRATION_MODE == "skip":
+        return
+    # Alembic is imported lazily so MIGRATION_MODE=skip never pays for it
+    from app.db import migrations
+
+    if MIGRATION_MODE == "check":
+        await migrations.check_schema_current(get_engine())
+    elif MIGRATION_MODE == "upgrade":
+        # Idempotent: upgrade head does nothing if already at head
+        await migrations.run_upgrade_head()
+    else:
+        raise ValueError(f"Unknown MIGRATION_MODE: {MIGRATION_MODE!r}")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Idempotent: upgrade head does nothing if already at head
-    await _run_alembic_upgrade_head()
+    # this worker's own pools, created after any fork
+    init_engines()
+    await _prepare_schema()
+    if email_filter.registered_emails is not None:
+        email_filter.registered_emails.start()
+    partitions.maintainer.start()
     yield
+    await partitions.maintainer.stop()
+    if email_filter.registered_emails is not None:
+        await email_filter.registered_emails.stop()
+    await change_feed.broadcaster.stop()
+    if write_coalescer.coalescer is not None:
+        await write_coalescer.coalescer.drain()
+    password_service.shutdown()
+    await dispose_engines()
 
 app = FastAPI(lifespan=lifespan)
 
+# added first so it sits inside the instrumentation: shed requests are still timed
+if ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(AdmissionMiddleware)
+
+if INSTRUMENTATION_ENABLED:
+    install_engine_hooks()
+    app.add_middleware(InstrumentationMiddleware)
+
 
 @app.get("/")
 def read_root():
     return {"Hello": "World"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint (request timings, DB pool, cache, password hashing, ...)."""
+    return PlainTextResponse(render_latest(), media_type="text/plain; version=0.0.4")
+
+
+app.include_router(auth.router)
 app.include_router(user.router)
 app.include_router(task.router)
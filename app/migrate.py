@@ -0,0 +1,21 @@
+"""
+Deploy-time migration entry point:
+
+    python -m app.migrate            # upgrade to head
+    python -m app.migrate <revision> # upgrade to a specific revision
+"""
+import logging
+import sys
+
+from app.db.migrations import upgrade_head
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    logging.basicConfig(level=logging.INFO)
+    upgrade_head(argv[0] if argv else "head")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
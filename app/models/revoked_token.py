@@ -0,0 +1,21 @@
+"""
+Refresh tokens that can no longer be used: rotated by POST /auth/refresh or
+revoked by POST /auth/logout. In the database, so every worker sees them; a
+row is only needed until the token expires (see auth_service).
+"""
+from datetime import datetime
+
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+from app.models.task import Timestamp
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    # the token's jti claim
+    jti: Mapped[str] = mapped_column(String(32), primary_key=True)
+    # the token's exp claim; expired rows are swept
+    expires_at: Mapped[datetime] = mapped_column(Timestamp, nullable=False, index=True)
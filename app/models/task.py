@@ -1,23 +1,106 @@
 from datetime import datetime
-from sqlalchemy import String, Integer, Text, ForeignKey, DateTime
-from sqlalchemy.orm import Mapped, mapped_column
+from typing import Optional
+
+from sqlalchemy import String, Integer, Text, ForeignKey, DateTime, Index, literal_column
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import Mapped, column_property, mapped_column
 from sqlalchemy.sql import func
 
+from app.core.config import CONTENT_COMPRESSION, CONTENT_COMPRESSION_MIN_BYTES, TASK_PREVIEW_CHARS
 from app.db.base import Base
+from app.db.types import CompressedText, PackedText, SearchVectorSource
+
+
+def content_columns(content: Optional[str]) -> dict:
+    """
+    Column values storing `content`. Large content goes compressed into
+    content_packed and only its first TASK_PREVIEW_CHARS characters stay in
+    the plain `content` column (which feeds previews); the full text goes to
+    content_vector for the search index.
+    Use this for Core/bulk writes; ORM objects can simply set task.content.
+    """
+    if content is None:
+        return {"content_text": None, "content_packed": None, "content_chars": 0, "content_vector": None}
+    if CONTENT_COMPRESSION != "none" and len(content.encode("utf-8")) >= CONTENT_COMPRESSION_MIN_BYTES:
+        return {
+            "content_text": content[:TASK_PREVIEW_CHARS],
+            "content_packed": PackedText.from_text(content),
+            "content_chars": len(content),
+            "content_vector": content,
+        }
+    return {"content_text": content, "content_packed": None, "content_chars": len(content), "content_vector": None}
+
+
+# SQLite's CURRENT_TIMESTAMP (func.now()) has second precision and no fraction;
+# bind timestamps in the same format there so equality/range comparisons on
+# updated_at (conditional requests, ?updated_since=) behave as on Postgres.
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite",
+)
 
 
 class Task(Base):
     __tablename__ = "tasks"
+    # Composite index backs keyset pagination: WHERE user_id = ? AND id > ? ORDER BY id
+    # (it also serves plain user_id lookups, so no separate user_id index is needed).
+    # (user_id, updated_at, id) + version covers the listing ETag query (count/max/sum,
+    # listing_version) as an index-only scan, and the ?updated_since= delta keyset.
+    # version is INCLUDEd on Postgres and a trailing key column on SQLite (no INCLUDE).
+    __table_args__ = (
+        Index("ix_tasks_user_id_id", "user_id", "id"),
+        Index(
+            "ix_tasks_user_id_updated_at_id", "user_id", "updated_at", "id", postgresql_include=["version"]
+        ).ddl_if(dialect="postgresql"),
+        Index("ix_tasks_user_id_updated_at_id_version", "user_id", "updated_at", "id", "version").ddl_if(
+            dialect="sqlite"
+        ),
+    )
+    # Fetch server defaults (timestamps) via INSERT ... RETURNING instead of a refresh()
+    __mapper_args__ = {"eager_defaults": True}
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True, nullable=False)
+    # On Postgres the table is partitioned by month of created_at (app.db.partitions)
+    # and its primary key is (id, created_at); ids stay unique, from one sequence.
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     name: Mapped[str] = mapped_column(String(200), nullable=False)
-    content: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    # Note body, see content_columns(): the full text, or just its head when the
+    # body is stored compressed in content_packed. Read it through .content.
+    content_text: Mapped[str | None] = mapped_column("content", Text, nullable=True)
+    content_packed: Mapped[PackedText | None] = mapped_column(CompressedText, nullable=True)
+    # Length of the full text in characters (NULL only on rows not yet backfilled)
+    content_chars: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # Postgres: tsvector of the full text of a compressed body (NULL for plain
+    # ones), indexed instead of its head (app.db.search). Written, never read.
+    content_vector: Mapped[str | None] = mapped_column(SearchVectorSource, nullable=True, deferred=True)
 
     # DB-populated timestamps
-    created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), nullable=False
-    )
+    created_at: Mapped[datetime] = mapped_column(Timestamp, server_default=func.now(), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
-    )
\ No newline at end of file
+        Timestamp, server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+    # Bumped by every UPDATE; the task's ETag. updated_at can't be: it has
+    # one-second precision on SQLite, so two writes in the same second shared it.
+    version: Mapped[int] = mapped_column(
+        Integer, server_default="1", onupdate=literal_column("version + 1"), nullable=False
+    )
+
+    # Computed by the database for summary listings; deferred, so they are only
+    # selected when a query asks for them (see task_service.list_tasks)
+    content_length: Mapped[int] = column_property(
+        func.coalesce(content_chars, func.length(content_text), 0), deferred=True
+    )
+    content_preview: Mapped[str | None] = column_property(
+        func.substr(content_text, 1, TASK_PREVIEW_CHARS), deferred=True
+    )
+
+    @property
+    def content(self) -> Optional[str]:
+        # decompresses on first access only
+        return self.content_packed.text if self.content_packed is not None else self.content_text
+
+    @content.setter
+    def content(self, value: Optional[str]) -> None:
+        for key, column_value in content_columns(value).items():
+            setattr(self, key, column_value)
@@ -1,13 +1,26 @@
 from sqlalchemy import String, Integer
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, mapped_column, validates
 from app.db.base import Base
 
 
+def normalize_email(email: str) -> str:
+    """The form emails are compared in: surrounding whitespace dropped, lower-cased."""
+    return email.strip().lower()
+
+
 class User(Base):
     __tablename__ = "users"
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(50))
     email: Mapped[str] = mapped_column(String(100), unique=True, index=True)
+    # normalize_email(email), set whenever email is; one account per address
+    # regardless of case, and exact index lookups for signup and login
+    email_normalized: Mapped[str] = mapped_column(String(100), unique=True, index=True, nullable=False)
     password: Mapped[str] = mapped_column(String(100), nullable=False)
     is_active: Mapped[bool] = mapped_column(default=True)
+
+    @validates("email")
+    def _normalize_email(self, key: str, email: str) -> str:
+        self.email_normalized = normalize_email(email)
+        return email
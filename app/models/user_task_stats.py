@@ -0,0 +1,128 @@
+"""
+Per-user task counters, so "you have N notes" is a primary-key lookup instead
+of a COUNT(*) over the user's tasks.
+
+The row is maintained by triggers on `tasks`, in the same transaction as the
+write, so every writer (single and batch endpoints, the write coalescer, jobs,
+manual SQL) keeps it exact without doing anything:
+
+- Postgres: statement-level triggers with transition tables, i.e. one upsert
+  per statement and user, not one per row (a 1000-row batch insert costs one).
+- SQLite (local runs and benchmarks): row-level triggers.
+
+Both are created by Base.metadata.create_all through the DDL listeners below;
+on Postgres the add_user_task_stats migration creates (and backfills) them.
+Concurrent writes by the same user serialize on that user's stats row.
+Archived tasks still count: the Postgres triggers skip the statements that
+move tasks between `tasks` and `tasks_archive` (app.db.partitions sets
+secure_notes.moving_tasks for them). `python -m app.jobs.rebuild_task_stats`
+recomputes the rows from `tasks` and `tasks_archive`.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DDL, BigInteger, ForeignKey, Integer, event
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+from app.models.task import Timestamp
+
+
+class UserTaskStats(Base):
+    __tablename__ = "user_task_stats"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    task_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    # total length of the users' task content, in characters (see Task.content_length)
+    content_length: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+    # time of the user's latest task write (insert, update or delete)
+    last_updated_at: Mapped[Optional[datetime]] = mapped_column(Timestamp, nullable=True)
+
+
+# one task's contribution to content_length; mirrors Task.content_length
+_LENGTH = "coalesce({row}.content_chars, length({row}.content), 0)"
+
+# ----------------------------
+# Postgres
+# ----------------------------
+_PG_UPSERT = """
+        INSERT INTO user_task_stats AS s (user_id, task_count, content_length, last_updated_at)
+        SELECT delta.user_id, sum(delta.task_count), sum(delta.content_length), now()
+        FROM ({delta}) AS delta
+        GROUP BY delta.user_id
+        ON CONFLICT (user_id) DO UPDATE
+        SET task_count = s.task_count + excluded.task_count,
+            content_length = s.content_length + excluded.content_length,
+            last_updated_at = excluded.last_updated_at;"""
+_PG_ADDED = f"SELECT new_rows.user_id, 1 AS task_count, {_LENGTH.format(row='new_rows')} AS content_length FROM new_rows"
+_PG_REMOVED = f"SELECT old_rows.user_id, -1, -{_LENGTH.format(row='old_rows')} FROM old_rows"
+
+# a transition table only exists for the events that have it, hence one branch
+# per TG_OP (plpgsql plans each statement when it first runs)
+PG_MOVING_TASKS = "current_setting('secure_notes.moving_tasks', true) = 'on'"
+PG_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION user_task_stats_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF {PG_MOVING_TASKS} THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'INSERT' THEN{_PG_UPSERT.format(delta=_PG_ADDED)}
+    ELSIF TG_OP = 'UPDATE' THEN{_PG_UPSERT.format(delta=f"{_PG_ADDED} UNION ALL {_PG_REMOVED}")}
+    ELSE
+        UPDATE user_task_stats AS s
+        SET task_count = s.task_count - d.task_count,
+            content_length = s.content_length - d.content_length,
+            last_updated_at = now()
+        FROM (
+            SELECT old_rows.user_id, count(*) AS task_count, sum({_LENGTH.format(row="old_rows")}) AS content_length
+            FROM old_rows GROUP BY old_rows.user_id
+        ) AS d
+        WHERE s.user_id = d.user_id;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+PG_TRIGGERS = [
+    """CREATE TRIGGER tasks_user_task_stats_insert AFTER INSERT ON tasks
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION user_task_stats_apply()""",
+    """CREATE TRIGGER tasks_user_task_stats_update AFTER UPDATE ON tasks
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION user_task_stats_apply()""",
+    """CREATE TRIGGER tasks_user_task_stats_delete AFTER DELETE ON tasks
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION user_task_stats_apply()""",
+]
+
+# ----------------------------
+# SQLite
+# ----------------------------
+_SQLITE_ADD = f"""
+        INSERT INTO user_task_stats (user_id, task_count, content_length, last_updated_at)
+        VALUES (new.user_id, 1, {_LENGTH.format(row="new")}, CURRENT_TIMESTAMP)
+        ON CONFLICT (user_id) DO UPDATE
+        SET task_count = task_count + 1,
+            content_length = content_length + excluded.content_length,
+            last_updated_at = excluded.last_updated_at;"""
+_SQLITE_SUBTRACT = f"""
+        UPDATE user_task_stats
+        SET task_count = task_count - 1,
+            content_length = content_length - {_LENGTH.format(row="old")},
+            last_updated_at = CURRENT_TIMESTAMP
+        WHERE user_id = old.user_id;"""
+SQLITE_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS tasks_user_task_stats_ai AFTER INSERT ON tasks BEGIN{_SQLITE_ADD}\n    END",
+    f"CREATE TRIGGER IF NOT EXISTS tasks_user_task_stats_ad AFTER DELETE ON tasks BEGIN{_SQLITE_SUBTRACT}\n    END",
+    f"CREATE TRIGGER IF NOT EXISTS tasks_user_task_stats_au AFTER UPDATE ON tasks BEGIN{_SQLITE_SUBTRACT}{_SQLITE_ADD}\n    END",
+]
+
+
+# On the metadata, not a table: the triggers need both tasks and user_task_stats.
+# That also runs when create_all finds the tables already there, hence the
+# DROP ... IF EXISTS / IF NOT EXISTS.
+_PG_DROP_TRIGGERS = [f"DROP TRIGGER IF EXISTS tasks_user_task_stats_{op} ON tasks" for op in ("insert", "update", "delete")]
+for _statement in (PG_FUNCTION, *_PG_DROP_TRIGGERS, *PG_TRIGGERS):
+    event.listen(Base.metadata, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+for _statement in SQLITE_TRIGGERS:
+    event.listen(Base.metadata, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
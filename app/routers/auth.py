@@ -0,0 +1,33 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.instrumentation import TimedRoute
+from app.core.security import current_claims
+from app.db.session import get_db
+from app.schemas.auth import LoginRequest, LogoutRequest, RefreshRequest, TokenPair
+from app.services import auth_service
+
+router = APIRouter(prefix="/auth", tags=["auth"], route_class=TimedRoute)
+
+
+@router.post("/login", response_model=TokenPair)
+async def login(payload: LoginRequest, db: AsyncSession = Depends(get_db)):
+    """Exchange email + password for an access token (send as `Authorization: Bearer ...`) and a refresh token."""
+    # primary, not a replica: a user who just signed up must be able to log in
+    return await auth_service.login(db, payload.email, payload.password)
+
+
+@router.post("/refresh", response_model=TokenPair)
+async def refresh(payload: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    return await auth_service.refresh(db, payload.refresh_token)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    payload: Optional[LogoutRequest] = None,
+    claims: dict = Depends(current_claims),
+    db: AsyncSession = Depends(get_db),
+):
+    await auth_service.logout(db, claims, payload.refresh_token if payload else None)
@@ -1,17 +1,30 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Header, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
-from app.schemas.task import TaskCreate, TaskRead, TaskUpdate
+from app.core.instrumentation import TimedRoute
+from app.core.security import current_user_id
+from app.db.session import get_db, get_read_db
+from app.schemas.task import (
+    TaskBatchDelete,
+    TaskBatchResult,
+    TaskBatchUpdate,
+    TaskCreate,
+    TaskRead,
+    TaskUpdate,
+)
 from app.services.task_service import (
     get_task,
     update_task,
     delete_task,
+    update_tasks,
+    delete_tasks,
 )
+from app.utilities.etag_utility import matches_if_none_match, task_etag
+from app.utilities.response_utility import encoded_response, row_dict
 
-router = APIRouter(prefix="/tasks", tags=["tasks"])
+router = APIRouter(prefix="/tasks", tags=["tasks"], route_class=TimedRoute)
 
 
 # @router.post("/", response_model=TaskRead, status_code=status.HTTP_201_CREATED)
@@ -28,16 +41,76 @@ router = APIRouter(prefix="/tasks", tags=["tasks"])
 #     return await list_tasks(db, user_id=user_id, skip=skip, limit=limit)
 
 
-@router.get("/{task_id}", response_model=TaskRead)
-async def get_task_endpoint(task_id: int, db: AsyncSession = Depends(get_db)):
-    return await get_task(db, task_id)
+@router.patch(":batch", response_model=TaskBatchResult)
+async def update_tasks_endpoint(
+    request: Request,
+    payload: TaskBatchUpdate,
+    owner_id: int = Depends(current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    updated = await update_tasks(db, payload.items, owner_id=owner_id)
+    results = [
+        {"index": i, "id": item.id, "status": "updated", "task": row_dict(updated[item.id], TaskRead)}
+        if item.id in updated
+        else {"index": i, "id": item.id, "status": "not_found", "task": None}
+        for i, item in enumerate(payload.items)
+    ]
+    return encoded_response(request, {"results": results})
+
 
+@router.delete(":batch", response_model=TaskBatchResult)
+async def delete_tasks_endpoint(
+    request: Request,
+    payload: TaskBatchDelete,
+    owner_id: int = Depends(current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    deleted = await delete_tasks(db, payload.ids, owner_id=owner_id)
+    results = [
+        {"index": i, "id": task_id, "status": "deleted" if task_id in deleted else "not_found", "task": None}
+        for i, task_id in enumerate(payload.ids)
+    ]
+    return encoded_response(request, {"results": results})
 
-@router.put("/{task_id}", response_model=TaskRead)
-async def update_task_endpoint(task_id: int, payload: TaskUpdate, db: AsyncSession = Depends(get_db)):
-    return await update_task(db, task_id, payload)
+
+@router.get(
+    "/{task_id}",
+    response_model=TaskRead,
+    responses={status.HTTP_304_NOT_MODIFIED: {"description": "If-None-Match matched the current ETag"}},
+)
+async def get_task_endpoint(
+    request: Request,
+    task_id: int,
+    if_none_match: Optional[str] = Header(None),
+    owner_id: int = Depends(current_user_id),
+    db: AsyncSession = Depends(get_read_db),
+):
+    task = await get_task(db, task_id, owner_id=owner_id)
+    etag = task_etag(task.id, task.version)
+    if matches_if_none_match(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return encoded_response(request, row_dict(task, TaskRead), headers={"ETag": etag})
+
+
+@router.put(
+    "/{task_id}",
+    response_model=TaskRead,
+    responses={status.HTTP_412_PRECONDITION_FAILED: {"description": "If-Match did not match the current ETag"}},
+)
+async def update_task_endpoint(
+    request: Request,
+    task_id: int,
+    payload: TaskUpdate,
+    if_match: Optional[str] = Header(None),
+    owner_id: int = Depends(current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    task = await update_task(db, task_id, payload, if_match=if_match, owner_id=owner_id)
+    return encoded_response(request, row_dict(task, TaskRead), headers={"ETag": task_etag(task.id, task.version)})
 
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_task_endpoint(task_id: int, db: AsyncSession = Depends(get_db)):
-    await delete_task(db, task_id)
\ No newline at end of file
+async def delete_task_endpoint(
+    task_id: int, owner_id: int = Depends(current_user_id), db: AsyncSession = Depends(get_db)
+):
+    await delete_task(db, task_id, owner_id=owner_id)
\ No newline at end of file
@@ -1,25 +1,73 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from app.schemas.task import TaskCreate, TaskRead
-from app.schemas.user import UserCreate, UserRead
-from app.services.task_service import create_task, list_tasks
-from app.services.user_service import create_user, get_users
-from app.db.session import get_db
-from app.utilities.password_utility import hash_password
-from typing import List
+from app.core import change_feed
+from app.core.config import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.idempotency import REPLAYED_HEADERS, idempotent
+from app.core.instrumentation import TimedRoute
+from app.core.security import admin_user_id, authorized_user_id, keyed_digest
+from app.schemas.task import (
+    TaskBatchCreate,
+    TaskBatchResult,
+    TaskCreate,
+    TaskPage,
+    TaskRead,
+    TaskSearchHit,
+    TaskSearchPage,
+    TaskStats,
+    TaskSummaryPage,
+)
+from app.schemas.user import UserCreate, UserPage, UserRead
+from app.services.task_service import (
+    create_task,
+    create_tasks,
+    get_task_stats,
+    list_changed_tasks,
+    list_tasks,
+    listing_version,
+    search_tasks,
+    stream_tasks,
+)
+from app.services.user_service import EmailAlreadyRegistered, create_user, get_users, stream_users
+from app.utilities.etag_utility import listing_etag, matches_if_none_match
+from app.utilities.response_utility import encoded_response, row_dict, row_dicts
+from app.utilities.stream_utility import ndjson_response
+from app.db.session import get_db, get_read_db
+from typing import Literal, Optional, Union
 import logging
 
 logger = logging.getLogger(__name__)
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(prefix="/users", tags=["users"], route_class=TimedRoute)
 
 @router.post("/", response_model=UserRead)
-async def create(user: UserCreate, db: Session = Depends(get_db)):
+async def create(
+    request: Request,
+    user: UserCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    db: Session = Depends(get_db),
+):
+    async def run() -> dict:
+        # create_user hashes the password exactly once, in the hash worker pool
+        return row_dict(await create_user(db, user), UserRead)
+
     try:
-        # Hash the password before creating the user
-        user.password = hash_password(user.password)
-        return await create_user(db, user)
-    
+        # a retry with another password must not be replayed as a success; only a
+        # keyed digest of it goes into the fingerprint, never the password itself
+        payload = {**user.model_dump(mode="json", exclude={"password"}), "password": keyed_digest(user.password)}
+        created, replayed = await idempotent("create_user", "-", idempotency_key, payload, run)
+        return encoded_response(request, created, headers=REPLAYED_HEADERS if replayed else None)
+
+    except HTTPException:
+        raise
+
+    except EmailAlreadyRegistered:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A user with this email already exists"
+        )
+
     except IntegrityError as e:
         await db.rollback()
         logger.error(f"Database integrity error creating user: {str(e)}")
@@ -51,11 +99,20 @@ async def create(user: UserCreate, db: Session = Depends(get_db)):
             detail="An unexpected error occurred while creating the user"
         )
 
-@router.get("/", response_model=List[UserRead])
-async def read_all(db: Session = Depends(get_db)):
+@router.get("/", response_model=UserPage)
+async def read_all(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db),
+):
     try:
-        return await get_users(db)
-    
+        users, next_cursor = await get_users(db, cursor=cursor, limit=limit)
+        return encoded_response(request, {"items": row_dicts(users, UserRead), "next_cursor": next_cursor})
+
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
     except Exception as e:
         logger.error(f"Error fetching users: {str(e)}")
         raise HTTPException(
@@ -63,13 +120,52 @@ async def read_all(db: Session = Depends(get_db)):
             detail="An error occurred while fetching users"
         )
 
+@router.get("/export", dependencies=[Depends(admin_user_id)])
+async def export_users():
+    """Admin export (ADMIN_USER_IDS only): every user as NDJSON, streamed."""
+    return ndjson_response(stream_users, UserRead)
+
+
 # ----------------------------
-# Create and get Task per User
+# Create and get Task per User (only the authenticated user's own tasks)
 # ----------------------------
-@router.get("/{user_id}/tasks", response_model=List[TaskRead])
-async def get_user_tasks(user_id: int, db: Session = Depends(get_db)):
+@router.get(
+    "/{user_id}/tasks",
+    response_model=Union[TaskPage, TaskSummaryPage],
+    responses={status.HTTP_304_NOT_MODIFIED: {"description": "If-None-Match matched the current ETag"}},
+)
+async def get_user_tasks(
+    request: Request,
+    user_id: int = Depends(authorized_user_id),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    view: Literal["full", "summary"] = Query(
+        "full", description="summary: content_length/content_preview instead of the full content"
+    ),
+    updated_since: Optional[datetime] = Query(
+        None, description="only tasks created or updated at or after this time, oldest change first"
+    ),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
+):
     try:
-        return await list_tasks(db, user_id=user_id)
+        # version before page: a write in between can only make the ETag older
+        # than the body (a spurious 200 later), never newer (a wrong 304)
+        etag = listing_etag(*await listing_version(db, user_id), user_id, cursor, limit, view, updated_since)
+        if matches_if_none_match(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        if updated_since is not None:
+            tasks, next_cursor = await list_changed_tasks(
+                db, user_id, updated_since, cursor=cursor, limit=limit, summary=view == "summary"
+            )
+        else:
+            tasks, next_cursor = await list_tasks(
+                db, user_id=user_id, cursor=cursor, limit=limit, summary=view == "summary", etag=etag
+            )
+        return encoded_response(request, {"items": tasks, "next_cursor": next_cursor}, headers={"ETag": etag})
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching tasks for user {user_id}: {str(e)}")
         raise HTTPException(
@@ -78,13 +174,118 @@ async def get_user_tasks(user_id: int, db: Session = Depends(get_db)):
         )
     
 
+@router.get("/{user_id}/stats", response_model=TaskStats)
+async def get_user_stats(
+    request: Request, user_id: int = Depends(authorized_user_id), db: Session = Depends(get_read_db)
+):
+    """Task count and total content length, without listing the tasks."""
+    try:
+        return encoded_response(request, row_dict(await get_task_stats(db, user_id), TaskStats))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching task stats for user {user_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while fetching task stats"
+        )
+
+
+@router.get("/{user_id}/tasks/search", response_model=TaskSearchPage)
+async def search_user_tasks(
+    request: Request,
+    user_id: int = Depends(authorized_user_id),
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db),
+):
+    try:
+        hits, next_cursor = await search_tasks(db, user_id, q, cursor=cursor, limit=limit)
+        return encoded_response(request, {"items": row_dicts(hits, TaskSearchHit), "next_cursor": next_cursor})
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error searching tasks for user {user_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while searching tasks"
+        )
+
+
+@router.get(
+    "/{user_id}/tasks/events",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}, "description": "Server-sent events"}},
+)
+async def task_events(user_id: int = Depends(authorized_user_id), last_event_id: Optional[str] = Header(None)):
+    """
+    Server-sent events for the user's tasks: `created`, `updated` and `deleted`
+    (data: {"id", "user_id", "updated_at"}), instead of polling the listing.
+    `resync` means events were lost: refetch the listing. Reconnects resume
+    after Last-Event-ID.
+    """
+    if change_feed.broadcaster.full():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many open change feeds, retry later",
+            headers={"Retry-After": "5"},
+        )
+    return StreamingResponse(
+        change_feed.event_stream(user_id, last_event_id),
+        media_type="text/event-stream",
+        # no caching, and no response buffering in nginx
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/{user_id}/tasks/export")
+async def export_user_tasks(user_id: int = Depends(authorized_user_id)):
+    """All of a user's tasks as NDJSON, streamed with constant memory."""
+    return ndjson_response(lambda db: stream_tasks(db, user_id), TaskRead)
+
+
 @router.post("/{user_id}/tasks", response_model=TaskRead, status_code=status.HTTP_201_CREATED)
-async def create_user_task(user_id: int, task: TaskCreate, db: Session = Depends(get_db)):
+async def create_user_task(
+    request: Request,
+    task: TaskCreate,
+    user_id: int = Depends(authorized_user_id),
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    db: Session = Depends(get_db),
+):
+    """Create a task. Retries that send the same Idempotency-Key get the first response back."""
+    async def run() -> dict:
+        return row_dict(await create_task(db, task, user_id=user_id), TaskRead)
+
     try:
-        return await create_task(db, task, user_id=user_id)
+        created, replayed = await idempotent("create_task", user_id, idempotency_key, task.model_dump(mode="json"), run)
+        return encoded_response(
+            request,
+            created,
+            status_code=status.HTTP_201_CREATED,
+            headers=REPLAYED_HEADERS if replayed else None,
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error creating task for user {user_id}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred while creating the task"
         )
+
+
+@router.post("/{user_id}/tasks:batch", response_model=TaskBatchResult, status_code=status.HTTP_201_CREATED)
+async def create_user_tasks(
+    request: Request,
+    payload: TaskBatchCreate,
+    user_id: int = Depends(authorized_user_id),
+    db: Session = Depends(get_db),
+):
+    """Create many tasks in one transaction; results are in request order."""
+    tasks = await create_tasks(db, user_id, payload.items)
+    results = [
+        {"index": i, "id": task.id, "status": "created", "task": row_dict(task, TaskRead)}
+        for i, task in enumerate(tasks)
+    ]
+    return encoded_response(request, {"results": results}, status_code=status.HTTP_201_CREATED)
@@ -1,7 +1,9 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from app.core.config import MAX_BATCH_SIZE
 
 # Pydantic v1/v2 compatibility for ORM mode/from_attributes
 try:
@@ -36,4 +38,78 @@ class TaskRead(ORMModel):
     name: str
     content: Optional[str] = None
     created_at: datetime
-    updated_at: datetime
\ No newline at end of file
+    updated_at: datetime
+    version: int  # bumped by every update; the ETag is built from it
+
+
+class TaskSummary(ORMModel):
+    """A task without its content, for list views."""
+    id: int
+    user_id: int
+    name: str
+    content_length: int  # characters; 0 when there is no content
+    content_preview: Optional[str] = None  # first TASK_PREVIEW_CHARS characters
+    created_at: datetime
+    updated_at: datetime
+
+
+class TaskPage(BaseModel):
+    items: List[TaskRead]
+    # opaque; pass back as ?cursor= to fetch the next page, null on the last page
+    next_cursor: Optional[str] = None
+
+
+class TaskSummaryPage(BaseModel):
+    items: List[TaskSummary]
+    next_cursor: Optional[str] = None
+
+
+class TaskSearchHit(BaseModel):
+    id: int
+    name: str
+    created_at: datetime
+    updated_at: datetime
+    rank: float  # higher is a better match
+    snippet: Optional[str] = Field(
+        None,
+        description="HTML: the note text is escaped and matched terms are wrapped in <b>...</b>, the only tags it contains",
+    )
+
+
+class TaskSearchPage(BaseModel):
+    items: List[TaskSearchHit]
+    next_cursor: Optional[str] = None
+
+
+class TaskStats(ORMModel):
+    user_id: int
+    task_count: int = 0
+    content_length: int = 0  # characters, summed over all tasks
+    last_updated_at: Optional[datetime] = None  # latest task write; null if there never was one
+
+
+class TaskBatchCreate(BaseModel):
+    items: List[TaskCreate] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class TaskBatchUpdateItem(TaskUpdate):
+    id: int
+
+
+class TaskBatchUpdate(BaseModel):
+    items: List[TaskBatchUpdateItem] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class TaskBatchDelete(BaseModel):
+    ids: List[int] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class TaskBatchItemResult(BaseModel):
+    index: int  # position of the item in the request
+    id: Optional[int] = None
+    status: Literal["created", "updated", "deleted", "not_found"]
+    task: Optional[TaskRead] = None
+
+
+class TaskBatchResult(BaseModel):
+    results: List[TaskBatchItemResult]
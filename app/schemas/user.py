@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class UserBase(BaseModel):
     name: str
@@ -14,4 +14,10 @@ class UserRead(UserBase):
     # Note: password is excluded from read model for security
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class UserPage(BaseModel):
+    items: List[UserRead]
+    # opaque; pass back as ?cursor= to fetch the next page, null on the last page
+    next_cursor: Optional[str] = None
@@ -0,0 +1,130 @@
+"""
+Production entry point: N uvicorn workers (uvloop + httptools) on one socket.
+
+    python -m app.serve                        # SERVE_WORKERS workers on 0.0.0.0:8000
+    python -m app.serve --workers 4 --port 8080
+
+Each worker is a fresh interpreter that imports the app and creates its own DB
+pools in the lifespan (app.db.session.init_engines); nothing connected is ever
+shared between processes. The supervisor restarts workers that exit, which is
+how recycling works: a worker stops after SERVE_MAX_REQUESTS (+ jitter) requests
+and is replaced.
+
+SIGTERM/SIGINT: every worker stops accepting, ends open change-feed streams,
+lets in-flight requests finish (up to SERVE_GRACEFUL_TIMEOUT_SECONDS), runs the
+lifespan shutdown (coalescer drain, pools closed) and exits.
+
+With MIGRATION_MODE=upgrade the migrations run once here, before the workers
+start, and the workers only check the schema. More than one worker needs a
+shared read cache (CACHE_BACKEND=redis): the per-process memory cache, which
+other workers' writes cannot invalidate, is switched off (with a warning).
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import secrets
+import socket
+import sys
+from typing import List, Optional
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+from app.core.config import (
+    CACHE_BACKEND,
+    IDEMPOTENCY_BACKEND,
+    MIGRATION_MODE,
+    SERVE_GRACEFUL_TIMEOUT_SECONDS,
+    SERVE_MAX_REQUESTS,
+    SERVE_MAX_REQUESTS_JITTER,
+    SERVE_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class DrainingServer(uvicorn.Server):
+    """uvicorn.Server that ends change-feed streams before waiting for requests, and jitters its request limit."""
+
+    def __init__(self, config: uvicorn.Config, max_requests_jitter: int = 0):
+        super().__init__(config)
+        self.max_requests_jitter = max_requests_jitter
+
+    def run(self, sockets: Optional[List[socket.socket]] = None) -> None:
+        # runs in the worker, so every worker draws its own limit
+        if self.config.limit_max_requests and self.max_requests_jitter:
+            self.config.limit_max_requests += random.randint(0, self.max_requests_jitter)
+        super().run(sockets=sockets)
+
+    async def shutdown(self, sockets: Optional[List[socket.socket]] = None) -> None:
+        # SSE streams never finish on their own; without this every shutdown
+        # would sit out the whole graceful timeout and then cancel them
+        for server in self.servers:
+            server.close()
+        from app.core import change_feed
+
+        await change_feed.broadcaster.stop()
+        # connections accepted just before the close may not have delivered their
+        # request yet; uvicorn would close them as idle, so let them start first
+        await asyncio.sleep(0.1)
+        await super().shutdown(sockets=sockets)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the API with several worker processes.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS)
+    parser.add_argument("--max-requests", type=int, default=SERVE_MAX_REQUESTS, help="0 never recycles")
+    parser.add_argument("--max-requests-jitter", type=int, default=SERVE_MAX_REQUESTS_JITTER)
+    parser.add_argument("--graceful-timeout", type=float, default=SERVE_GRACEFUL_TIMEOUT_SECONDS)
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    logging.basicConfig(level=logging.INFO)
+    if args.workers > 1 and CACHE_BACKEND == "memory":
+        # writes only invalidate their own worker's cache: the others would serve
+        # stale tasks and listing pages until CACHE_TTL_SECONDS. memory is also the
+        # default, so run uncached rather than refuse a plain `python -m app.serve`
+        logger.warning("CACHE_BACKEND=memory is per process; the %d workers run uncached, use redis", args.workers)
+        os.environ["CACHE_BACKEND"] = "none"
+    if args.workers > 1 and IDEMPOTENCY_BACKEND == "memory":
+        logger.warning("IDEMPOTENCY_BACKEND=memory: a retry that reaches another worker runs again; use redis")
+
+    if MIGRATION_MODE == "upgrade":
+        from app.db.migrations import upgrade_head
+
+        upgrade_head()
+        os.environ["MIGRATION_MODE"] = "check"
+    if not os.environ.get("AUTH_SECRET_KEY"):
+        # a token must verify on whichever worker gets the next request
+        logger.warning("AUTH_SECRET_KEY is not set; the workers share a random key until they stop")
+        os.environ["AUTH_SECRET_KEY"] = secrets.token_hex(32)
+    # bcrypt pools are per worker too: split the CPUs between them unless told otherwise
+    os.environ.setdefault("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 1) // max(args.workers, 1))))
+
+    config = uvicorn.Config(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=max(args.workers, 1),
+        loop="uvloop",
+        http="httptools",
+        limit_max_requests=args.max_requests or None,
+        timeout_graceful_shutdown=args.graceful_timeout,
+    )
+    server = DrainingServer(config, max_requests_jitter=args.max_requests_jitter)
+    recycling = (
+        f"recycled after {args.max_requests}-{args.max_requests + args.max_requests_jitter} requests"
+        if args.max_requests
+        else "never recycled"
+    )
+    logger.info("Starting %d workers on %s:%d, %s", config.workers, args.host, args.port, recycling)
+    sock = config.bind_socket()
+    # always supervised, also with one worker, so recycled workers come back
+    Multiprocess(config, target=server.run, sockets=[sock]).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
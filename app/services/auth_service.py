@@ -0,0 +1,136 @@
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import ACCESS_TOKEN_TTL_SECONDS
+from app.core.metrics import Counter
+from app.core.security import ACCESS, REFRESH, InvalidToken, decode_token, issue_token, revocations
+from app.models.revoked_token import RevokedToken
+from app.models.user import User, normalize_email
+from app.services import password_service
+
+logger = logging.getLogger(__name__)
+
+LOGINS = Counter("auth_logins_total", "Login attempts by result", ("result",))
+
+# Verified against when the email is unknown, so every login costs exactly one
+# bcrypt verify and response time does not reveal which emails exist.
+_DUMMY_HASH = "$2b$12$kxvyQWp3e4YuVjreOoA.MOMiBLAd5mzhixsynN.A4u2VDdosnJhNG"
+
+# expired revoked_tokens rows are deleted on every Nth revocation (per process)
+_SWEEP_EVERY = 1000
+_revoked = 0
+
+
+def _invalid_credentials() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid email or password",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def token_pair(user_id: int) -> dict:
+    return {
+        "access_token": issue_token(user_id, ACCESS),
+        "refresh_token": issue_token(user_id, REFRESH),
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_TTL_SECONDS,
+    }
+
+
+async def _active_user(db: AsyncSession, stmt) -> Optional[User]:
+    try:
+        user = await db.scalar(stmt)
+    except SQLAlchemyError as e:
+        logger.error("DB error loading user for auth: %s", str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to authenticate",
+        )
+    return user if user is not None and user.is_active else None
+
+
+async def _revoke_refresh_token(db: AsyncSession, claims: dict) -> bool:
+    """
+    Record a refresh token as used up, for every worker; False if it already
+    was (rotated or logged out before, or a concurrent refresh won the race).
+    """
+    global _revoked
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    stmt = (
+        insert(RevokedToken)
+        .values(jti=claims["jti"], expires_at=datetime.fromtimestamp(claims["exp"], timezone.utc))
+        .on_conflict_do_nothing()
+        .returning(RevokedToken.jti)
+    )
+    try:
+        recorded = await db.scalar(stmt)
+        _revoked += 1
+        if _revoked % _SWEEP_EVERY == 0:
+            await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.now(timezone.utc)))
+        await db.commit()
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error("DB error revoking refresh token: %s", str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to authenticate",
+        )
+    return recorded is not None
+
+
+async def login(db: AsyncSession, email: str, password: str) -> dict:
+    """
+    Check credentials with one query and one bcrypt verify (in the hash worker
+    pool, off the event loop) and issue an access + refresh token pair.
+    """
+    user = await _active_user(db, select(User).where(User.email_normalized == normalize_email(email)))
+    try:
+        valid = await password_service.verify_password(password, user.password if user else _DUMMY_HASH)
+    except ValueError:
+        # stored value is not a recognisable hash
+        valid = False
+    if user is None or not valid:
+        LOGINS.inc(result="failed")
+        raise _invalid_credentials()
+    LOGINS.inc(result="ok")
+    return token_pair(user.id)
+
+
+async def refresh(db: AsyncSession, refresh_token: str) -> dict:
+    """
+    Exchange a refresh token for a new pair. The old refresh token is revoked
+    (rotation) in the database, so it is refused by every worker, and each
+    token is exchanged at most once even when two workers race. The user must
+    still exist and be active.
+    """
+    try:
+        claims = decode_token(refresh_token, REFRESH)
+    except InvalidToken:
+        raise _invalid_credentials()
+    user = await _active_user(db, select(User).where(User.id == int(claims["sub"])))
+    if user is None or not await _revoke_refresh_token(db, claims):
+        raise _invalid_credentials()
+    return token_pair(user.id)
+
+
+async def logout(db: AsyncSession, access_claims: dict, refresh_token: Optional[str] = None) -> None:
+    """
+    Revoke the caller's access token (in this worker) and, if given and theirs,
+    a refresh token (in the database, for every worker).
+    """
+    revocations.revoke(access_claims["jti"], access_claims["exp"])
+    if refresh_token:
+        try:
+            claims = decode_token(refresh_token, REFRESH)
+        except InvalidToken:
+            return
+        if claims["sub"] == access_claims["sub"]:
+            await _revoke_refresh_token(db, claims)
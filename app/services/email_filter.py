@@ -0,0 +1,163 @@
+"""
+Per-worker bloom filter of registered (normalized) emails, so duplicate signups
+are turned away before bcrypt runs.
+
+create_user asks is_registered() before hashing:
+
+- filter says no: the email is not in `users` (as of the load, plus everything
+  this worker registered since), no query needed
+- filter says maybe: one lookup on ix_users_email_normalized confirms it; a
+  duplicate is rejected without hashing, a false positive (about
+  SIGNUP_EMAIL_FILTER_ERROR_RATE of new emails) carries on
+
+The unique index stays the authority. An email registered through another
+worker after this one loaded is not in its filter; that duplicate is caught by
+the INSERT as before, only after hashing. Until the initial load finishes, and
+if it fails, every signup takes the lookup. Deleted users leave their bits set,
+which only costs lookups. Once more emails are added than the filter was sized
+for, it is rebuilt at twice the size in the background.
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from typing import List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import (
+    EXPORT_YIELD_PER,
+    SIGNUP_EMAIL_FILTER_CAPACITY,
+    SIGNUP_EMAIL_FILTER_ENABLED,
+    SIGNUP_EMAIL_FILTER_ERROR_RATE,
+)
+from app.core.metrics import Counter, Gauge
+from app.db.session import read_session
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+EMAIL_CHECKS = Counter(
+    "signup_email_checks_total",
+    "Signup email pre-checks: new (filter only), duplicate (rejected before hashing), lookup_new (looked up, not found)",
+    ("result",),
+)
+FILTER_ENTRIES = Gauge("signup_email_filter_entries", "Emails added to this worker's signup email filter")
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings (blake2b, double hashing)."""
+
+    __slots__ = ("capacity", "size", "hashes", "count", "_bits")
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(capacity, 1)
+        self.size = max(64, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key: str) -> None:
+        bits = self._bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class EmailFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._bloom: Optional[BloomFilter] = None  # None until the first load finishes
+        self._loading: Optional[BloomFilter] = None  # being filled by a (re)load
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._bloom is not None
+
+    def start(self) -> None:
+        """(Re)load in the background; signups meanwhile get a lookup each (or use the old filter)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._load_in_background())
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _load_in_background(self) -> None:
+        try:
+            await self.load()
+        except Exception:
+            pass  # logged by load(); the previous filter (or the lookups) stay in use
+
+    async def load(self) -> None:
+        """Build a filter from every users.email_normalized, streamed in batches, and swap it in."""
+        started = time.perf_counter()
+        try:
+            async with read_session() as db:
+                users = await db.scalar(select(func.count()).select_from(User))
+                bloom = self._loading = BloomFilter(max(self.capacity, 2 * users), self.error_rate)
+                result = await db.stream_scalars(
+                    select(User.email_normalized).execution_options(yield_per=EXPORT_YIELD_PER)
+                )
+                async for batch in result.partitions():
+                    for email in batch:
+                        bloom.add(email)
+        except Exception:
+            self._loading = None
+            logger.exception("Loading the signup email filter failed; signups look every email up instead")
+            raise
+        self._bloom, self._loading = bloom, None
+        FILTER_ENTRIES.set(bloom.count)
+        logger.info(
+            "Loaded signup email filter: %d emails, %d KiB, in %.2fs",
+            bloom.count,
+            bloom.size // 8192,
+            time.perf_counter() - started,
+        )
+
+    def add(self, email: str) -> None:
+        """Record a registered email (normalized)."""
+        for bloom in (self._bloom, self._loading):
+            if bloom is not None:
+                bloom.add(email)
+        if self._bloom is not None:
+            FILTER_ENTRIES.set(self._bloom.count)
+            if self._bloom.count > self._bloom.capacity and self._loading is None:
+                logger.info("Signup email filter is over capacity (%d emails), rebuilding", self._bloom.count)
+                self.start()
+
+    def might_contain(self, email: str) -> bool:
+        return self._bloom is None or email in self._bloom
+
+    async def is_registered(self, db: AsyncSession, email: str) -> bool:
+        """Whether a user with this (normalized) email exists; queries only on a filter hit."""
+        if not self.might_contain(email):
+            EMAIL_CHECKS.inc(result="new")
+            return False
+        found = await db.scalar(select(User.id).where(User.email_normalized == email))
+        EMAIL_CHECKS.inc(result="duplicate" if found is not None else "lookup_new")
+        return found is not None
+
+
+# None when disabled: signups hash first and rely on the unique index alone
+registered_emails: Optional[EmailFilter] = (
+    EmailFilter(SIGNUP_EMAIL_FILTER_CAPACITY, SIGNUP_EMAIL_FILTER_ERROR_RATE) if SIGNUP_EMAIL_FILTER_ENABLED else None
+)
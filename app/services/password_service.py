@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Optional
+
+from app.core.config import PASSWORD_HASH_MAX_CONCURRENCY, PASSWORD_HASH_WORKERS
+from app.core.metrics import Gauge, Histogram
+from app.utilities import password_utility
+
+logger = logging.getLogger(__name__)
+
+HASH_QUEUE_DEPTH = Gauge(
+    "password_hash_queue_depth", "Password hash/verify calls waiting for a worker slot"
+)
+HASH_IN_FLIGHT = Gauge("password_hash_in_flight", "Password hash/verify calls currently running")
+HASH_WAIT_SECONDS = Histogram(
+    "password_hash_wait_seconds", "Time spent waiting for a worker slot", ("op",)
+)
+HASH_SECONDS = Histogram(
+    "password_hash_seconds", "End-to-end latency of password hash/verify calls", ("op",)
+)
+
+_executor: Optional[Executor] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _get_executor() -> Optional[Executor]:
+    """
+    Lazily start the worker pool. Returns None when PASSWORD_HASH_WORKERS=0,
+    in which case the event loop's default thread pool is used.
+    """
+    global _executor
+    if _executor is None and PASSWORD_HASH_WORKERS > 0:
+        # spawn (not fork) so workers never inherit the parent's DB connections
+        _executor = ProcessPoolExecutor(
+            max_workers=PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        logger.info("Started password hash pool with %d workers", PASSWORD_HASH_WORKERS)
+    return _executor
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(PASSWORD_HASH_MAX_CONCURRENCY)
+    return _semaphore
+
+
+async def _run(op: str, fn: Callable, *args):
+    started = time.perf_counter()
+    HASH_QUEUE_DEPTH.inc()
+    queued = True
+    try:
+        async with _get_semaphore():
+            HASH_QUEUE_DEPTH.dec()
+            queued = False
+            HASH_WAIT_SECONDS.observe(time.perf_counter() - started, op=op)
+            HASH_IN_FLIGHT.inc()
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(_get_executor(), fn, *args)
+            finally:
+                HASH_IN_FLIGHT.dec()
+    finally:
+        if queued:
+            HASH_QUEUE_DEPTH.dec()
+        HASH_SECONDS.observe(time.perf_counter() - started, op=op)
+
+
+async def hash_password(password: str) -> str:
+    """Hash a plain password without blocking the event loop"""
+    return await _run("hash", password_utility.hash_password, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a plain password against a hashed password without blocking the event loop"""
+    return await _run("verify", password_utility.verify_password, plain_password, hashed_password)
+
+
+def shutdown() -> None:
+    """Stop the worker pool; called from the app lifespan on shutdown."""
+    global _executor, _semaphore
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    _semaphore = None
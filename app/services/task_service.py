@@ -1,29 +1,119 @@
 import logging
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import delete, func, insert, select, tuple_, update
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 from fastapi import HTTPException, status
 
-from app.models.task import Task
-from app.schemas.task import TaskCreate, TaskUpdate
+from app.core import change_feed
+from app.core.cache import cache
+from app.core.config import DEFAULT_PAGE_SIZE, EXPORT_YIELD_PER
+from app.db.partitions import load_archived_task, restore_archived_tasks, stream_archived_tasks
+from app.db.search import render_snippet, search_statement
+from app.models.task import Task, content_columns
+from app.models.user_task_stats import UserTaskStats
+from app.schemas.task import (
+    TaskBatchUpdateItem,
+    TaskCreate,
+    TaskRead,
+    TaskSearchHit,
+    TaskStats,
+    TaskSummary,
+    TaskUpdate,
+)
+from app.services import write_coalescer
 
 from app.utilities.create_utility import schema_to_dict
+from app.utilities.etag_utility import matches_if_match, task_etag
+from app.utilities.pagination_utility import decode_cursor, encode_cursor, split_page
+from app.utilities.response_utility import row_dicts
 
 
 logger = logging.getLogger(__name__)
 
+# Columns selected for summary listings: never content itself
+_SUMMARY_COLUMNS = (
+    Task.id, Task.user_id, Task.name, Task.content_length, Task.content_preview, Task.created_at, Task.updated_at
+)
 
-async def create_task(db: AsyncSession, payload: TaskCreate) -> Task:
+
+def _changed_fields(payload: TaskUpdate) -> dict:
+    data = payload.model_dump(exclude_unset=True) if hasattr(payload, "model_dump") else payload.dict(exclude_unset=True)
+    data.pop("id", None)
+    return data
+
+
+def _owned(stmt, owner_id: Optional[int]):
+    """Restrict a statement to one user's tasks (owner_id=None: no restriction)."""
+    return stmt if owner_id is None else stmt.where(Task.user_id == owner_id)
+
+
+def _column_values(data: dict) -> dict:
+    """Map a `content` field onto the columns that store it (see content_columns)."""
+    if "content" not in data:
+        return data
+    data = dict(data)
+    content = data.pop("content")
+    return {**data, **content_columns(content)}
+
+
+# ----------------------------
+# Read-through cache: one entry per task and one per listing page. Keys embed a
+# generation that every write bumps (per task, and per user for listings), so a
+# load that raced a write stores its stale result under a key nobody reads again.
+# ----------------------------
+def _task_generation_key(task_id: int) -> str:
+    return f"task:{task_id}:gen"
+
+
+def _listing_generation_key(user_id: int) -> str:
+    return f"tasks:user:{user_id}:gen"
+
+
+def _to_cached(task: Task) -> dict:
+    return TaskRead.model_validate(task).model_dump(mode="json")
+
+
+async def _invalidate(task_ids: Iterable[int] = (), user_ids: Iterable[int] = ()) -> None:
+    """Drop cached entries after a committed write."""
+    try:
+        await cache.incr_many([_task_generation_key(task_id) for task_id in task_ids], cache.default_ttl)
+        for user_id in set(user_ids):
+            await cache.incr(_listing_generation_key(user_id))
+    except Exception as e:
+        # anything left behind expires after CACHE_TTL_SECONDS
+        logger.error("Cache invalidation failed: %s", str(e))
+
+
+async def _publish(kind: str, tasks: Iterable[Task | TaskRead]) -> None:
+    """Push committed changes to change feed subscribers (never raises)."""
+    await change_feed.publish(kind, [(task.user_id, task.id, task.updated_at) for task in tasks])
+
+
+async def create_task(db: AsyncSession, payload: TaskCreate, user_id: int) -> Task | TaskRead:
     data = schema_to_dict(payload)
+    if write_coalescer.coalescer is not None:
+        # group commit: shares a transaction with concurrent writes; db is not used
+        try:
+            task = await write_coalescer.coalescer.insert({**_column_values(data), "user_id": user_id})
+        except SQLAlchemyError as e:
+            logger.error("DB error creating task: %s", str(e))
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to create task",
+            )
+        await _invalidate(user_ids=[user_id])
+        await _publish(change_feed.CREATED, [task])
+        return task
 
-    task = Task(**data)
+    task = Task(user_id=user_id, **data)
     try:
         db.add(task)
+        # eager_defaults: the INSERT returns id/timestamps, no refresh round-trip needed
         await db.commit()
-        await db.refresh(task)
-        return task
     except SQLAlchemyError as e:
         await db.rollback()
         logger.error("DB error creating task: %s", str(e))
@@ -31,42 +121,328 @@ async def create_task(db: AsyncSession, payload: TaskCreate) -> Task:
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to create task",
         )
+    await _invalidate(user_ids=[user_id])
+    await _publish(change_feed.CREATED, [task])
+    return task
+
 
+async def get_task(db: AsyncSession, task_id: int, owner_id: Optional[int] = None) -> TaskRead:
+    """
+    One task, through the read cache. With owner_id, another user's task is
+    reported as not found rather than forbidden, so ids can't be probed.
+    Tasks moved to the archive (Postgres, see app.db.partitions) are found there.
+    """
+    async def load() -> Optional[dict]:
+        task = await db.get(Task, task_id)
+        if task is not None:
+            return _to_cached(task)
+        archived = await load_archived_task(db, task_id)
+        return TaskRead.model_validate(archived).model_dump(mode="json") if archived else None
 
-async def get_task(db: AsyncSession, task_id: int) -> Task:
-    task = await db.get(Task, task_id)
-    if not task:
+    try:
+        generation = await cache.generation(_task_generation_key(task_id), cache.default_ttl)
+    except Exception as e:
+        logger.warning("Cache unavailable, loading task uncached: %s", str(e))
+        data = await load()
+    else:
+        data = await cache.get_or_load(f"task:{task_id}:g{generation}", load)
+    if data is None or (owner_id is not None and data["user_id"] != owner_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
-    return task
+    return TaskRead.model_validate(data)
 
 
 async def list_tasks(
-    db: AsyncSession, user_id: Optional[int] = None, skip: int = 0, limit: int = 100
-) -> List[Task]:
-    if user_id is not None:
-        stmt = select(Task).where(Task.user_id == user_id).order_by(Task.id).offset(skip).limit(limit)
+    db: AsyncSession,
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    summary: bool = False,
+    etag: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Keyset-paginated listing of a user's tasks, ordered by id. Seeks on the
+    (user_id, id) index so every page is a range scan regardless of depth.
+    Returns the page and the cursor for the next one (None on the last page).
+    Items are TaskRead-shaped JSON dicts, straight from the cache: they were
+    validated when the page was loaded and are not validated again.
+
+    With summary=True the items are TaskSummary-shaped: content is never read
+    from the database, only its length and a short preview computed there.
+
+    etag is the listing ETag the page will be served with, read before this
+    call. It is part of the cache key, so a page cached before the listing
+    reached that version is never served under it.
+    """
+    schema = TaskSummary if summary else TaskRead
+    after_id = None
+    if cursor is not None:
+        try:
+            position = decode_cursor(cursor)
+            if position.get("user_id") != user_id:
+                raise ValueError("Cursor belongs to a different listing")
+            after_id = int(position["id"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    async def load() -> dict:
+        stmt = select(Task).where(Task.user_id == user_id)
+        if summary:
+            stmt = stmt.options(load_only(*_SUMMARY_COLUMNS))
+        if after_id is not None:
+            stmt = stmt.where(Task.id > after_id)
+        stmt = stmt.order_by(Task.id).limit(limit + 1)
+        try:
+            result = await db.execute(stmt)
+            tasks, last = split_page(result.scalars().all(), limit)
+        except SQLAlchemyError as e:
+            logger.error("DB error listing tasks: %s", str(e))
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to list tasks",
+            )
+        next_cursor = encode_cursor(user_id=user_id, id=last.id) if last is not None else None
+        items = [schema.model_validate(t).model_dump(mode="json") for t in tasks]
+        return {"items": items, "next_cursor": next_cursor}
+
+    try:
+        generation = await cache.generation(_listing_generation_key(user_id))
+    except Exception as e:
+        logger.warning("Cache unavailable, listing tasks uncached: %s", str(e))
+        page = await load()
+    else:
+        view = "summary" if summary else "full"
+        key = f"tasks:user:{user_id}:g{generation}:{etag}:{view}:{after_id}:{limit}"
+        page = await cache.get_or_load(key, load)
+    return page["items"], page["next_cursor"]
+
+
+async def listing_version(db: AsyncSession, user_id: int) -> Tuple[int, Optional[datetime], int, int]:
+    """
+    Row count, newest updated_at, highest id and sum of versions of a user's
+    tasks. Every update bumps a version and every insert raises the highest id
+    (ids only grow), so any write changes one of them even when it lands in the
+    same second as the last (updated_at has one-second precision on SQLite,
+    and a concurrent transaction may commit with an earlier now()). An
+    index-only scan of (user_id, updated_at, id, version).
+    """
+    try:
+        stmt = select(
+            func.count(), func.max(Task.updated_at), func.max(Task.id), func.sum(Task.version)
+        ).where(Task.user_id == user_id)
+        count, last_updated_at, last_id, versions = (await db.execute(stmt)).one()
+    except SQLAlchemyError as e:
+        logger.error("DB error reading task listing version: %s", str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to list tasks",
+        )
+    return count, last_updated_at, last_id or 0, versions or 0
+
+
+async def get_task_stats(db: AsyncSession, user_id: int) -> TaskStats:
+    """
+    Task count, total content length and last write time of a user: one
+    primary-key lookup of the trigger-maintained user_task_stats row.
+    """
+    try:
+        stats = await db.get(UserTaskStats, user_id)
+    except SQLAlchemyError as e:
+        logger.error("DB error reading task stats: %s", str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to read task stats",
+        )
+    # no row yet: the user has never had a task
+    return TaskStats.model_validate(stats) if stats is not None else TaskStats(user_id=user_id)
+
+
+async def list_changed_tasks(
+    db: AsyncSession,
+    user_id: int,
+    since: datetime,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    summary: bool = False,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Delta sync: a user's tasks created or updated at or after `since`, oldest
+    change first, keyset-paginated on (updated_at, id). Clients pass the newest
+    updated_at they have seen as the next `since`; the boundary is inclusive so
+    nothing written in the same instant is skipped (those rows come back again).
+    Deleted tasks are not reported. Items are TaskRead/TaskSummary-shaped dicts.
+    """
+    schema = TaskSummary if summary else TaskRead
+    since = since.astimezone(timezone.utc) if since.tzinfo else since.replace(tzinfo=timezone.utc)
+    stmt = select(Task).where(Task.user_id == user_id)
+    if summary:
+        stmt = stmt.options(load_only(*_SUMMARY_COLUMNS))
+    if cursor is not None:
+        try:
+            position = decode_cursor(cursor)
+            if position.get("user_id") != user_id:
+                raise ValueError("Cursor belongs to a different listing")
+            after = (datetime.fromisoformat(position["updated_at"]), int(position["id"]))
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        stmt = stmt.where(tuple_(Task.updated_at, Task.id) > after)
+    else:
+        stmt = stmt.where(Task.updated_at >= since)
+    stmt = stmt.order_by(Task.updated_at, Task.id).limit(limit + 1)
     try:
         result = await db.execute(stmt)
-        return result.scalars().all()
+        tasks, last = split_page(result.scalars().all(), limit)
     except SQLAlchemyError as e:
-        logger.error("DB error listing tasks: %s", str(e))
+        logger.error("DB error listing changed tasks: %s", str(e))
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to list tasks",
         )
+    next_cursor = (
+        encode_cursor(user_id=user_id, updated_at=last.updated_at.isoformat(), id=last.id)
+        if last is not None
+        else None
+    )
+    return row_dicts(tasks, schema), next_cursor
 
 
-async def update_task(db: AsyncSession, task_id: int, payload: TaskUpdate) -> Task:
-    task = await get_task(db, task_id)
-    data = payload.model_dump(exclude_unset=True) if hasattr(payload, "model_dump") else payload.dict(exclude_unset=True)
+async def search_tasks(
+    db: AsyncSession, user_id: int, q: str, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+) -> Tuple[List[TaskSearchHit], Optional[str]]:
+    """
+    Ranked full-text search over a user's task names and contents, best match
+    first, with HTML-escaped snippets. Pages with a (rank, id) keyset cursor.
+    """
+    after = None
+    if cursor is not None:
+        try:
+            position = decode_cursor(cursor)
+            if position.get("user_id") != user_id or position.get("q") != q:
+                raise ValueError("Cursor belongs to a different search")
+            after = (float(position["rank"]), int(position["id"]))
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    stmt = search_statement(db.get_bind().dialect.name, user_id, q, limit + 1, after)
+    if stmt is None:
+        return [], None
+    try:
+        result = await db.execute(stmt)
+        rows, last = split_page(result.mappings().all(), limit)
+    except SQLAlchemyError as e:
+        logger.error("DB error searching tasks: %s", str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to search tasks",
+        )
+    next_cursor = (
+        encode_cursor(user_id=user_id, q=q, rank=last["rank"], id=last["id"]) if last is not None else None
+    )
+    hits = [TaskSearchHit.model_validate({**row, "snippet": render_snippet(row["snippet"])}) for row in rows]
+    return hits, next_cursor
 
-    for field, value in data.items():
-        setattr(task, field, value)
 
+async def stream_tasks(
+    db: AsyncSession, user_id: int, batch_size: int = EXPORT_YIELD_PER
+) -> AsyncIterator[Sequence[Task | dict]]:
+    """
+    Yield all of a user's tasks, batch_size rows at a time, through server-side
+    cursors so memory stays flat regardless of how many tasks exist: first the
+    archived ones (as TaskRead dicts), then the live ones, each in id order.
+    """
+    async for batch in stream_archived_tasks(db, user_id, batch_size):
+        yield batch
+    stmt = (
+        select(Task)
+        .where(Task.user_id == user_id)
+        .order_by(Task.id)
+        .execution_options(yield_per=batch_size)
+    )
+    result = await db.stream_scalars(stmt)
+    async for batch in result.partitions():
+        yield batch
+
+
+async def _check_if_match(db: AsyncSession, task_id: int, if_match: str, owner_id: Optional[int]) -> None:
+    """
+    Optimistic concurrency: lock the row and raise 412 unless its current ETag
+    satisfies If-Match. The lock is held until the caller's UPDATE commits. An
+    archived task is moved back into tasks first, in the same transaction.
+    """
     try:
-        await db.commit()
-        await db.refresh(task)
+        stmt = _owned(select(Task.version).where(Task.id == task_id), owner_id).with_for_update()
+        version = await db.scalar(stmt)
+        if version is None and await restore_archived_tasks(db, [task_id], owner_id):
+            version = await db.scalar(stmt)
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error("DB error updating task: %s", str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to update task",
+        )
+    if version is None:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    if not matches_if_match(if_match, task_etag(task_id, version)):
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Task was modified since it was read",
+        )
+
+
+async def update_task(
+    db: AsyncSession,
+    task_id: int,
+    payload: TaskUpdate,
+    if_match: Optional[str] = None,
+    owner_id: Optional[int] = None,
+) -> Task | TaskRead:
+    """
+    Apply a partial update. With if_match (the If-Match header) the update only
+    happens while the task is still at that version; otherwise 412. With
+    owner_id, other users' tasks are not found. Archived tasks are moved back
+    into tasks and updated there.
+    """
+    data = _changed_fields(payload)
+    if not data:
+        task = await get_task(db, task_id, owner_id)
+        if not matches_if_match(if_match, task_etag(task.id, task.version)):
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Task was modified since it was read",
+            )
         return task
+    if if_match is not None:
+        await _check_if_match(db, task_id, if_match, owner_id)
+    elif write_coalescer.coalescer is not None:
+        # group commit (If-Match needs its row lock in our own transaction, so it never coalesces)
+        try:
+            task = await write_coalescer.coalescer.update(task_id, _column_values(data), owner_id)
+        except SQLAlchemyError as e:
+            logger.error("DB error updating task: %s", str(e))
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to update task",
+            )
+        if task is not None:
+            await _invalidate([task.id], [task.user_id])
+            await _publish(change_feed.UPDATED, [task])
+            return task
+        # not found, or archived: the UPDATE below restores it
+
+    # Single UPDATE ... RETURNING: no prior SELECT, no refresh afterwards
+    stmt = (
+        _owned(update(Task).where(Task.id == task_id), owner_id)
+        .values(**_column_values(data))
+        .returning(Task)
+        .execution_options(populate_existing=True)
+    )
+    try:
+        task = (await db.scalars(stmt)).one_or_none()
+        if task is None and await restore_archived_tasks(db, [task_id], owner_id):
+            task = (await db.scalars(stmt)).one_or_none()
+        await db.commit()
     except SQLAlchemyError as e:
         await db.rollback()
         logger.error("DB error updating task: %s", str(e))
@@ -74,12 +450,20 @@ async def update_task(db: AsyncSession, task_id: int, payload: TaskUpdate) -> Ta
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to update task",
         )
+    if task is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    await _invalidate([task.id], [task.user_id])
+    await _publish(change_feed.UPDATED, [task])
+    return task
 
 
-async def delete_task(db: AsyncSession, task_id: int) -> None:
-    task = await get_task(db, task_id)
+async def delete_task(db: AsyncSession, task_id: int, owner_id: Optional[int] = None) -> None:
+    # DELETE ... RETURNING id doubles as the existence (and ownership) check
+    stmt = _owned(delete(Task).where(Task.id == task_id), owner_id).returning(Task.id, Task.user_id)
     try:
-        await db.delete(task)
+        deleted = (await db.execute(stmt)).one_or_none()
+        if deleted is None and await restore_archived_tasks(db, [task_id], owner_id):
+            deleted = (await db.execute(stmt)).one_or_none()
         await db.commit()
     except SQLAlchemyError as e:
         await db.rollback()
@@ -87,4 +471,103 @@ async def delete_task(db: AsyncSession, task_id: int) -> None:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to delete task",
-        )
\ No newline at end of file
+        )
+    if deleted is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    await _invalidate([deleted.id], [deleted.user_id])
+    await change_feed.publish(change_feed.DELETED, [(deleted.user_id, deleted.id, None)])
+
+
+# ----------------------------
+# Batch writes: one transaction per batch
+# ----------------------------
+async def create_tasks(db: AsyncSession, user_id: int, payloads: Sequence[TaskCreate]) -> List[Task]:
+    """
+    Insert all payloads for user_id with a single multi-row INSERT ... RETURNING.
+    Returned tasks are in the same order as payloads.
+    """
+    rows = [{**_column_values(schema_to_dict(p)), "user_id": user_id} for p in payloads]
+    try:
+        result = await db.scalars(insert(Task).returning(Task, sort_by_parameter_order=True), rows)
+        tasks = result.all()
+        await db.commit()
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error("DB error batch-creating tasks: %s", str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to create tasks",
+        )
+    await _invalidate(user_ids=[user_id])
+    await _publish(change_feed.CREATED, tasks)
+    return tasks
+
+
+async def update_tasks(
+    db: AsyncSession, items: Sequence[TaskBatchUpdateItem], owner_id: Optional[int] = None
+) -> Dict[int, Task]:
+    """
+    Apply partial updates to many tasks in one transaction (executemany UPDATE by id).
+    Returns the updated tasks keyed by id; ids missing from the result were not
+    found (or, with owner_id, belong to someone else). Archived tasks are
+    restored first, in the same transaction.
+    """
+    ids = [item.id for item in items]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Duplicate task ids in batch"
+        )
+    try:
+        existing = set((await db.scalars(_owned(select(Task.id).where(Task.id.in_(ids)), owner_id))).all())
+        if len(existing) < len(ids):
+            existing |= await restore_archived_tasks(db, set(ids) - existing, owner_id)
+        changes = [
+            {"id": item.id, **_column_values(fields)}
+            for item in items
+            if item.id in existing and (fields := _changed_fields(item))
+        ]
+        if changes:
+            await db.execute(update(Task), changes)
+        result = await db.scalars(
+            select(Task).where(Task.id.in_(existing)).execution_options(populate_existing=True)
+        )
+        tasks = {task.id: task for task in result}
+        await db.commit()
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error("DB error batch-updating tasks: %s", str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to update tasks",
+        )
+    await _invalidate(tasks.keys(), (task.user_id for task in tasks.values()))
+    # only the tasks that had changes; unchanged items are returned but not announced
+    changed = {change["id"] for change in changes}
+    await _publish(change_feed.UPDATED, [task for task in tasks.values() if task.id in changed])
+    return tasks
+
+
+async def delete_tasks(db: AsyncSession, ids: Sequence[int], owner_id: Optional[int] = None) -> Set[int]:
+    """
+    Delete many tasks with a single DELETE ... RETURNING id; returns the ids that
+    existed (and, with owner_id, belonged to that user). Archived tasks are
+    restored and deleted by a second DELETE in the same transaction.
+    """
+    try:
+        stmt = _owned(delete(Task).where(Task.id.in_(ids)), owner_id).returning(Task.id, Task.user_id)
+        rows = (await db.execute(stmt)).all()
+        missing = set(ids) - {row.id for row in rows}
+        if missing and (restored := await restore_archived_tasks(db, missing, owner_id)):
+            stmt = delete(Task).where(Task.id.in_(restored)).returning(Task.id, Task.user_id)
+            rows += (await db.execute(stmt)).all()
+        await db.commit()
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error("DB error batch-deleting tasks: %s", str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to delete tasks",
+        )
+    await _invalidate([row.id for row in rows], [row.user_id for row in rows])
+    await change_feed.publish(change_feed.DELETED, [(row.user_id, row.id, None) for row in rows])
+    return {row.id for row in rows}
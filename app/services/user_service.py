@@ -1,37 +1,62 @@
 import logging
-from typing import List
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
 
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.user import User
+from app.core.config import DEFAULT_PAGE_SIZE, EXPORT_YIELD_PER
+from app.models.user import User, normalize_email
 from app.schemas.user import UserCreate
+from app.services import email_filter, password_service
 from app.utilities.create_utility import schema_to_dict
-from app.utilities.password_utility import hash_password  # ensure this exists
+from app.utilities.pagination_utility import decode_cursor, encode_cursor, split_page
 
 logger = logging.getLogger(__name__)
 
+
+class EmailAlreadyRegistered(Exception):
+    """The signup's email is taken; detected before hashing the password."""
+
+
 async def create_user(db: AsyncSession, user: UserCreate) -> User:
     """
-    Create a new user; hashes password, commits, refreshes, returns instance.
-    Raises IntegrityError upward for router to translate, or re-raises other DB errors.
+    Create a new user; hashes password (off the event loop), commits, returns instance.
+    Raises EmailAlreadyRegistered for a known email before any hashing, and
+    IntegrityError upward for router to translate (a duplicate the email filter
+    could not know about), or re-raises other DB errors.
     """
+    email = normalize_email(user.email)
+    registered_emails = email_filter.registered_emails
+    if registered_emails is not None:
+        try:
+            if await registered_emails.is_registered(db, email):
+                logger.info("Signup rejected before hashing, email already registered")
+                raise EmailAlreadyRegistered(email)
+        finally:
+            # end the lookup's transaction: no pooled connection is held while bcrypt runs
+            await db.rollback()
+
     data = schema_to_dict(user)
-    # Ensure password is hashed here (centralized)
-    data["password"] = hash_password(data["password"])
+    # Ensure password is hashed here (centralized) -- callers pass the plain password
+    data["password"] = await password_service.hash_password(data["password"])
 
     new_user = User(**data)
 
     try:
         db.add(new_user)
+        # the INSERT populates the primary key; no refresh SELECT needed
         await db.commit()
-        await db.refresh(new_user)
         logger.info("User created: email=%s id=%s", new_user.email, new_user.id)
+        if registered_emails is not None:
+            registered_emails.add(email)
         return new_user
     except IntegrityError:
         await db.rollback()
         logger.warning("Integrity error creating user: email=%s", data.get("email"))
+        if registered_emails is not None:
+            # most likely registered through another worker: turn the next retry away early
+            registered_emails.add(email)
         raise
     except SQLAlchemyError as e:
         await db.rollback()
@@ -43,18 +68,41 @@ async def create_user(db: AsyncSession, user: UserCreate) -> User:
         raise
 
 
-async def get_users(db: AsyncSession) -> List[User]:
+async def get_users(
+    db: AsyncSession, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+) -> Tuple[List[User], Optional[str]]:
     """
-    Return all users.
+    Return one keyset-paginated page of users (ordered by id) and the next cursor.
+    Raises ValueError for a malformed cursor.
     """
+    stmt = select(User)
+    if cursor is not None:
+        try:
+            after_id = int(decode_cursor(cursor)["id"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+        stmt = stmt.where(User.id > after_id)
+    stmt = stmt.order_by(User.id).limit(limit + 1)
     try:
-        result = await db.execute(select(User))
-        users = result.scalars().all()
+        result = await db.execute(stmt)
+        users, last = split_page(result.scalars().all(), limit)
         logger.info("Fetched %d users", len(users))
-        return users
+        return users, (encode_cursor(id=last.id) if last is not None else None)
     except SQLAlchemyError as e:
         logger.error("Database error fetching users: %s", str(e))
         raise
     except Exception:
         logger.exception("Unexpected error fetching users")
-        raise
\ No newline at end of file
+        raise
+
+
+async def stream_users(
+    db: AsyncSession, batch_size: int = EXPORT_YIELD_PER
+) -> AsyncIterator[Sequence[User]]:
+    """
+    Yield every user in id order, batch_size rows at a time, via a server-side cursor.
+    """
+    stmt = select(User).order_by(User.id).execution_options(yield_per=batch_size)
+    result = await db.stream_scalars(stmt)
+    async for batch in result.partitions():
+        yield batch
@@ -0,0 +1,183 @@
+"""
+Group commit for single-task writes.
+
+Each create_task / update_task normally runs (and commits) its own
+transaction, so write throughput is bounded by commit latency (an fsync on
+the database). With WRITE_COALESCING_ENABLED, task_service hands those writes
+to a WriteCoalescer instead: writes submitted within WRITE_COALESCE_WINDOW_MS
+of each other (or WRITE_COALESCE_MAX_BATCH of them) are applied in one
+transaction with one commit. All inserts of a batch go out as a single
+multi-row INSERT ... RETURNING.
+
+Each caller still gets its own outcome. If the batch fails, it is replayed in
+a new transaction with a SAVEPOINT around every write, so a bad row fails only
+its own caller and the rest still commit together.
+
+Writes of one batch are committed together, so none of their callers sees
+success before all of them are durable.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import insert, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import WRITE_COALESCE_MAX_BATCH, WRITE_COALESCE_WINDOW_MS, WRITE_COALESCING_ENABLED
+from app.core.metrics import Counter, Histogram
+from app.db.session import async_session
+from app.models.task import Task
+from app.schemas.task import TaskRead
+
+logger = logging.getLogger(__name__)
+
+COALESCED_BATCH_SIZE = Histogram(
+    "write_coalescer_batch_size",
+    "Writes committed per coalesced transaction",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+COALESCED_COMMITS = Counter(
+    "write_coalescer_commits_total", "Coalesced transactions by result (ok, replayed, failed)", ("result",)
+)
+
+INSERT, UPDATE = "insert", "update"
+
+
+class _Write:
+    __slots__ = ("kind", "values", "task_id", "owner_id", "future")
+
+    def __init__(self, kind: str, values: Dict[str, Any], task_id: Optional[int], owner_id: Optional[int]):
+        self.kind = kind
+        self.values = values
+        self.task_id = task_id
+        self.owner_id = owner_id
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class WriteCoalescer:
+    """Collects task writes for up to `window` seconds and commits them as one transaction."""
+
+    def __init__(self, window: float, max_batch: int, session_factory=async_session):
+        self.window = window
+        self.max_batch = max_batch
+        self._session_factory = session_factory
+        self._pending: List[_Write] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushing: Set[asyncio.Task] = set()
+
+    async def insert(self, values: Dict[str, Any]) -> TaskRead:
+        """INSERT one task (column values, incl. user_id); resolves to the created task."""
+        return await self._submit(_Write(INSERT, values, None, None))
+
+    async def update(self, task_id: int, values: Dict[str, Any], owner_id: Optional[int] = None) -> Optional[TaskRead]:
+        """UPDATE one task; resolves to the updated task, or None if it was not found."""
+        return await self._submit(_Write(UPDATE, values, task_id, owner_id))
+
+    async def _submit(self, write: _Write):
+        self._pending.append(write)
+        if len(self._pending) >= self.max_batch:
+            self._flush_now()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush_now)
+        # shielded: a caller that goes away must not cancel the write for the whole batch
+        return await asyncio.shield(write.future)
+
+    def _flush_now(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._flush(batch))
+            self._flushing.add(task)
+            task.add_done_callback(self._flushing.discard)
+
+    async def drain(self) -> None:
+        """Flush whatever is pending and wait for in-flight batches (called on shutdown)."""
+        self._flush_now()
+        if self._flushing:
+            await asyncio.gather(*self._flushing, return_exceptions=True)
+
+    async def _flush(self, batch: List[_Write]) -> None:
+        COALESCED_BATCH_SIZE.observe(len(batch))
+        async with self._session_factory() as db:
+            try:
+                outcomes = await self._apply(db, batch)
+                await db.commit()
+                COALESCED_COMMITS.inc(result="ok")
+            except SQLAlchemyError as e:
+                await db.rollback()
+                if len(batch) == 1:
+                    outcomes = [e]
+                    COALESCED_COMMITS.inc(result="failed")
+                else:
+                    # the error text is not logged: it carries the rows' parameters (note content)
+                    logger.warning(
+                        "Coalesced batch of %d writes failed (%s); replaying one by one", len(batch), type(e).__name__
+                    )
+                    outcomes = await self._replay(db, batch)
+            except Exception as e:
+                await db.rollback()
+                outcomes = [e] * len(batch)
+                COALESCED_COMMITS.inc(result="failed")
+        for write, outcome in zip(batch, outcomes):
+            if write.future.done():
+                continue
+            if isinstance(outcome, Exception):
+                write.future.set_exception(outcome)
+            else:
+                write.future.set_result(outcome)
+
+    async def _apply(self, db: AsyncSession, batch: List[_Write]) -> List[Any]:
+        """Fast path: one multi-row INSERT for every insert, one UPDATE per update."""
+        outcomes: List[Any] = [None] * len(batch)
+        inserts = [i for i, w in enumerate(batch) if w.kind == INSERT]
+        if inserts:
+            created = await db.scalars(
+                insert(Task).returning(Task, sort_by_parameter_order=True), [batch[i].values for i in inserts]
+            )
+            for i, task in zip(inserts, created.all()):
+                outcomes[i] = TaskRead.model_validate(task)
+        for i, write in enumerate(batch):
+            if write.kind == UPDATE:
+                outcomes[i] = await self._update(db, write)
+        return outcomes
+
+    async def _replay(self, db: AsyncSession, batch: List[_Write]) -> List[Any]:
+        """Slow path: every write in its own SAVEPOINT, so failures stay per caller."""
+        outcomes: List[Any] = []
+        try:
+            for write in batch:
+                try:
+                    async with db.begin_nested():
+                        if write.kind == INSERT:
+                            task = await db.scalar(insert(Task).returning(Task), write.values)
+                            outcome = TaskRead.model_validate(task)
+                        else:
+                            outcome = await self._update(db, write)
+                except SQLAlchemyError as e:
+                    outcome = e
+                outcomes.append(outcome)
+            await db.commit()
+            COALESCED_COMMITS.inc(result="replayed")
+        except SQLAlchemyError as e:
+            await db.rollback()
+            COALESCED_COMMITS.inc(result="failed")
+            return [e] * len(batch)
+        return outcomes
+
+    @staticmethod
+    async def _update(db: AsyncSession, write: _Write) -> Optional[TaskRead]:
+        stmt = update(Task).where(Task.id == write.task_id)
+        if write.owner_id is not None:
+            stmt = stmt.where(Task.user_id == write.owner_id)
+        stmt = stmt.values(**write.values).returning(Task).execution_options(populate_existing=True)
+        task = (await db.scalars(stmt)).one_or_none()
+        # snapshot now: a later update of the same task in this batch refreshes the same object
+        return TaskRead.model_validate(task) if task is not None else None
+
+
+coalescer: Optional[WriteCoalescer] = (
+    WriteCoalescer(WRITE_COALESCE_WINDOW_MS / 1000, WRITE_COALESCE_MAX_BATCH) if WRITE_COALESCING_ENABLED else None
+)
@@ -0,0 +1,61 @@
+import hashlib
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+
+def _micros(moment: datetime) -> int:
+    # naive timestamps (SQLite) are stored in UTC
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1_000_000)
+
+
+def task_etag(task_id: int, version: int) -> str:
+    """
+    Strong ETag for one task: changes whenever the task is written (version is
+    bumped by every UPDATE).
+    """
+    return f'"{task_id}-v{version}"'
+
+
+def listing_etag(
+    count: int, last_updated_at: Optional[datetime], last_id: int, versions: int, *variant: Any
+) -> str:
+    """
+    ETag for a listing, from the row count, newest updated_at, highest id and
+    sum of task versions of the whole set (task_service.listing_version: any
+    insert, update or delete changes one of them) plus whatever else shapes the
+    response (cursor, limit, view...).
+    """
+    updated = _micros(last_updated_at) if last_updated_at is not None else 0
+    raw = "|".join(str(part) for part in (count, updated, last_id, versions, *variant))
+    return f'"{hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()}"'
+
+
+def _tags(header: str):
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def matches_if_none_match(header: Optional[str], etag: str) -> bool:
+    """
+    True when an If-None-Match header matches etag, i.e. the client's copy is
+    current and a 304 can be sent. Uses weak comparison, as RFC 9110 requires.
+    """
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.removeprefix("W/") == bare for tag in _tags(header))
+
+
+def matches_if_match(header: Optional[str], etag: str) -> bool:
+    """
+    True when an If-Match header allows a write to the resource tagged etag.
+    Uses strong comparison: weak tags never match.
+    """
+    if header is None:
+        return True
+    if header.strip() == "*":
+        return True
+    return etag in _tags(header)
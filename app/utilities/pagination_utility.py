@@ -0,0 +1,34 @@
+import base64
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+def encode_cursor(**position: Any) -> str:
+    """
+    Encode a keyset position (e.g. the last id of a page) as an opaque, URL-safe cursor.
+    """
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Decode a cursor produced by encode_cursor. Raises ValueError if it is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(position, dict):
+        raise ValueError("Invalid cursor")
+    return position
+
+
+def split_page(rows: Sequence[Any], limit: int) -> Tuple[List[Any], Optional[Any]]:
+    """
+    Given up to limit + 1 rows, return the page and the last row of the page when
+    another page follows (None otherwise).
+    """
+    page = list(rows[:limit])
+    return page, (page[-1] if len(rows) > limit else None)
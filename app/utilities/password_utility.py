@@ -3,10 +3,13 @@ from passlib.context import CryptContext
 # Create password context for hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# NOTE: these are blocking (bcrypt is CPU-bound by design). Async code should go
+# through app.services.password_service, which runs them in a worker pool.
+
 def hash_password(password: str) -> str:
     """Hash a plain password"""
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password"""
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return pwd_context.verify(plain_password, hashed_password)
@@ -0,0 +1,39 @@
+import logging
+from typing import AsyncIterator, Callable, Sequence, Type
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import read_session
+from app.utilities.response_utility import dump_json, row_dict
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def _ndjson_lines(
+    stream: Callable[[AsyncSession], AsyncIterator[Sequence[object]]], schema: Type[BaseModel]
+) -> AsyncIterator[bytes]:
+    # The request-scoped session from get_db is closed before a StreamingResponse
+    # body runs, so the stream owns a (read replica) session for its whole lifetime.
+    async with read_session() as db:
+        try:
+            async for batch in stream(db):
+                # rows straight from our own database: no model_validate round trip
+                yield b"".join(dump_json(row_dict(row, schema)) + b"\n" for row in batch)
+        except Exception:
+            # headers are already sent; all we can do is log and cut the stream short
+            logger.exception("Error while streaming %s export", schema.__name__)
+            raise
+
+
+def ndjson_response(
+    stream: Callable[[AsyncSession], AsyncIterator[Sequence[object]]], schema: Type[BaseModel]
+) -> StreamingResponse:
+    """
+    Stream batches of ORM rows as newline-delimited JSON, one `schema` object per line.
+    Only one batch is held in memory at a time.
+    """
+    return StreamingResponse(_ndjson_lines(stream, schema), media_type=NDJSON_MEDIA_TYPE)
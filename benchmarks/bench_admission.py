@@ -0,0 +1,91 @@
+"""
+Latency of admitted requests at 2x saturation, with and without admission control.
+
+    python -m benchmarks.bench_admission --limit 4 --duration 5
+
+The connection pool is shrunk to --limit connections, so --limit concurrent
+readers of GET /users/{user_id}/tasks saturate it. Three phases run:
+
+- saturated: --limit clients, admission limit --limit (nothing is shed)
+- 2x, no admission: 2 * --limit clients; the excess waits on the pool
+- 2x, admission: 2 * --limit clients, admission limit --limit and a queue of
+  --queue-size; the excess gets 503 and backs off for --backoff seconds
+
+Reported per phase: p50/p99 of the 200 responses, goodput (200s per second)
+and the number of 503s. With admission control the admitted p99 should stay
+close to the saturated one; without it, it grows with the overload.
+"""
+import argparse
+import os
+import sys
+
+_args = argparse.ArgumentParser(description=__doc__)
+_args.add_argument("--limit", type=int, default=4)
+_args.add_argument("--queue-size", type=int, default=2)
+_args.add_argument("--duration", type=float, default=5.0)
+_args.add_argument("--backoff", type=float, default=0.05)
+_args.add_argument("--tasks", type=int, default=200)
+ARGS = _args.parse_args()
+
+# the pool size is read at import time
+os.environ.setdefault("DB_POOL_SIZE", str(ARGS.limit))
+os.environ.setdefault("DB_MAX_OVERFLOW", "0")
+os.environ.setdefault("DB_POOL_TIMEOUT", "30")
+os.environ.setdefault("CACHE_BACKEND", "none")
+
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import time  # noqa: E402
+
+from benchmarks.common import client, reset_database, seed, summarize  # noqa: E402
+from app.core import admission  # noqa: E402
+
+
+async def _phase(user_id: int, clients: int, gate: admission.AdmissionGate) -> dict:
+    admission.gates[admission.READS] = gate
+    ok, shed = [], 0
+    deadline = time.perf_counter() + ARGS.duration
+
+    async def reader(http):
+        nonlocal shed
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            resp = await http.get(f"/users/{user_id}/tasks", params={"limit": 100})
+            if resp.status_code == 503:
+                shed += 1
+                await asyncio.sleep(ARGS.backoff)
+                continue
+            resp.raise_for_status()
+            ok.append(time.perf_counter() - start)
+
+    async with client(user_id) as http:
+        await asyncio.gather(*(reader(http) for _ in range(clients)))
+    result = summarize(ok)
+    result["goodput_rps"] = round(len(ok) / ARGS.duration, 1)
+    result["shed"] = shed
+    return result
+
+
+async def main() -> int:
+    await reset_database()
+    user_id = (await seed(users=1, tasks_per_user=ARGS.tasks, content="x" * 1024))[0]
+    n = ARGS.limit
+
+    def gate(limit: int, queue_size: int) -> admission.AdmissionGate:
+        return admission.AdmissionGate(admission.READS, limit, queue_size, queue_timeout=5.0)
+
+    await _phase(user_id, n, gate(n, 0))  # warm-up
+    report = {
+        "saturated": await _phase(user_id, n, gate(n, 0)),
+        "2x, no admission": await _phase(user_id, 2 * n, gate(10**6, 0)),
+        "2x, admission": await _phase(user_id, 2 * n, gate(n, ARGS.queue_size)),
+    }
+    base = report["saturated"]["p99_ms"]
+    for name in ("2x, no admission", "2x, admission"):
+        report[name]["p99_vs_saturated"] = round(report[name]["p99_ms"] / base, 2) if base else None
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
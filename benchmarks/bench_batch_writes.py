@@ -0,0 +1,65 @@
+"""
+Writing N notes through the :batch endpoints vs N individual calls.
+
+    python -m benchmarks.bench_batch_writes --notes 1000
+"""
+import argparse
+import asyncio
+import json
+
+from benchmarks.common import Timer, client, reset_database, seed
+
+
+async def main(args) -> None:
+    await reset_database()
+    user_id = (await seed(users=1, tasks_per_user=0))[0]
+    notes = [{"name": f"note {i}", "content": "x" * args.content_bytes} for i in range(args.notes)]
+    report = {}
+
+    async with client(user_id) as http:
+        with Timer() as t:
+            ids = []
+            for note in notes:
+                resp = await http.post(f"/users/{user_id}/tasks", json=note)
+                resp.raise_for_status()
+                ids.append(resp.json()["id"])
+        report["create_individual_s"] = round(t.elapsed, 3)
+
+        with Timer() as t:
+            for task_id in ids:
+                resp = await http.put(f"/tasks/{task_id}", json={"name": "renamed"})
+                resp.raise_for_status()
+        report["update_individual_s"] = round(t.elapsed, 3)
+
+        with Timer() as t:
+            resp = await http.post(f"/users/{user_id}/tasks:batch", json={"items": notes})
+            resp.raise_for_status()
+            batch_ids = [r["id"] for r in resp.json()["results"]]
+        report["create_batch_s"] = round(t.elapsed, 3)
+
+        with Timer() as t:
+            items = [{"id": task_id, "name": "renamed"} for task_id in batch_ids]
+            (await http.patch("/tasks:batch", json={"items": items})).raise_for_status()
+        report["update_batch_s"] = round(t.elapsed, 3)
+
+        with Timer() as t:
+            for task_id in ids:
+                (await http.delete(f"/tasks/{task_id}")).raise_for_status()
+        report["delete_individual_s"] = round(t.elapsed, 3)
+
+        with Timer() as t:
+            resp = await http.request("DELETE", "/tasks:batch", json={"ids": batch_ids})
+            resp.raise_for_status()
+        report["delete_batch_s"] = round(t.elapsed, 3)
+
+    for op in ("create", "update", "delete"):
+        batch = report[f"{op}_batch_s"]
+        report[f"{op}_speedup"] = round(report[f"{op}_individual_s"] / batch, 1) if batch else None
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--notes", type=int, default=1000)
+    parser.add_argument("--content-bytes", type=int, default=256)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,85 @@
+"""
+Cost of the task change feed at --connections idle connections in one worker.
+
+    python -m benchmarks.bench_change_feed --connections 10000
+
+Each connection is a consumer of app.core.change_feed.event_stream (the SSE
+body, without sockets), one per user. Reported:
+
+- memory per idle connection (tracemalloc; excludes the socket/HTTP layer)
+- publish_to_one: publish one event for one user and wait until that user's
+  consumer has it; should not grow with the number of idle connections
+- heartbeat: wake every connection and wait until each sent its keep-alive
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+
+from benchmarks.common import summarize
+from app.core import change_feed
+
+
+async def main(args) -> None:
+    feed = change_feed.broadcaster = change_feed.Broadcaster(
+        heartbeat=3600, max_connections=args.connections + 1
+    )
+    received = [0] * (args.connections + 1)
+    arrived = asyncio.Event()
+
+    async def consume(user_id: int):
+        async for _ in change_feed.event_stream(user_id):
+            received[user_id] += 1
+            arrived.set()
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    consumers = [asyncio.create_task(consume(user_id)) for user_id in range(1, args.connections + 1)]
+    while len(feed) < args.connections or sum(received) < args.connections:  # subscribed + sent `retry:`
+        await asyncio.sleep(0.01)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+    latencies = []
+    for i in range(args.events):
+        user_id = 1 + i % args.connections
+        seen = received[user_id]
+        arrived.clear()
+        start = time.perf_counter()
+        await change_feed.publish(change_feed.UPDATED, [(user_id, i, None)])
+        while received[user_id] == seen:
+            await arrived.wait()
+            arrived.clear()
+        latencies.append(time.perf_counter() - start)
+
+    total = sum(received)
+    start = time.perf_counter()
+    for subscribers in list(feed._subscribers.values()):
+        for subscriber in subscribers:
+            subscriber.wake()
+    while sum(received) < total + args.connections:
+        await asyncio.sleep(0)
+    heartbeat = time.perf_counter() - start
+
+    await feed.stop()
+    await asyncio.gather(*consumers)
+    print(
+        json.dumps(
+            {
+                "connections": args.connections,
+                "bytes_per_idle_connection": round(allocated / args.connections),
+                "publish_to_one": summarize(latencies),
+                "heartbeat_all_ms": round(heartbeat * 1000, 1),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--connections", type=int, default=10000)
+    parser.add_argument("--events", type=int, default=1000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,95 @@
+"""
+Storage size and read/write latency of task content at 1 KB, 100 KB and 5 MB.
+
+    python -m benchmarks.bench_content_compression
+    CONTENT_COMPRESSION=none python -m benchmarks.bench_content_compression  # uncompressed baseline
+
+For each size, --notes notes of word-like text are created through
+POST /users/{user_id}/tasks and read back through GET /tasks/{task_id} (with
+the read cache off, so every read hits the database). stored_bytes is what the
+database holds for the content columns: on Postgres pg_column_size(), which
+already includes TOAST's own compression.
+"""
+import os
+
+# every read must reach the database
+os.environ.setdefault("CACHE_BACKEND", "none")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import random  # noqa: E402
+import time  # noqa: E402
+
+from sqlalchemy import func, select  # noqa: E402
+
+from benchmarks.common import client, reset_database, seed, summarize  # noqa: E402
+from app.core.config import CONTENT_COMPRESSION, CONTENT_COMPRESSION_MIN_BYTES  # noqa: E402
+from app.db.session import async_session, get_engine  # noqa: E402
+from app.models.task import Task  # noqa: E402
+
+SIZES = {"1KB": 1024, "100KB": 100 * 1024, "5MB": 5 * 1024 * 1024}
+VOCABULARY = [f"word{i}" for i in range(2000)]
+
+
+def _text(rng: random.Random, size: int) -> str:
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(VOCABULARY)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:size]
+
+
+def _stored_bytes(column):
+    if get_engine().dialect.name == "postgresql":
+        return func.coalesce(func.pg_column_size(column), 0)
+    return func.coalesce(func.length(func.cast(column, Task.content_packed.type.impl)), 0)
+
+
+async def _stored(ids) -> int:
+    async with async_session() as db:
+        stmt = select(
+            func.sum(_stored_bytes(Task.content_text) + _stored_bytes(Task.content_packed))
+        ).where(Task.id.in_(ids))
+        return int(await db.scalar(stmt) or 0)
+
+
+async def main(args) -> None:
+    await reset_database()
+    user_id = (await seed(users=1, tasks_per_user=0))[0]
+    rng = random.Random(42)
+    report = {"codec": CONTENT_COMPRESSION, "min_bytes": CONTENT_COMPRESSION_MIN_BYTES}
+
+    async with client(user_id) as http:
+        for label, size in SIZES.items():
+            content = _text(rng, size)
+            writes, reads, ids = [], [], []
+            for i in range(args.notes):
+                start = time.perf_counter()
+                resp = await http.post(f"/users/{user_id}/tasks", json={"name": f"{label} {i}", "content": content})
+                writes.append(time.perf_counter() - start)
+                resp.raise_for_status()
+                ids.append(resp.json()["id"])
+            for task_id in ids:
+                start = time.perf_counter()
+                resp = await http.get(f"/tasks/{task_id}")
+                reads.append(time.perf_counter() - start)
+                resp.raise_for_status()
+                assert len(resp.json()["content"]) == len(content)
+            stored = await _stored(ids)
+            report[label] = {
+                "raw_bytes": len(content.encode("utf-8")) * len(ids),
+                "stored_bytes": stored,
+                "ratio": round(len(content.encode("utf-8")) * len(ids) / stored, 2) if stored else None,
+                "write": summarize(writes),
+                "read": summarize(reads),
+            }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=20, help="notes per size")
+    asyncio.run(main(parser.parse_args()))
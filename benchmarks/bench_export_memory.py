@@ -0,0 +1,85 @@
+"""
+Peak memory and time-to-first-byte of the NDJSON task export.
+
+Seeds one user with --small and then --large tasks and drains the export
+stream for each, tracking the Python heap with tracemalloc. Peak memory must
+stay roughly constant as the row count grows; the script exits non-zero if
+the large export peaks above --max-ratio times the small one
+(tests/test_export_memory.py runs a smaller version under pytest).
+
+    python -m benchmarks.bench_export_memory --small 10000 --large 100000
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+import tracemalloc
+
+from sqlalchemy import insert
+
+from benchmarks.common import reset_database, seed
+from app.db.session import async_session
+from app.models.task import Task, content_columns
+from app.schemas.task import TaskRead
+from app.services.task_service import stream_tasks
+from app.utilities.stream_utility import ndjson_response
+
+
+async def _add_tasks(user_id: int, count: int, batch: int = 5000) -> None:
+    async with async_session() as db:
+        for start in range(0, count, batch):
+            rows = [
+                {"user_id": user_id, "name": f"note {n}", **content_columns("x" * 200)}
+                for n in range(start, min(count, start + batch))
+            ]
+            await db.execute(insert(Task), rows)
+        await db.commit()
+
+
+async def _measure(user_id: int) -> dict:
+    body = ndjson_response(lambda db: stream_tasks(db, user_id), TaskRead).body_iterator
+    tracemalloc.start()
+    start = time.perf_counter()
+    ttfb = None
+    lines = 0
+    async for chunk in body:
+        if ttfb is None:
+            ttfb = time.perf_counter() - start
+        lines += chunk.count(b"\n")
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "rows": lines,
+        "peak_kib": round(peak / 1024, 1),
+        "ttfb_ms": round((ttfb or 0) * 1000, 2),
+        "total_s": round(elapsed, 3),
+    }
+
+
+async def compare(small_rows: int, large_rows: int) -> dict:
+    """Export a small_rows and a large_rows user from a fresh database; their measurements and peak_ratio."""
+    await reset_database()
+    small_user, large_user = await seed(users=2, tasks_per_user=0)
+    await _add_tasks(small_user, small_rows)
+    await _add_tasks(large_user, large_rows)
+
+    small = await _measure(small_user)
+    large = await _measure(large_user)
+    ratio = large["peak_kib"] / small["peak_kib"] if small["peak_kib"] else 0
+    return {"small": small, "large": large, "peak_ratio": round(ratio, 2)}
+
+
+async def main(args) -> int:
+    result = await compare(args.small, args.large)
+    print(json.dumps(result, indent=2))
+    return 0 if result["peak_ratio"] <= args.max_ratio else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--small", type=int, default=10_000)
+    parser.add_argument("--large", type=int, default=100_000)
+    parser.add_argument("--max-ratio", type=float, default=1.5)
+    sys.exit(asyncio.run(main(parser.parse_args())))
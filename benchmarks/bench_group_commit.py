@@ -0,0 +1,82 @@
+"""
+Commits/s vs inserts/s for POST /users/{user_id}/tasks with many concurrent writers.
+
+    python -m benchmarks.bench_group_commit --writers 500 --per-writer 4
+
+Runs the same workload twice: one transaction per insert (the default), then
+with the group-commit write coalescer (WRITE_COALESCING_ENABLED). Commits are
+counted with an engine "commit" event. Admission control is off so every
+writer is really in flight.
+"""
+import os
+
+os.environ.setdefault("ADMISSION_CONTROL_ENABLED", "false")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import time  # noqa: E402
+
+from sqlalchemy import event  # noqa: E402
+
+from benchmarks.common import client, reset_database, seed, summarize  # noqa: E402
+from app.core.config import WRITE_COALESCE_MAX_BATCH, WRITE_COALESCE_WINDOW_MS  # noqa: E402
+from app.db.session import get_engine  # noqa: E402
+from app.services import write_coalescer  # noqa: E402
+
+_commits = 0
+
+
+def _count_commit(conn) -> None:
+    global _commits
+    _commits += 1
+
+
+async def _phase(user_id: int, writers: int, per_writer: int) -> dict:
+    global _commits
+    latencies, errors = [], 0
+
+    async def writer(http, w: int):
+        nonlocal errors
+        for n in range(per_writer):
+            start = time.perf_counter()
+            resp = await http.post(f"/users/{user_id}/tasks", json={"name": f"w{w}.{n}", "content": "x" * 256})
+            latencies.append(time.perf_counter() - start)
+            if resp.status_code != 201:
+                errors += 1
+
+    _commits = 0
+    started = time.perf_counter()
+    async with client(user_id) as http:
+        await asyncio.gather(*(writer(http, w) for w in range(writers)))
+    elapsed = time.perf_counter() - started
+    result = summarize(latencies)
+    result.update(
+        inserts_per_s=round(len(latencies) / elapsed, 1),
+        commits_per_s=round(_commits / elapsed, 1),
+        inserts_per_commit=round(len(latencies) / _commits, 1) if _commits else None,
+        errors=errors,
+    )
+    return result
+
+
+async def main(args) -> None:
+    await reset_database()
+    user_id = (await seed(users=1, tasks_per_user=0))[0]
+    event.listen(get_engine().sync_engine, "commit", _count_commit)
+
+    write_coalescer.coalescer = None
+    report = {"per-request commit": await _phase(user_id, args.writers, args.per_writer)}
+    write_coalescer.coalescer = write_coalescer.WriteCoalescer(args.window_ms / 1000, args.max_batch)
+    report["group commit"] = await _phase(user_id, args.writers, args.per_writer)
+    await write_coalescer.coalescer.drain()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writers", type=int, default=500)
+    parser.add_argument("--per-writer", type=int, default=4)
+    parser.add_argument("--window-ms", type=float, default=WRITE_COALESCE_WINDOW_MS)
+    parser.add_argument("--max-batch", type=int, default=WRITE_COALESCE_MAX_BATCH)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,95 @@
+"""
+Cost of client retries with and without an Idempotency-Key: every signup and
+every task create is sent twice (the first response "lost" on a flaky network).
+
+    python -m benchmarks.bench_idempotent_retries --requests 50 --concurrency 8
+
+Without a key each retry creates a duplicate task, and a retried signup gets
+400 for the account its first attempt created; with one, both retries are
+stored-response replays (200/201, no service call).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+import uuid
+
+from benchmarks.common import client, reset_database, seed, summarize
+from app.services import email_filter, password_service
+
+
+async def _phase(label: str, user_id: int, requests: int, concurrency: int, keyed: bool) -> dict:
+    hashes = [0]
+    hash_password = password_service.hash_password
+
+    async def counting_hash(password: str) -> str:
+        hashes[0] += 1
+        return await hash_password(password)
+
+    password_service.hash_password = counting_hash
+    pending = list(range(requests))
+    latencies = {"first": [], "retry": []}
+    statuses = {}
+
+    async def send(http, method_path: str, body: dict, key: str, attempt: str) -> None:
+        headers = {"Idempotency-Key": key} if keyed else {}
+        while True:
+            start = time.perf_counter()
+            resp = await http.post(method_path, json=body, headers=headers)
+            if resp.status_code != 503:
+                break
+            await asyncio.sleep(float(resp.headers.get("retry-after", "1")))  # shed by admission control
+        latencies[attempt].append(time.perf_counter() - start)
+        statuses[f"{attempt} {resp.status_code}"] = statuses.get(f"{attempt} {resp.status_code}", 0) + 1
+
+    async def worker(http) -> None:
+        while pending:
+            i = pending.pop()
+            key = str(uuid.uuid4())
+            signup = {"name": label, "email": f"{label}{i}@bench.local", "password": "hunter22"}
+            task = {"name": f"{label} {i}", "content": "x" * 256}
+            for attempt in ("first", "retry"):
+                await send(http, "/users/", signup, key, attempt)
+                await send(http, f"/users/{user_id}/tasks", task, key, attempt)
+
+    started = time.perf_counter()
+    try:
+        async with client(user_id) as http:
+            await asyncio.gather(*(worker(http) for _ in range(concurrency)))
+            tasks = (await http.get(f"/users/{user_id}/stats")).json()["task_count"]
+    finally:
+        password_service.hash_password = hash_password
+    return {
+        "seconds": round(time.perf_counter() - started, 2),
+        "bcrypt_hashes": hashes[0],
+        "tasks_created": tasks,
+        "status_codes": statuses,
+        "first": summarize(latencies["first"]),
+        "retry": summarize(latencies["retry"]),
+    }
+
+
+async def main(args) -> None:
+    # duplicate signups log an integrity error each
+    logging.getLogger("app").setLevel(logging.CRITICAL)
+    report = {"requests": args.requests}
+    for label, keyed in (("nokey", False), ("keyed", True)):
+        await reset_database()
+        user_id = (await seed(users=1, tasks_per_user=0))[0]
+        if email_filter.registered_emails is not None:
+            # loaded at startup by the app's lifespan, which in-process clients skip
+            await email_filter.registered_emails.load()
+        await password_service.hash_password("warmup")
+        report["with_key" if keyed else "without_key"] = await _phase(
+            label, user_id, args.requests, args.concurrency, keyed
+        )
+    password_service.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,175 @@
+"""
+Tasks before and after monthly partitioning + archival (Postgres only).
+
+    DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.bench_partitioning --rows 10000000
+
+Builds the schema as of the migration before 6c51491c2b33, loads --rows tasks
+with ids and created_at rising together over the last --months months, and
+measures (read cache off):
+
+- GET /tasks/{id} for tasks of the last 30 days ("recent") and older than the
+  archive horizon ("old")
+- the first page of GET /users/{id}/tasks (its ETag query counts all of the
+  user's tasks)
+- size of the tasks indexes and tables
+
+then again after applying the migration ("partitioned"), and after archiving
+tasks older than --after-months months ("archived", once tasks_legacy's indexes
+are rebuilt); "old" ids are then served from tasks_archive.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("CACHE_BACKEND", "none")
+
+from sqlalchemy import text  # noqa: E402
+
+from benchmarks.common import auth_headers, client, seed, summarize  # noqa: E402
+from alembic import command  # noqa: E402
+from app.db import partitions  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.migrations import alembic_config, upgrade_head  # noqa: E402
+from app.db.session import async_session, dispose_engines, get_engine  # noqa: E402
+
+PREVIOUS_REVISION = "feefe53c4534"
+
+_LOAD = text(
+    """
+    INSERT INTO tasks (user_id, name, content, content_chars, created_at, updated_at)
+    SELECT :first_user + g % :users, 'note ' || g, c, length(c), ts, ts
+    FROM generate_series(:start, :stop - 1) AS g,
+         LATERAL (SELECT repeat(md5(g::text) || ' ', 6) AS c,
+                         now() - (:rows - g) * (:months * interval '30 days' / :rows) AS ts) AS v
+    """
+)
+_SIZES = text(
+    """
+    SELECT sum(pg_indexes_size(oid))::bigint, sum(pg_table_size(oid))::bigint FROM pg_class
+    WHERE oid = 'tasks'::regclass OR oid IN (SELECT relid FROM pg_partition_tree('tasks'))
+    """
+)
+_SAMPLE = text(
+    """
+    SELECT id, user_id FROM tasks WHERE created_at >= :since AND created_at < :until
+    ORDER BY random() LIMIT :n
+    """
+)
+
+
+async def _build(args) -> list:
+    engine = get_engine()
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP SCHEMA public CASCADE"))
+        await conn.execute(text("CREATE SCHEMA public"))
+        await conn.run_sync(Base.metadata.create_all)
+        # as created by the migrations before 6c51491c2b33
+        await conn.execute(text("CREATE INDEX ix_tasks_id ON tasks (id)"))
+    await asyncio.to_thread(command.stamp, alembic_config(), PREVIOUS_REVISION)
+    user_ids = await seed(users=args.users, tasks_per_user=0)
+    batch = 500_000
+    for start in range(0, args.rows, batch):
+        async with async_session() as db:
+            await db.execute(
+                _LOAD,
+                {
+                    "first_user": user_ids[0], "users": len(user_ids), "start": start,
+                    "stop": min(args.rows, start + batch), "rows": args.rows, "months": args.months,
+                },
+            )
+            await db.commit()
+        print(f"loaded {min(args.rows, start + batch)} tasks", file=sys.stderr)
+    await _maintenance("VACUUM ANALYZE tasks")
+    return user_ids
+
+
+async def _maintenance(*statements: str) -> None:
+    async with get_engine().connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for statement in statements:
+            await conn.execute(text(statement))
+
+
+async def _measure(args, samples: dict, user_ids: list) -> dict:
+    async with get_engine().connect() as conn:
+        index_bytes, table_bytes = (await conn.execute(_SIZES)).one()
+        archive_bytes = None
+        if await conn.scalar(text("SELECT to_regclass('tasks_archive') IS NOT NULL")):
+            archive_bytes = await conn.scalar(text("SELECT pg_total_relation_size('tasks_archive')"))
+    report = {
+        "tasks_index_mb": round(index_bytes / 2**20, 1),
+        "tasks_table_mb": round(table_bytes / 2**20, 1),
+        "archive_mb": round(archive_bytes / 2**20, 1) if archive_bytes is not None else None,
+    }
+    headers = {user_id: auth_headers(user_id) for user_id in user_ids}
+    async with client() as http:
+        for label, pairs in samples.items():
+            latencies = []
+            for task_id, user_id in pairs:
+                start = time.perf_counter()
+                resp = await http.get(f"/tasks/{task_id}", headers=headers[user_id])
+                latencies.append(time.perf_counter() - start)
+                resp.raise_for_status()
+            report[f"get_{label}"] = summarize(latencies)
+        latencies = []
+        rng = random.Random(7)
+        for _ in range(args.iterations):
+            user_id = rng.choice(user_ids)
+            start = time.perf_counter()
+            resp = await http.get(f"/users/{user_id}/tasks", params={"limit": 50}, headers=headers[user_id])
+            latencies.append(time.perf_counter() - start)
+            resp.raise_for_status()
+        report["list_first_page"] = summarize(latencies)
+    return report
+
+
+async def main(args) -> None:
+    if get_engine().dialect.name != "postgresql":
+        sys.exit("bench_partitioning needs DATABASE_URL pointing at Postgres")
+    started = time.perf_counter()
+    user_ids = await _build(args)
+    report = {
+        "rows": args.rows, "users": args.users, "months": args.months, "load_s": round(time.perf_counter() - started, 1)
+    }
+
+    horizon = partitions.archive_horizon(args.after_months)
+    async with get_engine().connect() as conn:
+        now = await conn.scalar(text("SELECT now()"))
+        ranges = {"recent": (now - timedelta(days=30), now), "old": (datetime(1970, 1, 1, tzinfo=timezone.utc), horizon)}
+        samples = {
+            label: (await conn.execute(_SAMPLE, {"since": since, "until": until, "n": args.iterations})).all()
+            for label, (since, until) in ranges.items()
+        }
+    report["before"] = await _measure(args, samples, user_ids)
+
+    started = time.perf_counter()
+    await asyncio.to_thread(upgrade_head)
+    report["migration_s"] = round(time.perf_counter() - started, 1)
+    report["partitioned"] = await _measure(args, samples, user_ids)
+
+    started = time.perf_counter()
+    report["archived_tasks"] = await partitions.archive_tasks(horizon)
+    report["archive_s"] = round(time.perf_counter() - started, 1)
+    # everything loaded here sits in tasks_legacy, which the archive job thins out
+    # but cannot drop; rebuilding its indexes once gives the space back
+    started = time.perf_counter()
+    await _maintenance("REINDEX TABLE CONCURRENTLY tasks_legacy", "VACUUM ANALYZE tasks", "ANALYZE tasks_archive")
+    report["reindex_s"] = round(time.perf_counter() - started, 1)
+    report["archived"] = await _measure(args, samples, user_ids)
+    await dispose_engines()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--months", type=int, default=24, help="created_at spread over this many months")
+    parser.add_argument("--after-months", type=int, default=12, help="archive tasks older than this")
+    parser.add_argument("--iterations", type=int, default=300)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,82 @@
+"""
+Latency of GET /users/{user_id}/tasks/search on a large corpus.
+
+Seeds --notes notes (1M by default) spread over --users users, with words
+drawn from a Zipf-like vocabulary so queries range from very common to rare
+terms, then reports p50/p95/p99 per query class.
+
+    python -m benchmarks.bench_search --notes 1000000 --users 1000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from sqlalchemy import insert
+
+from benchmarks.common import auth_headers, client, reset_database, seed, summarize
+from app.db.session import async_session
+from app.models.task import Task, content_columns
+
+VOCABULARY = [f"word{i}" for i in range(5000)]
+# word0 is the most common term, word4999 among the rarest
+WEIGHTS = [1 / (i + 1) for i in range(len(VOCABULARY))]
+
+QUERIES = {
+    "common": "word1",
+    "medium": "word200",
+    "rare": "word4000",
+    "two_terms": "word3 word50",
+    "no_match": "zzzzzz",
+}
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choices(VOCABULARY, WEIGHTS, k=words))
+
+
+async def _load(notes: int, user_ids, batch: int = 10_000) -> None:
+    rng = random.Random(42)
+    async with async_session() as db:
+        for start in range(0, notes, batch):
+            rows = [
+                {"user_id": user_ids[n % len(user_ids)], "name": _text(rng, 4), **content_columns(_text(rng, 60))}
+                for n in range(start, min(notes, start + batch))
+            ]
+            await db.execute(insert(Task), rows)
+            await db.commit()
+
+
+async def main(args) -> None:
+    await reset_database()
+    user_ids = await seed(users=args.users, tasks_per_user=0)
+    started = time.perf_counter()
+    await _load(args.notes, user_ids)
+    report = {"notes": args.notes, "users": args.users, "load_s": round(time.perf_counter() - started, 1)}
+
+    headers = {user_id: auth_headers(user_id) for user_id in user_ids}
+    async with client() as http:
+        for label, q in QUERIES.items():
+            samples = []
+            for i in range(args.iterations):
+                user_id = user_ids[i % len(user_ids)]
+                start = time.perf_counter()
+                resp = await http.get(
+                    f"/users/{user_id}/tasks/search",
+                    params={"q": q, "limit": args.limit},
+                    headers=headers[user_id],
+                )
+                samples.append(time.perf_counter() - start)
+                resp.raise_for_status()
+            report[label] = summarize(samples)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--notes", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
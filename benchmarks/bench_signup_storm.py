@@ -0,0 +1,77 @@
+"""
+p99 of GET /tasks/{id} with and without a concurrent POST /users storm.
+
+With bcrypt running in the password hash pool the read latency should stay
+flat while signups are in flight.
+
+    python -m benchmarks.bench_signup_storm --duration 5 --readers 8 --signups 16
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+
+from benchmarks.common import client, reset_database, seed, summarize
+from app.services import password_service
+
+_emails = itertools.count()
+
+
+async def _reader(http, task_id: int, deadline: float, samples: list) -> None:
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        resp = await http.get(f"/tasks/{task_id}")
+        samples.append(time.perf_counter() - start)
+        resp.raise_for_status()
+
+
+async def _signup(http, deadline: float, samples: list, shed: list) -> None:
+    while time.perf_counter() < deadline:
+        n = next(_emails)
+        start = time.perf_counter()
+        resp = await http.post(
+            "/users/", json={"name": f"storm{n}", "email": f"storm{n}@bench.local", "password": "hunter22"}
+        )
+        if resp.status_code == 503:
+            # shed by admission control (signup class full); back off like a client would
+            shed[0] += 1
+            await asyncio.sleep(float(resp.headers.get("retry-after", "1")))
+            continue
+        samples.append(time.perf_counter() - start)
+        resp.raise_for_status()
+
+
+async def _phase(user_id: int, task_id: int, duration: float, readers: int, signups: int) -> dict:
+    reads, writes, shed = [], [], [0]
+    deadline = time.perf_counter() + duration
+    async with client(user_id) as http:
+        jobs = [_reader(http, task_id, deadline, reads) for _ in range(readers)]
+        jobs += [_signup(http, deadline, writes, shed) for _ in range(signups)]
+        await asyncio.gather(*jobs)
+    return {"get_task": summarize(reads), "signup": summarize(writes), "signup_shed": shed[0]}
+
+
+async def main(args) -> None:
+    await reset_database()
+    user_id = (await seed(users=1, tasks_per_user=1))[0]
+    task_id = user_id  # first user's first task
+    # warm the hash pool so process start-up is not measured
+    await password_service.hash_password("warmup")
+
+    idle = await _phase(user_id, task_id, args.duration, args.readers, 0)
+    storm = await _phase(user_id, task_id, args.duration, args.readers, args.signups)
+    password_service.shutdown()
+
+    report = {"idle": idle, "storm": storm}
+    base, loaded = idle["get_task"]["p99_ms"], storm["get_task"]["p99_ms"]
+    report["get_task_p99_ratio"] = round(loaded / base, 2) if base else None
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--signups", type=int, default=16)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,87 @@
+"""
+Worker start-up cost per MIGRATION_MODE: import time, lifespan start-up and
+first-request latency, each measured in a fresh interpreter.
+
+    python -m benchmarks.bench_startup --modes skip,check --runs 5
+
+`upgrade` needs a database the migrations can run against (Postgres), so it
+is only measured when asked for.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from sqlalchemy import text
+
+from benchmarks.common import reset_database, seed
+from app.db.migrations import script_heads
+from app.db.session import dispose_engines, get_engine
+
+CHILD = r"""
+import asyncio, json, sys, time
+import httpx
+t0 = time.perf_counter()
+from app.main import app
+t1 = time.perf_counter()
+from app.core.security import issue_token
+
+async def run():
+    async with app.router.lifespan_context(app):
+        t2 = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            resp = await http.get("/tasks/1", headers={"Authorization": f"Bearer {issue_token(1)}"})
+            resp.raise_for_status()
+        return t2, time.perf_counter()
+
+t2, t3 = asyncio.run(run())
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "startup_ms": (t2 - t1) * 1000,
+    "first_request_ms": (t3 - t2) * 1000,
+    "alembic_imported": "alembic" in sys.modules,
+}))
+"""
+
+
+async def _prepare() -> None:
+    await reset_database()
+    await seed(users=1, tasks_per_user=1)
+    async with get_engine().begin() as conn:
+        await conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+        await conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) PRIMARY KEY)"))
+        for head in script_heads():
+            await conn.execute(text("INSERT INTO alembic_version VALUES (:v)"), {"v": head})
+    await dispose_engines()
+
+
+def _run_child(mode: str) -> dict:
+    env = dict(os.environ, MIGRATION_MODE=mode)
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD], env=env, check=True, capture_output=True, text=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(args) -> None:
+    asyncio.run(_prepare())
+    report = {}
+    for mode in args.modes.split(","):
+        runs = [_run_child(mode) for _ in range(args.runs)]
+        report[mode] = {
+            key: round(statistics.median(r[key] for r in runs), 2)
+            for key in ("import_ms", "startup_ms", "first_request_ms")
+        }
+        report[mode]["alembic_imported"] = runs[0]["alembic_imported"]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modes", default="skip,check")
+    parser.add_argument("--runs", type=int, default=5)
+    main(parser.parse_args())
@@ -0,0 +1,254 @@
+"""
+Fail when a database connection is shared across processes.
+
+    python -m benchmarks.check_fork_safety              # fork check, then app.serve end to end
+    python -m benchmarks.check_fork_safety --no-serve   # fork check only
+
+fork: a process holding a pooled connection forks; the child must get new
+engines whose connections it opened itself (on Postgres: a different backend
+pid), and the parent's connection must still work once the child has exited.
+
+serve: `python -m app.serve` with 2 workers that recycle every ~20 requests
+must answer every request while workers come and go, and on SIGTERM must end
+an open change-feed stream and exit cleanly well inside the graceful timeout.
+With no settings at all it must start one worker per CPU on a multi-core host.
+
+tests/test_fork_safety.py runs both checks under pytest.
+"""
+import argparse
+import asyncio
+import os
+import secrets
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+# the tokens minted here must verify in the app.serve workers
+os.environ.setdefault("AUTH_SECRET_KEY", secrets.token_hex(32))
+
+import httpx  # noqa: E402
+from sqlalchemy import event, text  # noqa: E402
+from sqlalchemy.pool import Pool  # noqa: E402
+
+from benchmarks.common import auth_headers, reset_database, seed  # noqa: E402
+from app.db.session import dispose_engines, get_engine, init_engines  # noqa: E402
+
+# (pid, id of the DBAPI connection) for every connection any pool opened
+_opened = set()
+
+
+@event.listens_for(Pool, "connect")
+def _record_connect(dbapi_connection, connection_record) -> None:
+    _opened.add((os.getpid(), id(dbapi_connection)))
+
+
+async def _connection_identity(conn) -> tuple:
+    """(id of the DBAPI connection, server-side identity or None) of a checked-out connection."""
+    raw = await conn.get_raw_connection()
+    backend = None
+    if conn.dialect.name == "postgresql":
+        backend = await conn.scalar(text("SELECT pg_backend_pid()"))
+    return id(raw.dbapi_connection), backend
+
+
+async def _child(parent_engine_id: int, parent_backend) -> int:
+    engine = init_engines()
+    if id(engine) == parent_engine_id:
+        print("FAIL  fork: the child reused the parent's engine")
+        return 1
+    async with engine.connect() as conn:
+        connection_id, backend = await _connection_identity(conn)
+        await conn.execute(text("SELECT 1"))
+    await dispose_engines()
+    if (os.getpid(), connection_id) not in _opened:
+        print("FAIL  fork: the child's connection was not opened by the child")
+        return 1
+    if parent_backend is not None and backend == parent_backend:
+        print(f"FAIL  fork: the child talked to the parent's backend ({backend})")
+        return 1
+    return 0
+
+
+async def check_fork() -> int:
+    await reset_database()
+    await seed(users=1, tasks_per_user=1)
+    engine = get_engine()
+    async with engine.connect() as conn:
+        _, parent_backend = await _connection_identity(conn)
+        await conn.execute(text("SELECT count(*) FROM users"))
+        # fork while the connection is checked out and the pool is warm
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                code = asyncio.run(_child(id(engine), parent_backend))
+            finally:
+                os._exit(code)
+        _, status = await asyncio.to_thread(os.waitpid, pid, 0)
+        if os.waitstatus_to_exitcode(status) != 0:
+            return 1
+        if get_engine() is not engine:
+            print("FAIL  fork: the parent's engine was replaced")
+            return 1
+        # the child disposed of its engines; the parent's connection must be untouched
+        users = await conn.scalar(text("SELECT count(*) FROM users"))
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    await dispose_engines()
+    print(f"ok    fork: child opened its own connections, parent's still works ({users} user)")
+    return 0
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def check_serve(requests: int, graceful_timeout: float) -> int:
+    user_id = asyncio.run(_seed_for_serve())
+    port = _free_port()
+    env = dict(os.environ, MIGRATION_MODE="skip", PASSWORD_HASH_WORKERS="0")
+    log_file = tempfile.TemporaryFile("w+")
+    proc = subprocess.Popen(
+        [
+            sys.executable, "-m", "app.serve", "--host", "127.0.0.1", "--port", str(port), "--workers", "2",
+            "--max-requests", "20", "--max-requests-jitter", "5", "--graceful-timeout", str(graceful_timeout),
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,  # access log
+        stderr=log_file,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    headers = auth_headers(user_id)
+    failures = 0
+    try:
+        _wait_until_up(base_url)
+        statuses = {}
+        for _ in range(requests):
+            # a new connection each time: a keep-alive connection dies with its worker
+            try:
+                status = httpx.get(f"{base_url}/users/", headers=headers, timeout=30).status_code
+            except httpx.TransportError as e:
+                status = type(e).__name__
+            statuses[status] = statuses.get(status, 0) + 1
+        if statuses != {200: requests}:
+            failures += 1
+            print(f"FAIL  serve: {requests} requests across recycling workers got {statuses}")
+        else:
+            print(f"ok    serve: {requests} requests across recycling workers, all 200")
+
+        with httpx.stream("GET", f"{base_url}/users/{user_id}/tasks/events", headers=headers, timeout=None) as resp:
+            resp.raise_for_status()
+            started = time.perf_counter()
+            proc.send_signal(signal.SIGTERM)
+            for _ in resp.iter_bytes():
+                pass  # ends when the worker closes the stream
+            stream_closed = time.perf_counter() - started
+        code = proc.wait(timeout=graceful_timeout + 10)
+        took = time.perf_counter() - started
+        if code != 0 or took >= graceful_timeout:
+            failures += 1
+            print(f"FAIL  serve: SIGTERM with an open stream took {took:.1f}s, exit code {code}")
+        else:
+            print(f"ok    serve: SIGTERM closed the open stream in {stream_closed:.2f}s, exited 0 in {took:.2f}s")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        log_file.seek(0)
+        log = log_file.read()
+        log_file.close()
+    recycled = log.count("Maximum request limit")
+    if not recycled:
+        failures += 1
+        print("FAIL  serve: no worker was recycled")
+    else:
+        print(f"ok    serve: {recycled} worker recycles")
+    if failures:
+        print(log, file=sys.stderr)
+    return failures
+
+
+def check_serve_defaults(cpus: int = 4) -> int:
+    """A plain `python -m app.serve` (no CACHE_BACKEND, no SERVE_WORKERS) on a `cpus`-core host must start."""
+    user_id = asyncio.run(_seed_for_serve())
+    port = _free_port()
+    env = {k: v for k, v in os.environ.items() if k not in ("CACHE_BACKEND", "SERVE_WORKERS")}
+    env.update(MIGRATION_MODE="skip", PASSWORD_HASH_WORKERS="0")
+    # the worker count defaults to os.cpu_count(), read when app.core.config is imported
+    launcher = f"import os, sys; os.cpu_count = lambda: {cpus}; from app.serve import main; sys.exit(main())"
+    log_file = tempfile.TemporaryFile("w+")
+    proc = subprocess.Popen(
+        [sys.executable, "-c", launcher, "--host", "127.0.0.1", "--port", str(port)],  # as python -m app.serve
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=log_file,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    failures = 0
+    try:
+        deadline = time.monotonic() + 30
+        while proc.poll() is None and time.monotonic() < deadline:
+            try:
+                status = httpx.get(f"{base_url}/users/", headers=auth_headers(user_id), timeout=30).status_code
+                break
+            except httpx.TransportError:
+                time.sleep(0.2)
+        else:
+            status = f"exit code {proc.returncode}" if proc.returncode is not None else "no answer"
+        if status != 200:
+            failures += 1
+            print(f"FAIL  serve defaults: {cpus} CPUs, default settings: {status}")
+        else:
+            print(f"ok    serve defaults: {cpus} workers on {cpus} CPUs with the default cache settings")
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=30)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        log_file.seek(0)
+        log = log_file.read()
+        log_file.close()
+    if failures:
+        print(log, file=sys.stderr)
+    return failures
+
+
+async def _seed_for_serve() -> int:
+    await reset_database()
+    user_id = (await seed(users=1, tasks_per_user=3))[0]
+    await dispose_engines()
+    return user_id
+
+
+def _wait_until_up(base_url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            httpx.get(base_url + "/")
+            return
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def main(args) -> int:
+    failures = asyncio.run(check_fork())
+    if args.serve:
+        failures += check_serve(args.requests, args.graceful_timeout)
+        failures += check_serve_defaults()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--no-serve", dest="serve", action="store_false")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--graceful-timeout", type=float, default=10)
+    sys.exit(main(parser.parse_args()))
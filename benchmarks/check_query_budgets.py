@@ -0,0 +1,65 @@
+"""
+Fail when an endpoint issues more SQL statements than its declared budget.
+
+Each request runs inside benchmarks.query_counter.query_budget; the script
+exits non-zero (and prints the offending statements) if any endpoint went over.
+tests/test_query_budgets.py runs the same check under pytest.
+
+    python -m benchmarks.check_query_budgets
+"""
+import asyncio
+import sys
+from typing import Callable
+
+from benchmarks.common import client, reset_database, seed
+from benchmarks.query_counter import QueryBudgetExceeded, query_budget
+from app.services import email_filter
+
+# (method, path template, json body, budget)
+BUDGETS = [
+    ("POST", "/users/", {"name": "b", "email": "budget@bench.local", "password": "hunter22"}, 1),
+    ("GET", "/users/", None, 1),
+    # one user lookup; the bcrypt verify is not a query
+    ("POST", "/auth/login", {"email": "budget@bench.local", "password": "hunter22"}, 1),
+    ("POST", "/users/{user_id}/tasks", {"name": "note", "content": "body"}, 1),
+    # listing ETag (index-only count/max/sum) + the page; a 304 stops after the first
+    ("GET", "/users/{user_id}/tasks", None, 2),
+    ("GET", "/users/{user_id}/tasks?view=summary", None, 2),
+    ("GET", "/users/{user_id}/stats", None, 1),
+    ("GET", "/tasks/{task_id}", None, 1),
+    ("PUT", "/tasks/{task_id}", {"name": "renamed"}, 1),
+    ("DELETE", "/tasks/{task_id}", None, 1),
+]
+
+
+async def check(report: Callable[[str], None] = print) -> int:
+    """Run every request of BUDGETS against a fresh database; returns how many went over."""
+    await reset_database()
+    user_id = (await seed(users=1, tasks_per_user=1))[0]
+    ids = {"user_id": user_id, "task_id": user_id}
+    if email_filter.registered_emails is not None:
+        # loaded at startup by the app's lifespan, which in-process clients skip
+        await email_filter.registered_emails.load()
+    failures = 0
+    async with client(user_id) as http:
+        await http.get("/users/")  # first connect runs dialect initialisation queries
+        for method, template, body, budget in BUDGETS:
+            path = template.format(**ids)
+            label = f"{method} {template}"
+            try:
+                with query_budget(budget, label) as queries:
+                    resp = await http.request(method, path, json=body)
+                    resp.raise_for_status()
+                report(f"ok    {label}: {len(queries)}/{budget}")
+            except QueryBudgetExceeded as e:
+                failures += 1
+                report(f"FAIL  {e}")
+    return failures
+
+
+async def main() -> int:
+    return 1 if await check() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,165 @@
+"""
+Shared helpers for the benchmark scripts.
+
+The app is driven in-process through httpx's ASGITransport (no network, no
+lifespan/migrations) against a throwaway SQLite database unless DATABASE_URL
+is already set, e.g. to a local Postgres.
+"""
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+_DB_PATH = Path(tempfile.gettempdir()) / "secure_notes_bench.db"
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_DB_PATH}")
+# seeding and full scans are slow on purpose; don't flood the output with slow-query logs
+os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "0")
+
+import httpx  # noqa: E402
+
+from app.core.security import issue_token  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.session import async_session, get_engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.task import Task  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+
+async def reset_database() -> None:
+    """Drop and recreate all tables."""
+    async with get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def seed(users: int = 1, tasks_per_user: int = 10, content: str = "x" * 256) -> List[int]:
+    """Insert users with tasks directly through the ORM; returns the user ids."""
+    async with async_session() as db:
+        created = [
+            User(name=f"user{i}", email=f"user{i}@bench.local", password="not-a-real-hash")
+            for i in range(users)
+        ]
+        db.add_all(created)
+        await db.flush()
+        for u in created:
+            db.add_all(
+                Task(user_id=u.id, name=f"note {n}", content=content) for n in range(tasks_per_user)
+            )
+        await db.commit()
+        return [u.id for u in created]
+
+
+def auth_headers(user_id: int) -> Dict[str, str]:
+    """Authorization header for user_id, minted directly (no login, no bcrypt)."""
+    return {"Authorization": f"Bearer {issue_token(user_id)}"}
+
+
+def client(user_id: Optional[int] = None) -> httpx.AsyncClient:
+    """In-process client; authenticated as user_id when given."""
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://bench",
+        headers=auth_headers(user_id) if user_id is not None else None,
+    )
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+def summarize(samples: Sequence[float]) -> dict:
+    """Latency summary in milliseconds."""
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+    }
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+
+def write_results(results: dict, path: Optional[str]) -> None:
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if path:
+        Path(path).write_text(text + "\n")
+    print(text)
+
+
+def compare_to_baseline(
+    results: Dict[str, dict],
+    baseline: Dict[str, dict],
+    threshold: float,
+    higher_is_better: Sequence[str],
+    lower_is_better: Sequence[str],
+) -> List[str]:
+    """
+    Compare {case: {metric: value}} results against a baseline of the same shape.
+    Returns one message per metric that regressed by more than threshold (0.2 = 20%).
+    Cases or metrics missing from the baseline are ignored.
+    """
+    regressions = []
+    for case, metrics in results.items():
+        base = baseline.get(case, {})
+        for metric, value in metrics.items():
+            old = base.get(metric)
+            if not old or not isinstance(value, (int, float)):
+                continue
+            if metric in higher_is_better and value < old * (1 - threshold):
+                regressions.append(f"{case} {metric}: {value} < baseline {old}")
+            elif metric in lower_is_better and value > old * (1 + threshold):
+                regressions.append(f"{case} {metric}: {value} > baseline {old}")
+    return regressions
+
+
+def check_baseline(
+    results: Dict[str, dict],
+    name: str,
+    args,
+    higher_is_better: Sequence[str],
+    lower_is_better: Sequence[str],
+) -> int:
+    """
+    Shared --baseline/--save-baseline handling; returns the process exit code.
+    Baselines live in benchmarks/baselines/<name>.json unless a path is given.
+    """
+    path = Path(args.baseline) if args.baseline else BASELINE_DIR / f"{name}.json"
+    if args.save_baseline:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        print(f"baseline saved to {path}")
+        return 0
+    if not path.exists():
+        print(f"no baseline at {path}; run with --save-baseline to record one")
+        return 0
+    regressions = compare_to_baseline(
+        results, json.loads(path.read_text()), args.threshold, higher_is_better, lower_is_better
+    )
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+def add_baseline_arguments(parser) -> None:
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store results as the baseline")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="allowed regression vs baseline (0.2 = 20%%)"
+    )
@@ -0,0 +1,160 @@
+"""
+In-process load test of every endpoint.
+
+Each scenario sends --requests requests with --concurrency in flight through
+httpx's ASGITransport and reports RPS and p50/p95/p99 latency. Results are
+printed as JSON and compared against a stored baseline; the exit code is
+non-zero when a scenario regresses by more than --threshold.
+
+    python -m benchmarks.load --concurrency 16 --requests 500
+    python -m benchmarks.load --only "GET /tasks/{task_id}" --save-baseline
+
+Runs against a throwaway SQLite database, or DATABASE_URL (e.g. a local
+Postgres) when set.
+"""
+import argparse
+import asyncio
+import itertools
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+from benchmarks.common import (
+    add_baseline_arguments,
+    check_baseline,
+    client,
+    reset_database,
+    seed,
+    summarize,
+    write_results,
+)
+from app.core.config import ADMIN_USER_IDS
+
+Scenario = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+class State:
+    """Ids shared between scenarios, e.g. tasks created by one and deleted by another."""
+
+    def __init__(self, user_id: int, task_ids: List[int]):
+        self.user_id = user_id
+        self.task_ids = task_ids
+        self.created: List[int] = []
+        self.batch_created: List[List[int]] = []
+        self.emails = itertools.count()
+        self.etags: Dict[str, str] = {}
+
+
+def scenarios(state: State) -> Dict[str, Scenario]:
+    uid = state.user_id
+    # GET /users/export is admin-only
+    ADMIN_USER_IDS.add(uid)
+
+    def task_id(i: int) -> int:
+        return state.task_ids[i % len(state.task_ids)]
+
+    async def create_task(http, i):
+        resp = await http.post(f"/users/{uid}/tasks", json={"name": f"load {i}", "content": "x" * 256})
+        state.created.append(resp.json()["id"])
+        return resp
+
+    async def create_batch(http, i):
+        items = [{"name": f"batch {i}.{n}", "content": "x" * 256} for n in range(10)]
+        resp = await http.post(f"/users/{uid}/tasks:batch", json={"items": items})
+        state.batch_created.append([r["id"] for r in resp.json()["results"]])
+        return resp
+
+    async def poll(http, path):
+        # a polling client: revalidates with the ETag of its previous response
+        etag = state.etags.get(path)
+        resp = await http.get(path, headers={"If-None-Match": etag} if etag else {})
+        state.etags[path] = resp.headers.get("etag", etag)
+        return resp
+
+    async def signup(http, i):
+        n = next(state.emails)
+        body = {"name": f"load{n}", "email": f"load{n}@bench.local", "password": "hunter22"}
+        return await http.post("/users/", json=body)
+
+    # order matters: deletes consume the ids created above
+    return {
+        "GET /": lambda http, i: http.get("/"),
+        "GET /metrics": lambda http, i: http.get("/metrics"),
+        "POST /users/": signup,
+        "GET /users/": lambda http, i: http.get("/users/"),
+        "GET /users/export": lambda http, i: http.get("/users/export"),
+        "POST /users/{user_id}/tasks": create_task,
+        "POST /users/{user_id}/tasks:batch": create_batch,
+        "GET /users/{user_id}/tasks": lambda http, i: http.get(f"/users/{uid}/tasks"),
+        "GET /users/{user_id}/tasks?view=summary": lambda http, i: http.get(
+            f"/users/{uid}/tasks", params={"view": "summary"}
+        ),
+        "GET /users/{user_id}/stats": lambda http, i: http.get(f"/users/{uid}/stats"),
+        "GET /users/{user_id}/tasks/export": lambda http, i: http.get(f"/users/{uid}/tasks/export"),
+        "GET /tasks/{task_id}": lambda http, i: http.get(f"/tasks/{task_id(i)}"),
+        "GET /tasks/{task_id} (If-None-Match)": lambda http, i: poll(http, f"/tasks/{task_id(i)}"),
+        "GET /users/{user_id}/tasks (If-None-Match)": lambda http, i: poll(http, f"/users/{uid}/tasks"),
+        "PUT /tasks/{task_id}": lambda http, i: http.put(f"/tasks/{task_id(i)}", json={"name": f"edit {i}"}),
+        "PATCH /tasks:batch": lambda http, i: http.patch(
+            "/tasks:batch",
+            json={"items": [{"id": task_id(i + n), "content": f"edit {i}"} for n in range(10)]},
+        ),
+        "DELETE /tasks/{task_id}": lambda http, i: http.delete(f"/tasks/{state.created.pop()}"),
+        "DELETE /tasks:batch": lambda http, i: http.request(
+            "DELETE", "/tasks:batch", json={"ids": state.batch_created.pop()}
+        ),
+    }
+
+
+async def run_scenario(http: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int) -> dict:
+    counter = itertools.count()
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while (i := next(counter)) < requests:
+            start = time.perf_counter()
+            resp = await scenario(http, i)
+            latencies.append(time.perf_counter() - start)
+            if resp.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    result = summarize(latencies)
+    result["rps"] = round(len(latencies) / elapsed, 1) if elapsed else 0.0
+    result["errors"] = errors
+    return result
+
+
+async def main(args) -> int:
+    await reset_database()
+    user_id = (await seed(users=args.users, tasks_per_user=args.tasks))[0]
+    state = State(user_id, list(range(1, args.tasks + 1)))
+
+    results = {}
+    async with client(user_id) as http:
+        for name, scenario in scenarios(state).items():
+            if args.only and name not in args.only:
+                continue
+            # signups are bcrypt-bound; keep their count proportionate
+            requests = max(1, args.requests // 10) if name == "POST /users/" else args.requests
+            results[name] = await run_scenario(http, scenario, requests, args.concurrency)
+
+    write_results(results, args.output)
+    return check_baseline(results, "load", args, higher_is_better=("rps",), lower_is_better=("p95_ms", "p99_ms"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--users", type=int, default=10, help="seeded users")
+    parser.add_argument("--tasks", type=int, default=200, help="seeded tasks for the first user")
+    parser.add_argument("--only", action="append", help="run only this scenario (repeatable)")
+    add_baseline_arguments(parser)
+    sys.exit(asyncio.run(main(parser.parse_args())))
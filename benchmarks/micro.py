@@ -0,0 +1,96 @@
+"""
+Micro-benchmarks for hot helpers: schema_to_dict, TaskRead serialization
+(including a 1000-row page through FastAPI's response_model path vs
+response_utility), cursor encoding, bearer tokens and password hashing.
+
+    python -m benchmarks.micro
+    python -m benchmarks.micro --save-baseline
+
+Results (ns per op and ops/s) are printed as JSON and compared against a
+stored baseline like benchmarks.load.
+"""
+import argparse
+import sys
+import timeit
+from datetime import datetime, timezone
+
+from fastapi.responses import JSONResponse
+
+from benchmarks.common import add_baseline_arguments, check_baseline, write_results
+from app.core.security import decode_token, issue_token
+from app.models.task import Task
+from app.schemas.task import TaskCreate, TaskPage, TaskRead
+from app.utilities.create_utility import schema_to_dict
+from app.utilities.pagination_utility import decode_cursor, encode_cursor
+from app.utilities.response_utility import GZIP_LEVEL, compress, dump_json, dump_msgpack, msgpack, row_dicts
+from app.utilities.password_utility import hash_password, verify_password
+
+
+def _task(i: int = 1) -> Task:
+    now = datetime.now(timezone.utc)
+    return Task(id=i, user_id=1, name=f"note {i}", content="x" * 1024, created_at=now, updated_at=now, version=1)
+
+
+def _response_model_page(rows) -> bytes:
+    # what a `return TaskPage(...)` endpoint costs: build the models, then FastAPI
+    # dumps them, validates the dump against response_model and renders JSON
+    page = TaskPage(items=[TaskRead.model_validate(row) for row in rows])
+    validated = TaskPage.model_validate(page.model_dump())
+    return JSONResponse(validated.model_dump(mode="json")).body
+
+
+def cases() -> dict:
+    create = TaskCreate(name="note", content="x" * 1024)
+    task = _task()
+    page = [_task(i) for i in range(100)]
+    rows = [_task(i) for i in range(1000)]
+    body = dump_json({"items": row_dicts(rows, TaskRead), "next_cursor": None})
+    cursor = encode_cursor(user_id=1, id=12345)
+    hashed = hash_password("hunter22")
+    token = issue_token(1)
+    return {
+        "schema_to_dict(TaskCreate)": lambda: schema_to_dict(create),
+        "TaskRead.model_validate(Task)": lambda: TaskRead.model_validate(task),
+        "TaskRead json (1 row)": lambda: TaskRead.model_validate(task).model_dump_json(),
+        "TaskRead json (100 rows)": lambda: [TaskRead.model_validate(t).model_dump_json() for t in page],
+        "TaskPage 1000 rows: response_model + json": lambda: _response_model_page(rows),
+        "TaskPage 1000 rows: row_dicts + orjson": lambda: dump_json({"items": row_dicts(rows, TaskRead), "next_cursor": None}),
+        "TaskPage 1000 rows: row_dicts + msgpack": (
+            (lambda: dump_msgpack({"items": row_dicts(rows, TaskRead), "next_cursor": None})) if msgpack else None
+        ),
+        f"TaskPage 1000 rows: gzip {GZIP_LEVEL} of the orjson body": lambda: compress(body, "gzip"),
+        "encode_cursor": lambda: encode_cursor(user_id=1, id=12345),
+        "decode_cursor": lambda: decode_cursor(cursor),
+        "issue_token": lambda: issue_token(1),
+        # per-request auth cost; compare with verify_password below
+        "decode_token": lambda: decode_token(token),
+        "hash_password": lambda: hash_password("hunter22"),
+        "verify_password": lambda: verify_password("hunter22", hashed),
+    }
+
+
+def measure(fn, min_time: float) -> dict:
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    best = min(timer.repeat(repeat=3, number=number)) / number
+    return {"ns_per_op": round(best * 1e9, 1), "ops_per_s": round(1 / best, 1)}
+
+
+def main(args) -> int:
+    results = {
+        name: measure(fn, args.min_time)
+        for name, fn in cases().items()
+        # fn is None when the optional package it needs is not installed
+        if fn is not None and (not args.only or name in args.only)
+    }
+    write_results(results, args.output)
+    return check_baseline(results, "micro", args, higher_is_better=("ops_per_s",), lower_is_better=("ns_per_op",))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing run")
+    parser.add_argument("--only", action="append", help="run only this case (repeatable)")
+    add_baseline_arguments(parser)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,62 @@
+"""
+Count the SQL statements issued while a block of code runs.
+
+Used to hold endpoints to a declared query budget (see
+benchmarks/check_query_budgets.py and tests/test_query_budgets.py). Statements
+are attributed through a context variable, so concurrent requests do not see
+each other's queries. Test tooling only: the app never imports it.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_current_log: ContextVar[Optional[List[str]]] = ContextVar("query_log", default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    log = _current_log.get()
+    if log is not None:
+        log.append(statement)
+
+
+def install() -> None:
+    """Attach the statement listener to every engine, primary and replicas (idempotent)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+
+
+@contextmanager
+def count_queries() -> Iterator[List[str]]:
+    """
+    Collect the statements executed inside the block; an executemany counts once.
+
+        with count_queries() as queries:
+            await client.get("/tasks/1")
+        assert len(queries) == 1
+    """
+    install()
+    log: List[str] = []
+    token = _current_log.set(log)
+    try:
+        yield log
+    finally:
+        _current_log.reset(token)
+
+
+@contextmanager
+def query_budget(budget: int, label: str = "") -> Iterator[List[str]]:
+    """Like count_queries, but raise QueryBudgetExceeded if more than `budget` statements ran."""
+    with count_queries() as log:
+        yield log
+    if len(log) > budget:
+        listing = "\n  ".join(log)
+        raise QueryBudgetExceeded(
+            f"{label or 'block'} issued {len(log)} queries (budget {budget}):\n  {listing}"
+        )
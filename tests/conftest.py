@@ -0,0 +1,35 @@
+"""
+Shared fixtures. The checks run the app in-process the way the benchmarks do
+(benchmarks.common): against a throwaway SQLite database, or DATABASE_URL
+when it is set.
+"""
+import asyncio
+import os
+import secrets
+
+# before the app is imported: tokens minted here must also verify in the
+# app.serve workers of test_fork_safety
+os.environ.setdefault("AUTH_SECRET_KEY", secrets.token_hex(32))
+# bcrypt on the default thread pool rather than a process pool per test run
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+
+import pytest  # noqa: E402
+
+import benchmarks.common  # noqa: E402,F401  (sets DATABASE_URL before the app is imported)
+from app.db.session import dispose_engines  # noqa: E402
+
+
+@pytest.fixture
+def run():
+    """Run a coroutine on a fresh event loop, disposing of the engines (bound to that loop) afterwards."""
+
+    def _run(coro):
+        async def main():
+            try:
+                return await coro
+            finally:
+                await dispose_engines()
+
+        return asyncio.run(main())
+
+    return _run
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from app.core import admission
+from app.core.admission import AdmissionGate, Overloaded
+from benchmarks.common import client, reset_database, seed
+
+
+async def _overloaded_reads(monkeypatch):
+    await reset_database()
+    (user_id,) = await seed(users=1, tasks_per_user=1)
+    gate = AdmissionGate(admission.READS, 1, 0, 0.1)
+    monkeypatch.setitem(admission.gates, admission.READS, gate)
+    async with client(user_id) as http:
+        task_id = (await http.get(f"/users/{user_id}/tasks")).json()["items"][0]["id"]
+        await gate.acquire()  # a read in flight, and no room to queue
+        try:
+            rejected = await http.get(f"/users/{user_id}/tasks")
+            write = await http.put(f"/tasks/{task_id}", json={"name": "still writable"})
+        finally:
+            gate.release()
+        admitted = await http.get(f"/users/{user_id}/tasks")
+        return rejected, write, admitted, gate.in_flight
+
+
+def test_full_gate_answers_503_with_retry_after(run, monkeypatch):
+    rejected, write, admitted, in_flight = run(_overloaded_reads(monkeypatch))
+    assert rejected.status_code == 503
+    assert rejected.headers["retry-after"] == str(admission.ADMISSION_RETRY_AFTER_SECONDS)
+    # writes have their own gate
+    assert write.status_code == 200
+    assert admitted.status_code == 200
+    assert in_flight == 0
+
+
+async def _queue_timeout():
+    gate = AdmissionGate("test", 1, 1, 0.05)
+    await gate.acquire()
+    queued = asyncio.create_task(gate.acquire())
+    await asyncio.sleep(0)
+    with pytest.raises(Overloaded):
+        await gate.acquire()  # the queue is full
+    with pytest.raises(Overloaded):
+        await queued  # waited longer than queue_timeout
+    gate.release()
+    await gate.acquire()  # the slot is free again
+    gate.release()
+    return gate.in_flight, len(gate)
+
+
+def test_queued_request_times_out(run):
+    assert run(_queue_timeout()) == (0, 0)
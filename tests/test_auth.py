@@ -0,0 +1,94 @@
+import asyncio
+
+from app.core import security
+from app.services import auth_service
+from benchmarks.common import auth_headers, client, reset_database, seed
+
+SIGNUP = {"name": "z", "email": "z@example.com", "password": "hunter22"}
+LOGIN = {"email": SIGNUP["email"], "password": SIGNUP["password"]}
+
+
+async def _scoping():
+    await reset_database()
+    a, b = await seed(users=2, tasks_per_user=1)
+    async with client() as http:
+        foreign_task = (await http.get(f"/users/{b}/tasks", headers=auth_headers(b))).json()["items"][0]["id"]
+        return {
+            "no token": (await http.get(f"/users/{a}/tasks")).status_code,
+            "bad token": (await http.get(f"/users/{a}/tasks", headers={"Authorization": "Bearer x.y.z"})).status_code,
+            "own listing": (await http.get(f"/users/{a}/tasks", headers=auth_headers(a))).status_code,
+            "foreign listing": (await http.get(f"/users/{b}/tasks", headers=auth_headers(a))).status_code,
+            "foreign stats": (await http.get(f"/users/{b}/stats", headers=auth_headers(a))).status_code,
+            # someone else's task does not exist for the caller
+            **{
+                f"foreign task {method}": (
+                    await http.request(
+                        method,
+                        f"/tasks/{foreign_task}",
+                        json={"name": "x"} if method == "PUT" else None,
+                        headers=auth_headers(a),
+                    )
+                ).status_code
+                for method in ("GET", "PUT", "DELETE")
+            },
+            "foreign task untouched": (await http.get(f"/tasks/{foreign_task}", headers=auth_headers(b))).status_code,
+        }
+
+
+def test_requests_are_scoped_to_the_token_owner(run):
+    assert run(_scoping()) == {
+        "no token": 401,
+        "bad token": 401,
+        "own listing": 200,
+        "foreign listing": 403,
+        "foreign stats": 403,
+        "foreign task GET": 404,
+        "foreign task PUT": 404,
+        "foreign task DELETE": 404,
+        "foreign task untouched": 200,
+    }
+
+
+async def _login(http):
+    assert (await http.post("/users/", json=SIGNUP)).status_code == 200
+    assert (await http.post("/auth/login", json={**LOGIN, "password": "wrong"})).status_code == 401
+    response = await http.post("/auth/login", json=LOGIN)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def _refresh_reuse(monkeypatch):
+    await reset_database()
+    async with client() as http:
+        pair = await _login(http)
+        rotated_user_id = (await http.get("/users/")).json()["items"][0]["id"]
+        refreshes = await asyncio.gather(
+            *(http.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]}) for _ in range(5))
+        )
+        rotated = next(r.json() for r in refreshes if r.status_code == 200)
+        # another worker: only the database knows the token was rotated
+        fresh = security.RevocationList()
+        monkeypatch.setattr(security, "revocations", fresh)
+        monkeypatch.setattr(auth_service, "revocations", fresh)
+        replayed = await http.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]})
+        headers = {"Authorization": "Bearer " + rotated["access_token"]}
+        logout = await http.post("/auth/logout", json={"refresh_token": rotated["refresh_token"]}, headers=headers)
+        after_logout = await http.post("/auth/refresh", json={"refresh_token": rotated["refresh_token"]})
+        access_after_logout = await http.get(f"/users/{rotated_user_id}/tasks", headers=headers)
+        return (
+            sorted(r.status_code for r in refreshes),
+            replayed.status_code,
+            logout.status_code,
+            after_logout.status_code,
+            access_after_logout.status_code,
+        )
+
+
+def test_refresh_tokens_are_single_use(run, monkeypatch):
+    refreshes, replayed, logout, after_logout, access_after_logout = run(_refresh_reuse(monkeypatch))
+    # concurrent refreshes with one token: exactly one wins
+    assert refreshes == [200, 401, 401, 401, 401]
+    assert replayed == 401
+    assert logout == 204
+    assert after_logout == 401
+    assert access_after_logout == 401
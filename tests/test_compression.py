@@ -0,0 +1,42 @@
+import orjson
+from sqlalchemy import select
+
+from app.db.session import async_session
+from app.models.task import Task
+from benchmarks.common import client, reset_database, seed
+
+BODY = "lorem ipsum dolor " * 20_000 + "zanzibar"
+
+
+async def _stored(task_id: int):
+    async with async_session() as db:
+        task = await db.get(Task, task_id)
+        return task.content_text, task.content_packed is not None
+
+
+async def _round_trip():
+    await reset_database()
+    (user_id,) = await seed(users=1, tasks_per_user=0)
+    async with client(user_id) as http:
+        created = (await http.post(f"/users/{user_id}/tasks", json={"name": "big", "content": BODY})).json()
+        task_id = created["id"]
+        head, packed = await _stored(task_id)
+        read = (await http.get(f"/tasks/{task_id}")).json()
+        export = await http.get(f"/users/{user_id}/tasks/export")
+        exported = [orjson.loads(line) for line in export.content.splitlines()]
+        search = (await http.get(f"/users/{user_id}/tasks/search", params={"q": "zanzibar"})).json()["items"]
+        updated = (await http.put(f"/tasks/{task_id}", json={"content": "small"})).json()
+        small_head, small_packed = await _stored(task_id)
+    return created, head, packed, read, exported, search, updated, small_head, small_packed
+
+
+def test_compressed_content_round_trips(run):
+    created, head, packed, read, exported, search, updated, small_head, small_packed = run(_round_trip())
+    # stored compressed, with only the head in the plain column
+    assert packed
+    assert len(head) < len(BODY)
+    assert created["content"] == read["content"] == BODY
+    assert [task["content"] for task in exported] == [BODY]
+    assert [hit["id"] for hit in search] == [created["id"]]
+    assert updated["content"] == small_head == "small"
+    assert not small_packed
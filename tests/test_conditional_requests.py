@@ -0,0 +1,58 @@
+from sqlalchemy import update
+
+from app.db.session import async_session
+from app.models.task import Task
+from benchmarks.common import auth_headers, client, reset_database, seed
+
+
+async def _pin_updated_at(user_id: int) -> None:
+    # as if every write landed in the same second (SQLite keeps whole seconds)
+    # or committed with an earlier now()
+    async with async_session() as db:
+        await db.execute(update(Task).where(Task.user_id == user_id).values(updated_at=Task.created_at))
+        await db.commit()
+
+
+async def _same_second_update():
+    await reset_database()
+    (user_id,) = await seed(users=1, tasks_per_user=2)
+    headers = auth_headers(user_id)
+    async with client() as http:
+        await _pin_updated_at(user_id)
+        before = await http.get(f"/users/{user_id}/tasks", headers=headers)
+        task_id = before.json()["items"][0]["id"]
+        updated = await http.put(f"/tasks/{task_id}", json={"name": "renamed"}, headers=headers)
+        assert updated.status_code == 200, updated.text
+        await _pin_updated_at(user_id)
+        after = await http.get(f"/users/{user_id}/tasks", headers={**headers, "If-None-Match": before.headers["etag"]})
+        return before, after
+
+
+def test_listing_etag_changes_on_same_second_update(run):
+    before, after = run(_same_second_update())
+    assert after.status_code == 200
+    assert after.headers["etag"] != before.headers["etag"]
+    assert "renamed" in [item["name"] for item in after.json()["items"]]
+
+
+async def _if_match():
+    await reset_database()
+    (user_id,) = await seed(users=1, tasks_per_user=1)
+    headers = auth_headers(user_id)
+    async with client() as http:
+        task_id = (await http.get(f"/users/{user_id}/tasks", headers=headers)).json()["items"][0]["id"]
+        stale = (await http.get(f"/tasks/{task_id}", headers=headers)).headers["etag"]
+        fresh = await http.put(f"/tasks/{task_id}", json={"name": "first"}, headers={**headers, "If-Match": stale})
+        lost = await http.put(f"/tasks/{task_id}", json={"name": "second"}, headers={**headers, "If-Match": stale})
+        not_modified = await http.get(f"/tasks/{task_id}", headers={**headers, "If-None-Match": fresh.headers["etag"]})
+        current = await http.get(f"/tasks/{task_id}", headers=headers)
+        return stale, fresh, lost, not_modified, current
+
+
+def test_if_match_rejects_a_stale_etag(run):
+    stale, fresh, lost, not_modified, current = run(_if_match())
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] != stale
+    assert lost.status_code == 412
+    assert not_modified.status_code == 304
+    assert current.json()["name"] == "first"
@@ -0,0 +1,10 @@
+from benchmarks.bench_export_memory import compare
+
+# the benchmark's default --max-ratio
+MAX_PEAK_RATIO = 1.5
+
+
+def test_export_memory_does_not_grow_with_row_count(run):
+    result = run(compare(2_000, 20_000))
+    assert result["large"]["rows"] == 20_000
+    assert result["peak_ratio"] <= MAX_PEAK_RATIO, result
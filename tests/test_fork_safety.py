@@ -0,0 +1,13 @@
+from benchmarks.check_fork_safety import check_fork, check_serve, check_serve_defaults
+
+
+def test_forked_child_opens_its_own_connections(run):
+    assert run(check_fork()) == 0
+
+
+def test_serve_workers_recycle_and_shut_down_cleanly():
+    assert check_serve(requests=40, graceful_timeout=10) == 0
+
+
+def test_serve_starts_with_default_settings():
+    assert check_serve_defaults() == 0
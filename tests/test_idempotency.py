@@ -0,0 +1,62 @@
+import asyncio
+
+from app.services import password_service
+from benchmarks.common import client, reset_database, seed
+
+TASK = {"name": "a", "content": "b"}
+SIGNUP = {"name": "n", "email": "n@example.com", "password": "hunter22"}
+
+
+async def _task_replay():
+    await reset_database()
+    (user_id,) = await seed(users=1, tasks_per_user=0)
+    async with client(user_id) as http:
+        url = f"/users/{user_id}/tasks"
+        first = await http.post(url, json=TASK, headers={"Idempotency-Key": "k1"})
+        replay = await http.post(url, json=TASK, headers={"Idempotency-Key": "k1"})
+        mismatch = await http.post(url, json={**TASK, "name": "other"}, headers={"Idempotency-Key": "k1"})
+        concurrent = await asyncio.gather(
+            *(http.post(url, json=TASK, headers={"Idempotency-Key": "k2"}) for _ in range(5))
+        )
+        listing = (await http.get(url)).json()["items"]
+        return first, replay, mismatch, concurrent, listing
+
+
+def test_retried_create_is_replayed(run):
+    first, replay, mismatch, concurrent, listing = run(_task_replay())
+    assert first.status_code == replay.status_code == 201
+    assert replay.content == first.content
+    assert replay.headers.get("idempotent-replayed") == "true"
+    assert "idempotent-replayed" not in first.headers
+    # the same key with a different body is a client bug, not a retry
+    assert mismatch.status_code == 422
+    assert {r.status_code for r in concurrent} == {201}
+    assert len({r.json()["id"] for r in concurrent}) == 1
+    assert len(listing) == 2
+
+
+async def _signup_replay(monkeypatch):
+    await reset_database()
+    hashes = []
+    hash_password = password_service.hash_password
+
+    async def counting(password):
+        hashes.append(password)
+        return await hash_password(password)
+
+    monkeypatch.setattr(password_service, "hash_password", counting)
+    async with client() as http:
+        concurrent = await asyncio.gather(
+            *(http.post("/users/", json=SIGNUP, headers={"Idempotency-Key": "s1"}) for _ in range(3))
+        )
+        new_key = await http.post("/users/", json=SIGNUP, headers={"Idempotency-Key": "s2"})
+        return concurrent, new_key, len(hashes)
+
+
+def test_retried_signup_hashes_once(run, monkeypatch):
+    concurrent, new_key, hashes = run(_signup_replay(monkeypatch))
+    assert [r.status_code for r in concurrent] == [200, 200, 200]
+    assert len({r.json()["id"] for r in concurrent}) == 1
+    assert hashes == 1
+    # a new key is a new request: the email is taken
+    assert new_key.status_code == 400
@@ -0,0 +1,8 @@
+from benchmarks.check_query_budgets import BUDGETS, check
+
+
+def test_endpoints_stay_within_their_query_budget(run):
+    lines = []
+    failures = run(check(lines.append))
+    assert failures == 0, "\n".join(lines)
+    assert len(lines) == len(BUDGETS)
@@ -0,0 +1,25 @@
+from benchmarks.common import auth_headers, client, reset_database, seed
+
+CONTENT = 'before <script>alert(1)</script> payload & <img src=x onerror="alert(2)"> after'
+
+
+async def _search_markup():
+    await reset_database()
+    (user_id,) = await seed(users=1, tasks_per_user=0)
+    headers = auth_headers(user_id)
+    async with client() as http:
+        body = {"name": "notes", "content": CONTENT}
+        created = await http.post(f"/users/{user_id}/tasks", json=body, headers=headers)
+        assert created.status_code == 201, created.text
+        response = await http.get(f"/users/{user_id}/tasks/search", params={"q": "payload"}, headers=headers)
+        assert response.status_code == 200, response.text
+        return response.json()["items"]
+
+
+def test_snippet_escapes_stored_markup(run):
+    (hit,) = run(_search_markup())
+    snippet = hit["snippet"]
+    assert "<b>payload</b>" in snippet
+    # <b>...</b> around the match is the only markup left
+    assert snippet.replace("<b>payload</b>", "").count("<") == 0
+    assert "&amp;" in snippet
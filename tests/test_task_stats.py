@@ -0,0 +1,57 @@
+from sqlalchemy import func, select
+
+from app.db.session import async_session
+from app.models.task import Task
+from app.services import write_coalescer
+from app.services.write_coalescer import WriteCoalescer
+from benchmarks.common import client, reset_database, seed
+
+
+async def _actual(user_id: int):
+    content_length = func.coalesce(Task.content_chars, func.length(Task.content_text), 0)
+    stmt = select(func.count(), func.coalesce(func.sum(content_length), 0)).where(Task.user_id == user_id)
+    async with async_session() as db:
+        return tuple((await db.execute(stmt)).one())
+
+
+async def _stats_after_writes(monkeypatch):
+    await reset_database()
+    user_id, other_id = await seed(users=2, tasks_per_user=3, content="abc")
+    seen = []
+    async with client(user_id) as http:
+
+        async def check(step):
+            stats = (await http.get(f"/users/{user_id}/stats")).json()
+            seen.append((step, (stats["task_count"], stats["content_length"]), await _actual(user_id)))
+
+        await check("seeded")
+        created = (await http.post(f"/users/{user_id}/tasks", json={"name": "big", "content": "y" * 40_000})).json()
+        await check("create (compressed)")
+        items = [{"name": "b", "content": "12345"}] * 5
+        batch = await http.post(f"/users/{user_id}/tasks:batch", json={"items": items})
+        batch_ids = [r["task"]["id"] for r in batch.json()["results"]]
+        await check("batch create")
+        await http.put(f"/tasks/{created['id']}", json={"content": "shorter"})
+        await check("update")
+        await http.patch("/tasks:batch", json={"items": [{"id": batch_ids[0], "content": None}]})
+        await check("batch update")
+        await http.delete(f"/tasks/{created['id']}")
+        await check("delete")
+        await http.request("DELETE", "/tasks:batch", json={"ids": batch_ids[1:3]})
+        await check("batch delete")
+        coalescer = WriteCoalescer(0.002, 50)
+        monkeypatch.setattr(write_coalescer, "coalescer", coalescer)
+        for i in range(3):
+            await http.post(f"/users/{user_id}/tasks", json={"name": f"c{i}", "content": "zz"})
+        await coalescer.drain()
+        await check("coalesced create")
+        other = (await http.get(f"/users/{other_id}/stats")).status_code
+    return seen, other
+
+
+def test_stats_follow_every_write_path(run, monkeypatch):
+    seen, other = run(_stats_after_writes(monkeypatch))
+    for step, reported, actual in seen:
+        assert reported == actual, step
+    assert seen[0][1] == (3, 9)
+    assert other == 403
@@ -0,0 +1,42 @@
+import asyncio
+
+from sqlalchemy import event, select
+from sqlalchemy.exc import IntegrityError
+
+from app.db.session import async_session, get_engine
+from app.models.task import Task, content_columns
+from app.services.write_coalescer import WriteCoalescer
+from benchmarks.common import reset_database, seed
+
+
+async def _batch_with_a_bad_row():
+    await reset_database()
+    (user_id,) = await seed(users=1, tasks_per_user=1)
+    async with async_session() as db:
+        (task_id,) = (await db.scalars(select(Task.id).where(Task.user_id == user_id))).all()
+    commits = []
+    event.listen(get_engine().sync_engine, "commit", commits.append)
+    coalescer = WriteCoalescer(0.01, 100)
+    inserts = [{"user_id": user_id, "name": f"n{i}", **content_columns("x")} for i in range(4)]
+    inserts[2]["name"] = None  # NOT NULL
+    outcomes = await asyncio.gather(
+        *(coalescer.insert(values) for values in inserts),
+        coalescer.update(task_id, {"name": "updated"}),
+        coalescer.update(task_id + 1000, {"name": "missing"}),
+        return_exceptions=True,
+    )
+    await coalescer.drain()
+    async with async_session() as db:
+        names = set((await db.scalars(select(Task.name).where(Task.user_id == user_id))).all())
+    return outcomes, len(commits), names
+
+
+def test_failed_batch_is_replayed_per_write(run):
+    outcomes, commits, names = run(_batch_with_a_bad_row())
+    first, second, bad, fourth, updated, missing = outcomes
+    assert isinstance(bad, IntegrityError)
+    assert [first.name, second.name, fourth.name, updated.name] == ["n0", "n1", "n3", "updated"]
+    assert missing is None
+    # the failed batch rolled back; the replay committed the rest together
+    assert commits == 1
+    assert names == {"n0", "n1", "n3", "updated"}